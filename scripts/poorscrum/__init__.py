@@ -4,7 +4,62 @@ VERSION = (0, 0, 0)
 __version__ = ".".join(map(str, VERSION[0:3])) + "".join(VERSION[3:])
 __license__ = "BSD"
 
+import importlib
+
 from poorscrum.poorscrum_config import *
-from poorscrum.poorscrum_story import *
-from poorscrum.poorscrum_tasks import *
-from poorscrum.poorscrum_tools import *
+
+""" The names of the submodules are loaded on first use
+
+So the scripts pay for python-pptx, NumPy and matplotlib only on the code
+paths which need them, and '--version' or '--help' stay fast.
+"""
+
+_SUBMODULES = {
+    "poorscrum_story": ("Status", "STATUSES", "read_fields", "write_fields",
+                        "read_layout_fields", "add_layout_fields"),
+    "poorscrum_slide": ("Poorscrum_Slide", "content_from_slide", "keep_presentations",
+                        "open_presentation"),
+    "poorscrum_ooxml": ("read_rels", "slide_names", "paras_from_body", "rows_from_table",
+                        "read_slide", "count_slides", "read_slide_at", "read_slides",
+                        "layout_fingerprint", "deck_fingerprints"),
+    "poorscrum_fields": ("SIZE_ITEMS", "Poorscrum_Fields", "fields_cache_name",
+                         "compile_fields", "load_fields"),
+    "poorscrum_tasks": ("TASK_ROWS", "Poorscrum_Tasks"),
+    "poorscrum_clone": ("Poorscrum_Prototype",),
+    "poorscrum_text": ("LINK_PATTERN", "to_ascii", "frame_segments", "join_text",
+                       "extract_text", "split_text", "import_text"),
+    "poorscrum_tools": ("SCALES", "TSHIRT_SIZES", "fibonacci", "scale_values",
+                        "story_points", "task_totals", "prefetch"),
+    "poorscrum_work": ("work_matrix", "work_totals", "period_estimates", "capacity_margin"),
+    "poorscrum_history": ("Poorscrum_History",),
+    "poorscrum_chart": ("render_burndown",),
+    "poorscrum_cache": ("cache_name", "cached_slides"),
+    "poorscrum_store": ("Poorscrum_Store", "store_from_tree", "tree_from_store"),
+    "poorscrum_kanban": ("TEAM", "OWNED", "story_owner", "Poorscrum_Kanban"),
+    "poorscrum_writer": ("ARCHIVES", "archive_name", "Poorscrum_Writer"),
+    "poorscrum_profile": ("PHASES", "Poorscrum_Phase", "Poorscrum_Profile", "phase", "in_phase",
+                          "timed_items", "add_profile_argument", "profiled"),
+}
+
+_LAZY_NAMES = dict((name, module)
+                   for module, names in _SUBMODULES.items() for name in names)
+
+__all__ = ["VERSION", "__version__",
+           "PICKUP_FILE", "EMPTY_PPTX", "SPRINT_FILE", "BURNDOWN_SAVE_NAME", "HISTORY_DIR",
+           "SOCKET_FILE"] \
+           + list(_LAZY_NAMES)
+
+
+def __getattr__(name):
+    try:
+        module = _LAZY_NAMES[name]
+    except KeyError:
+        raise AttributeError("module 'poorscrum' has no attribute '{}'".format(name)) from None
+
+    value = getattr(importlib.import_module("poorscrum." + module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(_LAZY_NAMES))
@@ -0,0 +1,107 @@
+# -*- coding: utf-8 -*-
+
+import marshal
+import os
+import sys
+import tempfile
+import zipfile
+
+from poorscrum.poorscrum_ooxml import slide_names, read_slide
+from poorscrum.poorscrum_slide import Poorscrum_Slide
+
+""" Keeps the content of the slides in a file next to the PPTX file
+
+An entry is keyed by the CRC and the size of the slide part and of its
+relationships part as listed in the zip directory. A slide is read again
+only if one of them changed. Entries of slides no longer in the deck are
+dropped whenever the cache file is written.
+
+The entries are stored with marshal. A cache written by another version of
+the cache or of Python is ignored and replaced.
+"""
+
+CACHE_VERSION = 2
+CACHE_MAGIC = "poorscrum-cache-{:d}-{}".format(CACHE_VERSION, sys.implementation.cache_tag)
+
+
+def cache_name(pptx_file):
+    """ Returns the name of the cache file of a PPTX file """
+    return os.path.splitext(pptx_file)[0] + ".poorscrum-cache"
+
+
+def slide_key(from_zip, part_name):
+    """ Returns the key of a slide from the zip directory entries of its parts """
+
+    rels_name = "{}/_rels/{}.rels".format(*part_name.rsplit("/", 1))
+    key = []
+    for name in (part_name, rels_name):
+        try:
+            info = from_zip.getinfo(name)
+        except KeyError:
+            key.append("-")
+            continue
+        key.append("{:08x}:{:d}".format(info.CRC, info.file_size))
+    return "/".join(key)
+
+
+def read_cache(cache_file):
+    """ Returns the entries of a cache file. No entries if it is unusable """
+
+    try:
+        with open(cache_file, "rb") as cache:
+            magic, entries = marshal.load(cache)
+    except (OSError, EOFError, ValueError, TypeError):
+        return dict()
+
+    if magic != CACHE_MAGIC or not isinstance(entries, dict):
+        return dict()
+    return entries
+
+
+def write_cache(cache_file, entries):
+    """ Replaces the cache file. Returns False if it cannot be written """
+
+    try:
+        handle, temp_name = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(cache_file)), suffix=".tmp")
+    except OSError:
+        return False
+
+    try:
+        with os.fdopen(handle, "wb") as cache:
+            marshal.dump((CACHE_MAGIC, entries), cache)
+        os.replace(temp_name, cache_file)
+    except OSError:
+        os.remove(temp_name)
+        return False
+    return True
+
+
+def cached_slides(pptx_file, cache_file = None):
+    """ Returns the content of all slides of a PPTX file with the cache
+
+    Only the slides without a matching entry are read from the PPTX file.
+    The cache file is written again if it changed.
+    """
+
+    if cache_file is None:
+        cache_file = cache_name(pptx_file)
+    entries = read_cache(cache_file)
+
+    contents = []
+    kept = dict()
+    changed = False
+    with zipfile.ZipFile(pptx_file) as from_zip:
+        for part_name in slide_names(from_zip):
+            key = slide_key(from_zip, part_name)
+            entry = entries.get(key)
+            if entry is None:
+                content = read_slide(from_zip, part_name)
+                entry = (content.placeholders, content.tables)
+                changed = True
+            kept[key] = entry
+            contents.append(Poorscrum_Slide(*entry))
+
+    if changed or len(kept) != len(entries):
+        write_cache(cache_file, kept)
+    return contents
@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+
+import functools
+import io
+
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+
+""" Renders the burndown charts without the global state of pyplot
+
+Each chart has its own figure and canvas, so charts may be rendered from
+several threads at once. The images are cached by the work left, so an
+unchanged burndown is rendered only once per process. The cache lives in
+memory only and pays off under the poorscrum server, not for single runs
+of 'poorscrum_burndown.py'.
+
+Not imported with the package to keep matplotlib out of the other scripts.
+"""
+
+FIGURE_SIZE = (8, 6)
+FIGURE_DPI = 100
+
+
+@functools.lru_cache(maxsize=64)
+def _render_burndown(points_left, last_edited, image_format, dpi):
+    sprint_days = len(points_left)
+
+    figure = Figure(figsize=FIGURE_SIZE, dpi=dpi)
+    canvas = FigureCanvasAgg(figure)
+    axes = figure.add_subplot(111)
+
+    """ Draw the optimal line """
+    axes.plot((0, sprint_days-1), (max(points_left), 0), color="blue", label="optimal")
+
+    """ Draw the committed story points after sprint planning """
+    axes.bar(0, points_left[0], color="green", label="start", width=0.5)
+
+    """ Draw the actual work done """
+    if (last_edited > 1) and (last_edited <= len(points_left)):
+        axes.bar(range(1,last_edited), \
+                 points_left[1:last_edited], \
+                 color="red", label="actual", width=0.5)
+
+    """ Draw the work still to be done """
+    if (last_edited >= 1) and (last_edited < len(points_left)):
+        axes.bar(range(last_edited,len(points_left)), \
+                 points_left[last_edited:len(points_left)], \
+                 color="grey", label="estimate", width=0.5)
+
+    axes.set_ylim(0, points_left[0])
+    axes.set_yticks(range(0, points_left[0]+1, max(1, int(points_left[0] / 5))))
+
+    axes.set_xlim(-1, sprint_days)
+    axes.set_xticks(range(0, sprint_days+1, max(5, int(sprint_days / 5))))
+
+    axes.grid()
+    axes.legend()
+
+    axes.set_xlabel('SPRINT DAYS [days]')
+    axes.set_ylabel('TO BE DONE [story points]')
+
+    axes.set_title("Sprint Burndown", fontsize=20)
+
+    image = io.BytesIO()
+    canvas.print_figure(image, format=image_format, dpi=dpi)
+    return image.getvalue()
+
+
+def render_burndown(points_left, last_edited, image_format = "png", dpi = FIGURE_DPI):
+    """ Returns the image of the burndown chart as bytes """
+    return _render_burndown(tuple(int(p) for p in points_left), int(last_edited),
+                            image_format, dpi)
+
@@ -0,0 +1,39 @@
+# -*- coding: utf-8 -*-
+
+import copy
+
+""" Appends slides to a presentation as copies of a prototype slide
+
+The first slide of a layout is made by python-pptx and styled by the caller
+as usual. Its shape tree is kept as the prototype. Any further slide of the
+layout gets a copy of the prototype tree instead of having the placeholders
+of the layout cloned and styled again. Only the text is left to be set.
+"""
+
+
+class Poorscrum_Prototype:
+
+
+    def __init__(self, layout, build = None):
+        """ 'build' styles the first slide of the layout if given """
+        self.layout = layout
+        self.build = build
+        self.tree = None
+
+
+    def add_slide(self, prs):
+        """ Appends a slide of the layout to the presentation """
+
+        if self.tree is None:
+            slide = prs.slides.add_slide(self.layout)
+            if self.build is not None:
+                self.build(slide)
+            self.tree = copy.deepcopy(slide.element.cSld.spTree)
+            return slide
+
+        """ As 'add_slide' without the placeholders of the layout """
+        rId, slide = prs.part.add_slide(self.layout)
+        tree = slide.element.cSld.spTree
+        tree.getparent().replace(tree, copy.deepcopy(self.tree))
+        prs.slides._sldIdLst.add_sldId(rId)
+        return slide
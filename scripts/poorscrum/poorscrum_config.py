@@ -14,3 +14,9 @@ SPRINT_FILE = os.path.join(os.environ["HOME"], ".poorscrum", "poorscrum_sprint.i
 
 """ The storage path for the temporary burndown chart """
 BURNDOWN_SAVE_NAME = os.path.join(os.environ["HOME"], ".poorscrum", "poorscrum_burndown.png")
+
+""" The directory of the sprint history recorded by the burndown """
+HISTORY_DIR = os.path.join(os.environ["HOME"], ".poorscrum", "poorscrum_history")
+
+""" The socket the poorscrum server listens on """
+SOCKET_FILE = os.path.join(os.environ["HOME"], ".poorscrum", "poorscrum.sock")
@@ -0,0 +1,194 @@
+# -*- coding: utf-8 -*-
+
+import configparser
+import marshal
+import os
+import sys
+import tempfile
+
+from poorscrum import PICKUP_FILE
+
+""" The story fields of the pickup file compiled for the scripts
+
+The placeholder indices are integers and the size fields are picked once.
+The compiled fields are kept in a file next to the pickup file and are
+taken from there as long as the pickup file is unchanged. Within a process,
+the poorscrum server for one, they are read only once.
+
+The pickup file written by 'poorscrum_learn.py' holds the fingerprint of
+the layout it learned from. It may hold the fields of further layouts, each
+in a section 'STORY <fingerprint>'. The fields of a deck are those of the
+first of its layouts found.
+"""
+
+SIZE_ITEMS = ("size 1", "size 2", "size 3", "size 4")
+
+FIELDS_VERSION = 2
+FIELDS_MAGIC = "poorscrum-fields-{:d}-{}".format(FIELDS_VERSION, sys.implementation.cache_tag)
+
+
+class Poorscrum_Fields:
+    """ The placeholder indices of the story fields in the order of the pickup file
+
+    Reads like the mapping of 'read_fields' but with integer indices.
+    """
+
+    __slots__ = ("names", "indices", "index", "sizes", "size_indices", "fingerprint",
+                 "layouts")
+
+    def __init__(self, pairs, fingerprint = None, layouts = ()):
+        self.names = tuple(name for name, index in pairs)
+        self.indices = tuple(int(index) for name, index in pairs)
+        self.index = dict(zip(self.names, self.indices))
+        self.sizes = tuple((name, index) for name, index in zip(self.names, self.indices)
+                           if name in SIZE_ITEMS)
+        self.size_indices = frozenset(index for name, index in self.sizes)
+        self.fingerprint = fingerprint
+
+        """ The fields of the further layouts """
+        self.layouts = tuple(Poorscrum_Fields(layout_pairs, layout_fingerprint)
+                             for layout_pairs, layout_fingerprint in layouts)
+
+
+    def __getstate__(self):
+        return self.pairs(), self.fingerprint, self.layout_pairs()
+
+
+    def __setstate__(self, state):
+        self.__init__(*state)
+
+
+    def __len__(self):
+        return len(self.names)
+
+
+    def __iter__(self):
+        return iter(self.names)
+
+
+    def __contains__(self, name):
+        return name in self.index
+
+
+    def __getitem__(self, name):
+        return self.index[name]
+
+
+    def keys(self):
+        return self.names
+
+
+    def values(self):
+        return self.indices
+
+
+    def items(self):
+        return zip(self.names, self.indices)
+
+
+    def pairs(self):
+        """ The fields as in the pickup file """
+        return [(name, str(index)) for name, index in self.items()]
+
+
+    def layout_pairs(self):
+        """ The fields of the further layouts with their fingerprints """
+        return [(layout.pairs(), layout.fingerprint) for layout in self.layouts]
+
+
+    def for_deck(self, pptx_file):
+        """ Returns the fields for the layouts of a PPTX file. None if there are none
+
+        The fields learned from a layout of the PPTX file are taken first.
+        Fields without fingerprint match any PPTX file.
+        """
+
+        if self.fingerprint is None and len(self.layouts) == 0:
+            return self
+
+        from poorscrum.poorscrum_ooxml import deck_fingerprints
+        fingerprints = deck_fingerprints(pptx_file)
+        for fields in (self,) + self.layouts:
+            if fields.fingerprint in fingerprints:
+                return fields
+        return self if self.fingerprint is None else None
+
+
+    def matches(self, pptx_file):
+        """ Checks if there are fields for the layouts of a PPTX file """
+        return self.for_deck(pptx_file) is not None
+
+
+def fields_cache_name(pickup_file):
+    """ Returns the name of the file with the compiled fields """
+    return os.path.splitext(pickup_file)[0] + ".compiled"
+
+
+def compile_fields(pickup_file):
+    """ Returns the fields of a pickup file. None if it is illegal """
+
+    pickup = configparser.ConfigParser()
+    pickup.read(pickup_file)
+
+    try:
+        pairs = pickup.items("STORY")
+    except configparser.NoSectionError:
+        return None # Illegal file content
+
+    layouts = [(pickup.items(section), section.split(" ", 1)[1])
+               for section in pickup.sections() if section.startswith("STORY ")]
+    return Poorscrum_Fields(pairs, pickup.get("MASTER", "fingerprint", fallback=None), layouts)
+
+
+""" The fields read in this process by pickup file """
+_loaded_fields = dict()
+
+
+def load_fields(pickup_file = PICKUP_FILE):
+    """ Returns the compiled fields of the pickup file. None if it is illegal """
+
+    try:
+        stat = os.stat(pickup_file)
+    except OSError:
+        return None
+    stamp = [stat.st_mtime_ns, stat.st_size]
+
+    loaded = _loaded_fields.get(pickup_file)
+    if loaded is not None and loaded[0] == stamp:
+        return loaded[1]
+
+    cache_file = fields_cache_name(pickup_file)
+    try:
+        with open(cache_file, "rb") as cache:
+            magic, cache_stamp, pairs, fingerprint, layouts = marshal.load(cache)
+        if magic != FIELDS_MAGIC or cache_stamp != stamp:
+            raise ValueError
+        fields = Poorscrum_Fields(pairs, fingerprint, layouts)
+    except (OSError, EOFError, ValueError, TypeError):
+        fields = compile_fields(pickup_file)
+        if fields is None:
+            return None
+        write_fields_cache(cache_file, stamp, fields)
+
+    _loaded_fields[pickup_file] = (stamp, fields)
+    return fields
+
+
+def write_fields_cache(cache_file, stamp, fields):
+    """ Replaces the file with the compiled fields. Returns False if it cannot be written """
+
+    try:
+        handle, temp_name = tempfile.mkstemp(
+            dir=os.path.dirname(os.path.abspath(cache_file)), suffix=".tmp")
+    except OSError:
+        return False
+
+    try:
+        with os.fdopen(handle, "wb") as cache:
+            marshal.dump((FIELDS_MAGIC, stamp, fields.pairs(), fields.fingerprint,
+                          fields.layout_pairs()), cache)
+        os.replace(temp_name, cache_file)
+    except OSError:
+        os.remove(temp_name)
+        return False
+    return True
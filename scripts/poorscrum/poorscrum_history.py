@@ -0,0 +1,216 @@
+# -*- coding: utf-8 -*-
+
+import configparser
+import datetime
+import os
+
+import numpy as np
+
+from poorscrum.poorscrum_config import HISTORY_DIR
+
+""" The work left of past sprints as an append-only column store
+
+Each sprint recorded adds a row per story and day to the columns. A column
+is a flat binary file of a fixed type which is memory mapped for reading.
+The sprints are described in an ini file, the story ids are listed in a
+text file with one id per line. The position of an id is its code in the
+'story' column.
+
+The ini file is written last. Rows beyond the count recorded there are
+left over from an append which did not finish and are dropped with the
+next append.
+
+Not imported with the package to keep NumPy out of the other scripts.
+"""
+
+COLUMNS = (("sprint", "<u4"), ("story", "<u4"), ("day", "<u1"), ("points", "<i4"))
+
+SPRINTS_FILE = "sprints.ini"
+STORIES_FILE = "stories.txt"
+
+
+class Poorscrum_History:
+
+
+    def __init__(self, path = HISTORY_DIR):
+        self.path = path
+
+        self.sprints = configparser.RawConfigParser()
+        self.sprints.read(os.path.join(path, SPRINTS_FILE))
+
+        self.stories = []
+        try:
+            with open(os.path.join(path, STORIES_FILE)) as stories:
+                self.stories = stories.read().splitlines()
+        except FileNotFoundError:
+            pass
+
+
+    def __len__(self):
+        return len(self.sprints.sections())
+
+
+    @property
+    def rows(self):
+        """ The number of rows of the sprints recorded """
+        if len(self) == 0:
+            return 0
+        last = self.sprints[self.sprints.sections()[-1]]
+        return int(last["offset"]) + int(last["rows"])
+
+
+    def column_name(self, column):
+        return os.path.join(self.path, column + ".col")
+
+
+    def column(self, column):
+        """ Returns the column of the sprints recorded mapped into memory """
+        dtype = dict(COLUMNS)[column]
+        if self.rows == 0:
+            return np.zeros(0, dtype=dtype)
+        return np.memmap(self.column_name(column), dtype=dtype, mode="r",
+                         shape=(self.rows,))
+
+
+    def append(self, name, matrix, story_ids, last_edited, periods, points):
+        """ Records the stories times days work left of a sprint
+
+        Returns the number of the sprint in the history.
+        """
+
+        os.makedirs(self.path, exist_ok=True)
+
+        """ New story ids get the next codes """
+        codes = dict((story_id, code) for code, story_id in enumerate(self.stories))
+        new_ids = [story_id for story_id in dict.fromkeys(story_ids) if story_id not in codes]
+        with open(os.path.join(self.path, STORIES_FILE), "a") as stories:
+            for story_id in new_ids:
+                codes[story_id] = len(self.stories)
+                self.stories.append(story_id)
+                stories.write(story_id + "\n")
+
+        sprint = len(self)
+        offset = self.rows
+        nstories, days = matrix.shape
+
+        values = dict(
+            sprint = np.full(nstories*days, sprint),
+            story = np.repeat([codes[story_id] for story_id in story_ids], days),
+            day = np.tile(np.arange(days), nstories),
+            points = matrix.ravel())
+
+        for column, dtype in COLUMNS:
+            column_name = self.column_name(column)
+            with open(column_name, "ab") as col:
+                col.truncate(offset*np.dtype(dtype).itemsize)
+                values[column].astype(dtype).tofile(col)
+
+        self.sprints[str(sprint)] = dict(
+            name = name,
+            date = datetime.date.today().isoformat(),
+            days = str(days),
+            periods = str(periods),
+            points = str(points),
+            edited = str(last_edited),
+            offset = str(offset),
+            rows = str(nstories*days))
+
+        sprints_name = os.path.join(self.path, SPRINTS_FILE)
+        with open(sprints_name + ".tmp", "w") as sprints:
+            self.sprints.write(sprints)
+        os.replace(sprints_name + ".tmp", sprints_name)
+
+        return sprint
+
+
+    def sprint_values(self, key):
+        """ Returns an integer value of all sprints """
+        return np.array([int(self.sprints[s][key]) for s in self.sprints.sections()],
+                        dtype=int)
+
+
+    def totals(self):
+        """ Returns the sprints times days work left of the teams
+
+        Days beyond the length of a sprint are zero.
+        """
+
+        days = self.sprint_values("days")
+        width = int(days.max()) if len(days) > 0 else 0
+        sprint = self.column("sprint").astype(np.intp)
+        day = self.column("day").astype(np.intp)
+        totals = np.bincount(sprint*width + day, weights=self.column("points"),
+                             minlength=len(self)*width)
+        return totals.astype(int).reshape(len(self), width)
+
+
+    def work(self, sprint):
+        """ Returns the stories times days work left of a single sprint """
+
+        section = self.sprints[str(sprint)]
+        offset, rows = int(section["offset"]), int(section["rows"])
+        days = int(section["days"])
+        return np.array(self.column("points")[offset:offset+rows]).reshape(-1, days)
+
+
+    def story_ids(self, sprint):
+        """ Returns the ids of the stories of a single sprint """
+
+        section = self.sprints[str(sprint)]
+        offset, rows = int(section["offset"]), int(section["rows"])
+        days = int(section["days"])
+        codes = self.column("story")[offset:offset+rows:days]
+        return [self.stories[code] for code in codes]
+
+
+    def committed(self):
+        """ Returns the work planned for each sprint """
+        return self.totals()[:, 0] if len(self) > 0 else np.zeros(0, dtype=int)
+
+
+    def velocity(self):
+        """ Returns the work done until the last day edited of each sprint """
+        if len(self) == 0:
+            return np.zeros(0, dtype=int)
+        totals = self.totals()
+        edited = self.sprint_values("edited")
+        return totals[:, 0] - totals[np.arange(len(self)), edited - 1]
+
+
+    def burnup(self):
+        """ Returns the work done in all sprints up to each sprint """
+        return np.cumsum(self.velocity())
+
+
+    def trend(self, window = 3):
+        """ Returns the mean velocity of the last 'window' sprints for each sprint """
+
+        velocity = self.velocity()
+        sums = np.cumsum(np.concatenate(([0], velocity)))
+        counts = np.minimum(np.arange(1, len(velocity)+1), window)
+        return (sums[1:] - sums[np.arange(1, len(velocity)+1) - counts]) / counts
+
+
+    def story_trend(self, story_id):
+        """ Returns the work left of a story at the start and the last day
+        edited of the sprints it was part of
+        """
+
+        try:
+            code = self.stories.index(story_id)
+        except ValueError:
+            return []
+
+        story = self.column("story")
+        rows = np.flatnonzero(story == code)
+        sprint = self.column("sprint")[rows]
+        day = self.column("day")[rows]
+        points = self.column("points")[rows]
+        edited = self.sprint_values("edited")
+
+        trend = []
+        for s in np.unique(sprint):
+            start = points[(sprint == s) & (day == 0)]
+            last = points[(sprint == s) & (day == edited[s] - 1)]
+            trend.append((self.sprints[str(s)]["name"], int(start[0]), int(last[0])))
+        return trend
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+
+from poorscrum.poorscrum_story import Status, STATUSES
+
+""" Indexes the stories of a backlog by status and dev as in a KANBAN board
+
+A Dev owns a story only during ANALYSING and SPRINTING. In the other states
+a story belongs to the team, which is the dev TEAM of the index. The counts
+of the stories per status and per dev and status are kept as the stories
+are added. So the work in progress and the load of a dev are read without
+going through the stories again.
+"""
+
+TEAM = ""
+OWNED = (Status.analysing, Status.sprinting)
+
+
+def story_owner(status, devs):
+    """ Returns the dev owning a story, TEAM if it belongs to the team """
+
+    if status not in OWNED or devs is None:
+        return TEAM
+    devs = devs.split()
+    return devs[0] if len(devs) > 0 else TEAM
+
+
+class Poorscrum_Kanban:
+
+
+    def __init__(self):
+        """ A column per status maps each dev to the list of its stories """
+        self.columns = tuple(dict() for status in STATUSES)
+        self.counts = [0] * len(STATUSES)
+        self.loads = dict()
+
+
+    def __len__(self):
+        return sum(self.counts)
+
+
+    def add(self, status, devs, story):
+        """ Adds a story with its status and devs. Returns the owning dev
+
+        Raises ValueError for an illegal status.
+        """
+
+        status = Status(status)
+        pos = status.pos
+        dev = story_owner(status, devs)
+
+        self.columns[pos].setdefault(dev, []).append(story)
+        self.counts[pos] += 1
+        if dev not in self.loads:
+            self.loads[dev] = [0] * len(STATUSES)
+        self.loads[dev][pos] += 1
+        return dev
+
+
+    def devs(self):
+        """ Returns the devs owning stories in the order of their names """
+        return sorted(dev for dev in self.loads if dev != TEAM)
+
+
+    def stories(self, status, dev = None):
+        """ Returns the stories of a status, only of the dev if given """
+
+        column = self.columns[Status(status).pos]
+        if dev is not None:
+            return list(column.get(dev, []))
+        return [story for stories in column.values() for story in stories]
+
+
+    def _positions(self, first_status, last_status):
+        first = Status(first_status if first_status is not None else Status.none).pos
+        last = Status(last_status if last_status is not None else Status.out).pos
+        return range(first, last+1)
+
+
+    def select(self, first_status = None, last_status = None, dev = None):
+        """ Yields the status, dev and story of the stories in the status range """
+
+        for pos in self._positions(first_status, last_status):
+            for story_dev, stories in self.columns[pos].items():
+                if dev is not None and story_dev != dev:
+                    continue
+                for story in stories:
+                    yield STATUSES[pos], story_dev, story
+
+
+    def wip(self, first_status = None, last_status = None):
+        """ Returns the number of stories in the status range """
+        return sum(self.counts[pos] for pos in self._positions(first_status, last_status))
+
+
+    def load(self, dev, first_status = None, last_status = None):
+        """ Returns the number of stories of a dev in the status range """
+
+        counts = self.loads.get(dev)
+        if counts is None:
+            return 0
+        return sum(counts[pos] for pos in self._positions(first_status, last_status))
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+import hashlib
+import posixpath
+import zipfile
+
+import xml.etree.ElementTree as ET
+
+from poorscrum.poorscrum_slide import Poorscrum_Slide
+from poorscrum.poorscrum_text import join_text
+
+""" Reads the story content directly from the XML parts of a PPTX file
+
+There is no python-pptx object model. The slide parts are parsed with a
+streaming parser and each top level shape is dropped once its content is
+taken.
+"""
+
+NS_P = "{http://schemas.openxmlformats.org/presentationml/2006/main}"
+NS_A = "{http://schemas.openxmlformats.org/drawingml/2006/main}"
+NS_R = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+NS_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+SHAPE_TAGS = set(NS_P + tag for tag in
+                 ("sp", "grpSp", "graphicFrame", "cxnSp", "pic", "contentPart"))
+
+
+def read_rels(from_zip, part_name, as_links = False):
+    """ Returns the relationship targets of a part by their ids
+
+    The internal targets are part names. With 'as_links' they are relative
+    to the part as python-pptx reports the address of a hyperlink.
+    """
+
+    rels_name = posixpath.join(posixpath.dirname(part_name), "_rels",
+                               posixpath.basename(part_name) + ".rels")
+    try:
+        root = ET.fromstring(from_zip.read(rels_name))
+    except KeyError:
+        return dict()
+
+    rels = dict()
+    for rel in root.iter(NS_REL + "Relationship"):
+        target = rel.get("Target")
+        if rel.get("TargetMode") != "External":
+            target = posixpath.normpath(
+                posixpath.join(posixpath.dirname(part_name), target))
+            if as_links:
+                target = posixpath.relpath(target, posixpath.dirname(part_name))
+        rels[rel.get("Id")] = target
+    return rels
+
+
+def slide_names(from_zip):
+    """ Returns the part names of the slides in the order of the presentation """
+
+    part_name = "ppt/presentation.xml"
+    rels = read_rels(from_zip, part_name)
+    root = ET.fromstring(from_zip.read(part_name))
+    return [rels[sld_id.get(NS_R + "id")]
+            for sld_id in root.iter(NS_P + "sldId")]
+
+
+def paras_from_body(body, rels):
+    """ Returns the paragraphs of a text body as lists of (address, text) runs """
+
+    if body is None:
+        return [[]]
+
+    paras = []
+    for p in body.findall(NS_A + "p"):
+        runs = []
+        for r in p.findall(NS_A + "r"):
+            t = r.find(NS_A + "t")
+            text = (t.text or "") if t is not None else ""
+            link = r.find(NS_A + "rPr/" + NS_A + "hlinkClick")
+            rid = link.get(NS_R + "id") if link is not None else None
+            runs.append((rels.get(rid) if rid else None, text))
+        paras.append(runs)
+    return paras
+
+
+def rows_from_table(tbl, rels):
+    """ Returns the rows of a table with the text of the cells """
+
+    return [[join_text(paras_from_body(tc.find(NS_A + "txBody"), rels))
+             for tc in tr.findall(NS_A + "tc")]
+            for tr in tbl.findall(NS_A + "tr")]
+
+
+def read_slide(from_zip, part_name):
+    """ Returns the content of the slide part """
+
+    rels = read_rels(from_zip, part_name, as_links=True)
+
+    placeholders = dict()
+    tables = []
+    depth = 0
+    with from_zip.open(part_name) as part:
+        for event, elem in ET.iterparse(part, events=("start", "end")):
+            if event == "start":
+                depth += 1
+                continue
+            depth -= 1
+
+            """ Shapes of the shape tree: sld/cSld/spTree/<shape> """
+            if depth != 3 or elem.tag not in SHAPE_TAGS:
+                continue
+
+            ph = elem.find("./*/" + NS_P + "nvPr/" + NS_P + "ph")
+            if ph is not None:
+                idx = int(ph.get("idx", "0"))
+                if idx not in placeholders:
+                    placeholders[idx] = paras_from_body(elem.find(NS_P + "txBody"), rels) \
+                        if elem.tag == NS_P + "sp" else None
+
+            tbl = elem.find(NS_A + "graphic/" + NS_A + "graphicData/" + NS_A + "tbl") \
+                if elem.tag == NS_P + "graphicFrame" else None
+            tables.append(None if tbl is None else rows_from_table(tbl, rels))
+
+            elem.clear()
+
+    return Poorscrum_Slide(placeholders, tables)
+
+
+def count_slides(pptx_file):
+    """ Returns the number of slides of a PPTX file """
+
+    with zipfile.ZipFile(pptx_file) as from_zip:
+        return len(slide_names(from_zip))
+
+
+def read_slide_at(pptx_file, index):
+    """ Returns the content of a single slide of a PPTX file """
+
+    with zipfile.ZipFile(pptx_file) as from_zip:
+        return read_slide(from_zip, slide_names(from_zip)[index])
+
+
+def read_slides(pptx_file):
+    """ Yields the content of the slides of a PPTX file one after the other """
+
+    with zipfile.ZipFile(pptx_file) as from_zip:
+        for part_name in slide_names(from_zip):
+            yield read_slide(from_zip, part_name)
+
+
+def layout_fingerprint(blob):
+    """ Returns the fingerprint of a slide layout part from its placeholders """
+
+    root = ET.fromstring(blob)
+    placeholders = sorted((int(ph.get("idx", "0")), ph.get("type", "body"))
+                          for ph in root.iter(NS_P + "ph"))
+    return hashlib.sha1(repr(placeholders).encode()).hexdigest()
+
+
+def deck_fingerprints(pptx_file):
+    """ Returns the fingerprints of all slide layouts of a PPTX file """
+
+    with zipfile.ZipFile(pptx_file) as from_zip:
+        return set(layout_fingerprint(from_zip.read(name)) for name in from_zip.namelist()
+                   if name.startswith("ppt/slideLayouts/") and name.endswith(".xml"))
@@ -0,0 +1,251 @@
+# -*- coding: utf-8 -*-
+
+import contextlib
+import cProfile
+import datetime
+import functools
+import json
+import os
+import sys
+import time
+
+try:
+    import resource
+except ImportError: # Not on Windows
+    resource = None
+
+""" Records the wall time, CPU time, peak RSS and items of each phase of a script run
+
+The phases of the scripts are to 'open' the deck, to load the 'fields', to
+'extract' the slides or stories, to aggregate the 'tasks' or the 'work', to
+'write' stories or slides, to 'plot' the chart and to 'save' the deck. A
+phase may be entered many times. Its times add up over all its calls.
+
+Nothing is recorded unless a run is profiled with a profile file. Then the
+phases are appended to the file as JSON lines, one per phase and one for the
+'total' of the run. With a '.pstats' or '.prof' file the run is profiled by
+cProfile instead and the statistics are dumped to the file for 'pstats'.
+The phases are timed in the main process only.
+"""
+
+PHASES = ("open", "fields", "extract", "tasks", "work", "write", "plot", "save")
+STATS_EXTENSIONS = (".pstats", ".prof")
+
+
+def peak_rss():
+    """ Returns the peak resident set size of the process in KiB. None if unknown """
+
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+class Poorscrum_Phase:
+    """ The times and items of a phase over all its calls
+
+    Used as context manager around each call. A call within a call of the
+    same phase is counted but not timed again.
+    """
+
+    __slots__ = ("name", "calls", "items", "wall", "cpu", "rss", "_depth", "_wall", "_cpu")
+
+    def __init__(self, name):
+        self.name = name
+        self.calls = 0
+        self.items = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.rss = None
+        self._depth = 0
+
+
+    def __enter__(self):
+        if self._depth == 0:
+            self._wall = time.perf_counter()
+            self._cpu = time.process_time()
+        self._depth += 1
+        self.calls += 1
+        return self
+
+
+    def __exit__(self, *exc):
+        self._depth -= 1
+        if self._depth == 0:
+            self.wall += time.perf_counter() - self._wall
+            self.cpu += time.process_time() - self._cpu
+            self.rss = peak_rss()
+        return False
+
+
+    def add(self, items = 1):
+        """ Counts the items handled in the phase """
+        self.items += items
+
+
+    def record(self):
+        return {"phase": self.name, "calls": self.calls, "items": self.items,
+                "wall": round(self.wall, 6), "cpu": round(self.cpu, 6), "rss_kib": self.rss}
+
+
+class _No_Phase:
+    """ Stands in for the phases if the run is not profiled """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def add(self, items = 1):
+        pass
+
+
+_NO_PHASE = _No_Phase()
+
+
+class Poorscrum_Profile:
+
+
+    def __init__(self, script, **labels):
+        """ The labels as the deck go into each JSON line """
+        self.script = script
+        self.labels = labels
+        self.started = datetime.datetime.now().isoformat(timespec="seconds")
+        self.phases = dict()
+        self.total = Poorscrum_Phase("total")
+
+
+    def phase(self, name):
+        """ Returns the phase of the name, a new one on first use """
+
+        phase = self.phases.get(name)
+        if phase is None:
+            phase = self.phases[name] = Poorscrum_Phase(name)
+        return phase
+
+
+    def records(self):
+        """ Returns the records of the phases in the order of PHASES and the total """
+
+        names = [name for name in PHASES if name in self.phases] \
+            + [name for name in self.phases if name not in PHASES]
+        phases = [self.phases[name] for name in names] + [self.total]
+
+        records = []
+        for phase in phases:
+            record = {"script": self.script, "started": self.started, "pid": os.getpid()}
+            record.update(self.labels)
+            record.update(phase.record())
+            records.append(record)
+        return records
+
+
+    def write(self, out):
+        for record in self.records():
+            out.write(json.dumps(record) + "\n")
+
+
+""" The profile of the run of this process if any """
+_profile = None
+
+
+def phase(name):
+    """ Returns the phase of the profiled run as context manager """
+
+    if _profile is None:
+        return _NO_PHASE
+    return _profile.phase(name)
+
+
+def in_phase(name):
+    """ Decorates a function to be timed as a phase with one item per call """
+
+    def decorate(function):
+        @functools.wraps(function)
+        def timed(*args, **kwargs):
+            if _profile is None:
+                return function(*args, **kwargs)
+            with _profile.phase(name) as function_phase:
+                function_phase.add()
+                return function(*args, **kwargs)
+        return timed
+    return decorate
+
+
+def timed_items(name, items):
+    """ Returns the items of an iterable with the time taking each of them as phase """
+
+    if _profile is None:
+        return items
+    return _timed_items(_profile.phase(name), iter(items))
+
+
+def _timed_items(items_phase, items):
+    while True:
+        with items_phase:
+            try:
+                item = next(items)
+            except StopIteration:
+                return
+            items_phase.add()
+        yield item
+
+
+def add_profile_argument(parser):
+    """ Adds the '--profile' argument to a script """
+
+    parser.add_argument("--profile", required=False, default=None,
+                        help="Append the times, the peak RSS and the items of each phase as JSON lines to this file, '-' for stderr. Dump the cProfile statistics instead to a '.pstats' or '.prof' file")
+    return parser
+
+
+@contextlib.contextmanager
+def profiled(profile_file, script = None, **labels):
+    """ Profiles the run of a script within the context if there is a profile file
+
+    The labels as the deck go into each JSON line. If the profile file cannot
+    be written the phases go to stderr.
+    """
+
+    global _profile
+
+    if profile_file is None:
+        yield None
+        return
+
+    profile = Poorscrum_Profile(script or os.path.basename(sys.argv[0]), **labels)
+    profiler = cProfile.Profile() \
+        if os.path.splitext(profile_file)[1] in STATS_EXTENSIONS else None
+
+    _profile = profile
+    try:
+        with profile.total:
+            if profiler is not None:
+                profiler.enable()
+            try:
+                yield profile
+            finally:
+                if profiler is not None:
+                    profiler.disable()
+    finally:
+        _profile = None
+        write_profile(profile, profiler, profile_file)
+
+
+def write_profile(profile, profiler, profile_file):
+    """ Writes the statistics or the phases. Returns False if they went to stderr instead """
+
+    try:
+        if profiler is not None:
+            profiler.dump_stats(profile_file)
+        elif profile_file == "-":
+            profile.write(sys.stderr)
+        else:
+            with open(profile_file, "a") as out:
+                profile.write(out)
+    except OSError as e:
+        sys.stderr.write("Cannot write the profile '{}': {}\n".format(profile_file, e))
+        profile.write(sys.stderr)
+        return False
+    return True
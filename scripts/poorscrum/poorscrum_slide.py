@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+import collections
+import os
+
+from poorscrum.poorscrum_text import frame_segments, extract_text, join_text
+
+class Poorscrum_Slide:
+    """ The content of a slide as needed to read stories and tasks
+
+    'placeholders' maps each placeholder index to its paragraphs of
+    (address, text) runs. It is None for a placeholder without text frame.
+
+    'tables' holds an entry per shape of the slide. It is the list of rows
+    with the text of the cells for a table and None for any other shape.
+    """
+
+    __slots__ = ("placeholders", "tables")
+
+    def __init__(self, placeholders, tables):
+        self.placeholders = placeholders
+        self.tables = tables
+
+
+    def has_placeholders(self, indices):
+        return all(index in self.placeholders for index in indices)
+
+
+    def text(self, index):
+        """ Returns the ASCII text of a placeholder, None without text frame """
+        paras = self.placeholders[index]
+        return None if paras is None else join_text(paras)
+
+
+    @property
+    def is_tasks(self):
+        """ Holds nothing but tables """
+        return len(self.tables) > 0 and \
+            all(table is not None for table in self.tables)
+
+
+    @property
+    def table(self):
+        """ The rows of the last table """
+        return self.tables[-1]
+
+
+def content_from_slide(from_slide, indices = None, with_tables = True):
+    """ Returns the content of a python-pptx slide
+
+    Only the text of the placeholders in 'indices' is taken if given. The
+    others are kept without paragraphs. The tables are left empty if not
+    'with_tables'.
+    """
+
+    placeholders = dict()
+    for shape in from_slide.placeholders:
+        idx = shape.placeholder_format.idx
+        if idx not in placeholders:
+            if not shape.has_text_frame:
+                placeholders[idx] = None
+            elif indices is None or idx in indices:
+                placeholders[idx] = frame_segments(shape.text_frame)
+            else:
+                placeholders[idx] = []
+
+    tables = []
+    if not with_tables:
+        return Poorscrum_Slide(placeholders, tables)
+
+    """ Read through python-pptx, the reference of the direct OOXML reader """
+    for shape in from_slide.shapes:
+        if shape.has_table:
+            tables.append([[extract_text(cell.text_frame) for cell in row.cells]
+                           for row in shape.table.rows])
+        else:
+            tables.append(None)
+
+    return Poorscrum_Slide(placeholders, tables)
+
+
+""" The presentations kept open by file name. None if they are not kept """
+_kept_presentations = None
+_kept_max = 0
+
+
+def keep_presentations(count = 8):
+    """ Keeps the last 'count' presentations opened for the next calls
+
+    A kept presentation is opened again once its file changes. No
+    presentations are kept for a count of 0.
+    """
+
+    global _kept_presentations, _kept_max
+    _kept_presentations = collections.OrderedDict() if count > 0 else None
+    _kept_max = count
+
+
+def open_presentation(pptx_file, for_update = False):
+    """ Returns the python-pptx presentation of a PPTX file
+
+    python-pptx is imported with the first presentation opened. A missing
+    file raises FileNotFoundError. A presentation opened 'for_update' is
+    never taken from or given to the kept presentations.
+    """
+
+    from pptx import Presentation
+    from pptx.exc import PackageNotFoundError
+
+    if _kept_presentations is None:
+        key = stamp = None
+    else:
+        key = os.path.abspath(pptx_file)
+        stat = os.stat(key)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        kept = _kept_presentations.pop(key, None)
+        if kept is not None and kept[0] == stamp and not for_update:
+            _kept_presentations[key] = kept
+            return kept[1]
+
+    try:
+        prs = Presentation(pptx_file)
+    except PackageNotFoundError as e:
+        raise FileNotFoundError(str(e)) from e
+
+    if key is not None and not for_update:
+        _kept_presentations[key] = (stamp, prs)
+        while len(_kept_presentations) > _kept_max:
+            _kept_presentations.popitem(last=False)
+    return prs
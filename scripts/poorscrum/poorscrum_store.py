@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+import configparser
+import os
+import sqlite3
+
+from poorscrum.poorscrum_story import Status
+
+""" Keeps the stories of a backlog in a SQLite file
+
+A story is stored with its name, which is the path of its story file
+relative to the story directory, and the text of the story file. So the
+story files are restored as they were. The status, id, value, first dev and
+sprint of a story are indexed columns, and its tasks are rows of their own.
+"""
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stories (
+    name TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    status TEXT,
+    status_pos INTEGER,
+    id INTEGER,
+    value INTEGER,
+    devs TEXT,
+    sprint TEXT,
+    story TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS stories_position ON stories (position);
+CREATE INDEX IF NOT EXISTS stories_status ON stories (status_pos);
+CREATE INDEX IF NOT EXISTS stories_id ON stories (id);
+CREATE INDEX IF NOT EXISTS stories_value ON stories (value);
+CREATE INDEX IF NOT EXISTS stories_devs ON stories (devs);
+CREATE INDEX IF NOT EXISTS stories_sprint ON stories (sprint);
+
+CREATE TABLE IF NOT EXISTS tasks (
+    name TEXT NOT NULL REFERENCES stories (name) ON DELETE CASCADE,
+    row INTEGER NOT NULL,
+    task TEXT,
+    start INTEGER,
+    left INTEGER,
+    done INTEGER,
+    dev TEXT,
+    PRIMARY KEY (name, row)
+);
+"""
+
+
+def _int_or_none(text):
+    try:
+        return int(text)
+    except (TypeError, ValueError):
+        return None
+
+
+def story_columns(story):
+    """ Returns the indexed columns of a parsed story
+
+    An illegal status has no position. It is selected with any status range
+    as the export does.
+    """
+
+    def text(item):
+        try:
+            return story.get(item, "text").strip()
+        except configparser.Error:
+            return None
+
+    status = text("status")
+    try:
+        status_pos = Status(status).pos
+    except ValueError:
+        status_pos = None
+
+    devs = text("devs")
+    devs = devs.split()[0] if devs else None
+
+    return status, status_pos, _int_or_none(text("id")), _int_or_none(text("value")), devs
+
+
+def story_tasks(story):
+    """ Returns the rows of the tasks of a parsed story without the total """
+
+    if not story.has_section("tasks"):
+        return []
+
+    rows = []
+    for key, task in story.items("tasks"):
+        if key == "total":
+            continue
+        data = task.split(",")
+        data += [""] * (5 - len(data))
+        rows.append((len(rows)+1, data[0], _int_or_none(data[1]), _int_or_none(data[2]),
+                     _int_or_none(data[3]), ",".join(data[4:])))
+    return rows
+
+
+class Poorscrum_Store:
+
+
+    def __init__(self, store_file):
+        """ The connection may be handed to another thread, as the import
+        does to read ahead. It must not be used by two threads at once.
+        """
+        self.connection = sqlite3.connect(store_file, check_same_thread=False)
+        self.connection.execute("PRAGMA foreign_keys = ON")
+        self.connection.executescript(SCHEMA)
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.connection.commit()
+        else:
+            self.connection.rollback()
+        self.close()
+
+
+    def close(self):
+        self.connection.close()
+
+
+    def commit(self):
+        self.connection.commit()
+
+
+    def __len__(self):
+        return self.connection.execute("SELECT COUNT(*) FROM stories").fetchone()[0]
+
+
+    def put(self, name, text, sprint = None):
+        """ Stores the text of a story file under its name
+
+        A story already stored keeps its position.
+        """
+
+        story = configparser.RawConfigParser()
+        story.read_string(text, name)
+        status, status_pos, story_id, value, devs = story_columns(story)
+
+        cursor = self.connection.cursor()
+        row = cursor.execute("SELECT position FROM stories WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            position = cursor.execute("SELECT COALESCE(MAX(position)+1, 0) FROM stories").fetchone()[0]
+        else:
+            position = row[0]
+
+        cursor.execute("DELETE FROM stories WHERE name = ?", (name,))
+        cursor.execute("INSERT INTO stories VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                       (name, position, status, status_pos, story_id, value, devs, sprint, text))
+        cursor.executemany("INSERT INTO tasks VALUES (?, ?, ?, ?, ?, ?, ?)",
+                           [(name,) + row for row in story_tasks(story)])
+
+
+    def get(self, name):
+        """ Returns the text of the story file of that name. None if unknown """
+        row = self.connection.execute("SELECT story FROM stories WHERE name = ?", (name,)).fetchone()
+        return None if row is None else row[0]
+
+
+    def stories(self, first_status = None, last_status = None, sprint = None):
+        """ Yields the names and texts of the stories in the order they were stored
+
+        Only the stories in the status range and of the sprint if given.
+        """
+
+        where, params = [], []
+        if first_status is not None or last_status is not None:
+            first = Status(first_status if first_status is not None else Status.none).pos
+            last = Status(last_status if last_status is not None else Status.out).pos
+            where.append("(status_pos IS NULL OR status_pos BETWEEN ? AND ?)")
+            params += [first, last]
+        if sprint is not None:
+            where.append("sprint = ?")
+            params.append(sprint)
+
+        query = "SELECT name, story FROM stories"
+        if len(where) > 0:
+            query += " WHERE " + " AND ".join(where)
+        query += " ORDER BY position"
+        yield from self.connection.execute(query, params)
+
+
+    def tasks(self, name):
+        """ Returns the task rows of a story """
+        return self.connection.execute(
+            "SELECT task, start, left, done, dev FROM tasks WHERE name = ? ORDER BY row",
+            (name,)).fetchall()
+
+
+def store_from_tree(store, story_dir, sprint = None):
+    """ Stores the story files below a directory. Returns their number """
+
+    names = []
+    for dir_name, dir_names, file_names in os.walk(story_dir):
+        dir_names.sort()
+        for file_name in file_names:
+            if file_name.endswith(".story"):
+                names.append(os.path.relpath(os.path.join(dir_name, file_name), story_dir))
+
+    for name in sorted(names):
+        with open(os.path.join(story_dir, name)) as story_file:
+            store.put(name.replace(os.sep, "/"), story_file.read(), sprint)
+    return len(names)
+
+
+def tree_from_store(store, story_dir, first_status = None, last_status = None, sprint = None):
+    """ Writes the stories as story files below a directory. Returns their number """
+
+    count = 0
+    for name, text in store.stories(first_status, last_status, sprint):
+        story_pathname = os.path.join(story_dir, *name.split("/"))
+        os.makedirs(os.path.dirname(story_pathname), exist_ok=True)
+        with open(story_pathname, "w") as story_file:
+            story_file.write(text)
+        count += 1
+    return count
@@ -60,14 +60,25 @@ class Status(Enum):
         return self.value
 
     def __lt__(self, other):
-        return self.pos < other.pos
+        return _STATUS_POS[self] < _STATUS_POS[other]
 
     def __gt__(self, other):
-        return self.pos > other.pos
+        return _STATUS_POS[self] > _STATUS_POS[other]
+
+    def __le__(self, other):
+        return _STATUS_POS[self] <= _STATUS_POS[other]
+
+    def __ge__(self, other):
+        return _STATUS_POS[self] >= _STATUS_POS[other]
 
     @property
     def pos(self):
-        return list(self.__class__).index(self)
+        return _STATUS_POS[self]
+
+
+""" The status in the order of the life cycle and their positions in it """
+STATUSES = tuple(Status)
+_STATUS_POS = dict((status, pos) for pos, status in enumerate(STATUSES))
 
 
 def read_fields(pickup_file = PICKUP_FILE):
@@ -82,17 +93,59 @@ def read_fields(pickup_file = PICKUP_FILE):
         return None # Illegal file content
 
 
-def write_fields(pickup, pickup_file = PICKUP_FILE):
+def write_fields(pickup, pickup_file = PICKUP_FILE, fingerprint = None):
     """ Write the index mappings of the story items
+
+    The fingerprint of the layout the indices belong to is kept if given.
+    The mappings of other layouts already in the file are kept.
     """
     config = configparser.ConfigParser()
     config.add_section("STORY")
     for k, v  in pickup.items():
         config.set("STORY", k, v)
+    if fingerprint is not None:
+        config.add_section("MASTER")
+        config.set("MASTER", "fingerprint", fingerprint)
+
+    for layout_fingerprint, layout_pickup in read_layout_fields(pickup_file).items():
+        set_layout_fields(config, layout_fingerprint, layout_pickup)
+
     with open(pickup_file, "w") as config_file:
         config.write(config_file)
 
     return pickup_file
-    
 
-          
+
+def set_layout_fields(config, fingerprint, pickup):
+    """ Set the index mappings of the layout with the fingerprint in a config """
+    section = "STORY " + fingerprint
+    config.remove_section(section)
+    config.add_section(section)
+    for k, v in pickup.items():
+        config.set(section, k, v)
+
+
+def read_layout_fields(pickup_file = PICKUP_FILE):
+    """ Read the mappings of the story fields of further layouts by their fingerprint
+    """
+    pickup = configparser.ConfigParser()
+    pickup.read(pickup_file)
+
+    return dict((section.split(" ", 1)[1], dict(pickup.items(section)))
+                for section in pickup.sections() if section.startswith("STORY "))
+
+
+def add_layout_fields(pickups, pickup_file = PICKUP_FILE):
+    """ Add the index mappings of the story items of further layouts
+
+    'pickups' maps the fingerprint of each layout to its mappings. They
+    replace the mappings of a layout already in the file.
+    """
+    config = configparser.ConfigParser()
+    config.read(pickup_file)
+    for fingerprint, pickup in pickups.items():
+        set_layout_fields(config, fingerprint, pickup)
+    with open(pickup_file, "w") as config_file:
+        config.write(config_file)
+
+    return pickup_file
@@ -1,13 +1,108 @@
 # -*- coding: utf-8 -*-
 
+import copy
+
+from lxml import etree
+
 from pptx.util import Cm, Pt
 from pptx.enum.text import PP_ALIGN, MSO_AUTO_SIZE, MSO_ANCHOR
 
+from poorscrum.poorscrum_ooxml import NS_A, paras_from_body, rows_from_table
+from poorscrum.poorscrum_text import join_text
+
+""" The least number of rows of a task table including the total """
+TASK_ROWS = 8
+
+""" The styled table XML by rows, columns, slide size and margins
+
+A table is styled cell by cell only for the first slide of its kind. The
+tables of the other slides are copies.
+"""
+_styled_tables = dict()
+
+
+def style_table(table, height, width, rows):
+    """ Sets the widths, heights, fonts, alignment and default text of a table """
+
+    table.first_row = False
+    table.first_col = False
+    table.last_row = True
+    table.last_col = False
+
+    """ Set the width of the columns """
+
+    percents = [0.55, 0.1, 0.1, 0.1, 0.15]
+    for col, percent in zip(table.columns, percents):
+        col.width = int(percent*width)
+
+    for row in table.rows:
+        row.height = int(height/rows)
+
+    default_text = ["<task{:d}>", "0", "0", "0", "<dev>"]
+    for rkey, row in enumerate(table.rows):
+
+        for ckey, (cell, text) in enumerate(zip(row.cells, default_text)):
+            t = cell.text_frame
+            if ckey == 0:
+                t.word_wrap = True
+                t.auto_size = MSO_AUTO_SIZE.NONE
+                t.vertical_anchor = MSO_ANCHOR.TOP
+            else:
+                t.word_wrap = False
+                t.auto_size = MSO_AUTO_SIZE.NONE
+                t.vertical_anchor = MSO_ANCHOR.MIDDLE
+
+            p = t.paragraphs[0]
+            if ckey == 0:
+                p.alignment = PP_ALIGN.LEFT
+            else:
+                p.alignment = PP_ALIGN.CENTER
+
+            r = p.add_run()
+            r.text = default_text[ckey].format(rkey+1)
+            r.font.size = Pt(10)
+            r.font.name = 'Consolas'
+
+
+def frame_table(frame):
+    """ Returns the table element of a graphic frame shape """
+    return frame.element.find("{0}graphic/{0}graphicData/{0}tbl".format(NS_A))
+
+
+def cell_text(tc):
+    """ Returns the text element of the first run of a table cell. Adds it if missing """
+
+    txBody = tc.find(NS_A + "txBody")
+    if txBody is None:
+        txBody = etree.SubElement(tc, NS_A + "txBody")
+        etree.SubElement(txBody, NS_A + "bodyPr")
+        etree.SubElement(txBody, NS_A + "lstStyle")
+
+    p = txBody.find(NS_A + "p")
+    if p is None:
+        p = etree.SubElement(txBody, NS_A + "p")
+
+    r = p.find(NS_A + "r")
+    if r is None:
+        """ The run goes before the properties of the paragraph end """
+        r = etree.Element(NS_A + "r")
+        end = p.find(NS_A + "endParaRPr")
+        if end is None:
+            p.append(r)
+        else:
+            end.addprevious(r)
+
+    t = r.find(NS_A + "t")
+    if t is None:
+        t = etree.SubElement(r, NS_A + "t")
+    return t
+
+
 class Poorscrum_Tasks:
 
 
-    def __init__(self, slide, slide_height, slide_width, 
-                 top = Cm(0.5), left = Cm(0.5), rows = 8, cols = 5):
+    def __init__(self, slide, slide_height, slide_width,
+                 top = Cm(0.5), left = Cm(0.5), rows = TASK_ROWS, cols = 5):
 
         height = int(slide_height - 2*top)
         width = int(slide_width/2 - 2*left)
@@ -16,69 +111,90 @@ class Poorscrum_Tasks:
         idx = slide.shapes[0].placeholder_format.idx
         placeholder = slide.placeholders[idx]
         task_frame = placeholder.insert_table(rows,cols)
-        table = task_frame.table
-        
-        table.first_row = False
-        table.first_col = False
-        table.last_row = True
-        table.last_col = False
-
-        """ Set the width of the columns """
-
-        percents = [0.55, 0.1, 0.1, 0.1, 0.15]
-        for col, percent in zip(table.columns, percents):
-            col.width = int(percent*width)
-
-        for row in table.rows:
-            row.height = int(height/rows)
-
-        default_text = ["<task{:d}>", "0", "0", "0", "<dev>"]        
-        for rkey, row in enumerate(table.rows):
-            
-            for ckey, (cell, text) in enumerate(zip(row.cells, default_text)):
-                t = cell.text_frame
-                if ckey == 0:
-                    t.word_wrap = True
-                    t.auto_size = MSO_AUTO_SIZE.NONE
-                    t.vertical_anchor = MSO_ANCHOR.TOP
-                else:
-                    t.word_wrap = False
-                    t.auto_size = MSO_AUTO_SIZE.NONE
-                    t.vertical_anchor = MSO_ANCHOR.MIDDLE
-
-                p = t.paragraphs[0]
-                if ckey == 0:
-                    p.alignment = PP_ALIGN.LEFT
-                else:
-                    p.alignment = PP_ALIGN.CENTER
-
-                r = p.add_run()
-                r.text = default_text[ckey].format(rkey+1)
-                r.font.size = Pt(10)
-                r.font.name = 'Consolas'
-
-        self.table = table
-
-        
+
+        key = (rows, cols, height, width)
+        styled = _styled_tables.get(key)
+        if styled is None:
+            style_table(task_frame.table, height, width, rows)
+            _styled_tables[key] = (copy.deepcopy(frame_table(task_frame)),
+                                   task_frame.width, task_frame.height)
+        else:
+            """ The frame follows the size of the table as when styled """
+            styled_tbl, task_frame.width, task_frame.height = styled
+            tbl = frame_table(task_frame)
+            tbl.getparent().replace(tbl, copy.deepcopy(styled_tbl))
+
+        self._wrap(task_frame)
+
+
+    @classmethod
+    def from_slide(cls, slide):
+        """ Returns the tasks of a slide with the table already made """
+        tasks = cls.__new__(cls)
+        tasks._wrap(slide.shapes[0])
+        return tasks
+
+
+    @classmethod
+    def from_frame(cls, frame):
+        """ Returns the tasks of a graphic frame shape with a table """
+        tasks = cls.__new__(cls)
+        tasks._wrap(frame)
+        return tasks
+
+
+    def _wrap(self, frame):
+        self.frame = frame
+        self.table = frame.table
+        self.tbl = frame_table(frame)
+        self._texts = None
+
+
+    @property
+    def texts(self):
+        """ The text element of the first run of each cell
+
+        A cell emptied by a user may have no run. It gets one in its first
+        paragraph.
+        """
+        if self._texts is None:
+            self._texts = [[cell_text(tc) for tc in tr.findall(NS_A + "tc")]
+                           for tr in self.tbl.findall(NS_A + "tr")]
+        return self._texts
+
+
     def put_as_row(self, row, task):
 
-        for cell, text in zip(self.table.rows[row].cells, task):
-            t = cell.text_frame
-            p = t.paragraphs[0]
-            r = p.runs[0]
-            r.text = text
+        for t, text in zip(self.texts[row], task):
+            t.text = text
 
-            
-    def put_as_list(self, tasks):
 
-        for row, task in zip(self.table.rows, tasks):
-            self.put_as_row(row, task)
-            
+    def put_as_list(self, tasks, first = 0):
+        """ Writes the tasks into the rows from 'first' on. Returns their number
+
+        Tasks beyond the last row are dropped.
+        """
+
+        count = 0
+        for texts, task in zip(self.texts[first:], tasks):
+            for t, text in zip(texts, task):
+                t.text = text
+            count += 1
+        return count
+
+
+    def _rels(self):
+        """ The link targets by relationship id as python-pptx reports them """
+        return dict((rId, rel.target_ref) for rId, rel in self.frame.part.rels.items())
+
 
     def get_from_row(self, row):
-        return None
+        tr = self.tbl.findall(NS_A + "tr")[row]
+        rels = self._rels()
+        return [join_text(paras_from_body(tc.find(NS_A + "txBody"), rels))
+                for tc in tr.findall(NS_A + "tc")]
+
 
-    
     def get_from_list(self):
-        return None
-    
+        """ Returns the rows with the text of the cells as the export reads them """
+        return rows_from_table(self.tbl, self._rels())
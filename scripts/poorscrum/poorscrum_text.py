@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*-
+
+import re
+
+
+""" A hyperlink in the story text: '<addr>text</>' """
+LINK_PATTERN = re.compile(r"<([^<>\n]*)>([^<\n]*)(?:</>)?")
+
+
+def to_ascii(text):
+    """ Removes all characters which are not ASCII from the text
+    """
+    return text.encode("ascii", "ignore").decode("ascii")
+
+
+def run_address(from_run):
+    """ Returns the address of the hyperlink of a run
+
+    None without hyperlink or for an action like a jump to the next slide
+    which has no relationship.
+    """
+    try:
+        return from_run.hyperlink.address
+    except KeyError: # python-pptx looks up the empty relationship id
+        return None
+
+
+def frame_segments(from_frame):
+    """ Returns the paragraphs of a text frame as lists of (address, text) runs
+    """
+    return [[(run_address(r), r.text) for r in p.runs]
+            for p in from_frame.paragraphs]
+
+
+def join_text(paras):
+    """ Returns the ASCII text of paragraphs of (address, text) runs
+
+    A run with an address is encoded as '<addr>text</>'. If there is more than
+    one paragraph each paragraph is terminated by a newline.
+    """
+    texts = ["".join([text if address is None else "<{}>{}</>".format(address, text)
+                      for address, text in runs]) for runs in paras]
+    if len(texts) > 1:
+        texts.append("")
+    return to_ascii("\n".join(texts))
+
+
+def extract_text(from_frame):
+    """ Returns the ASCII text of a text frame
+    """
+    return join_text(frame_segments(from_frame))
+
+
+def split_text(text):
+    """ Splits the story text in one pass into paragraphs of run segments
+
+    Each paragraph is a list of (address, text) tuples. The address is None
+    for plain runs. Characters not belonging to a link are plain text.
+    """
+    paras = []
+    for line in text.split("\n"):
+        segments = []
+        pos = 0
+        for link in LINK_PATTERN.finditer(line):
+            if link.start() > pos:
+                segments.append((None, line[pos:link.start()]))
+            segments.append((link.group(1) or None, link.group(2)))
+            pos = link.end()
+        if pos < len(line):
+            segments.append((None, line[pos:]))
+        paras.append(segments)
+    return paras
+
+
+def import_text(to_frame, text):
+    """ Writes the story text into an empty text frame
+
+    Each run is created with its final text and address exactly once.
+    """
+    for num, segments in enumerate(split_text(text)):
+        p = to_frame.paragraphs[0] if num == 0 else to_frame.add_paragraph()
+        if len(segments) == 0:
+            p.add_run()
+        for address, run_text in segments:
+            r = p.add_run()
+            r.text = run_text
+            if address is not None:
+                r.hyperlink.address = address
@@ -1,17 +1,113 @@
 # -*- coding: utf-8 -*-
 
+import bisect
+import queue
+import threading
+
+
+""" The Fibonacci numbers, grown on demand """
+_fibonacci = [0, 1]
+
+""" The scales for story points. The Fibonacci scale is unbounded """
+SCALES = {
+    "fibonacci": None,
+    "modified": (0, 0.5, 1, 2, 3, 5, 8, 13, 20, 40, 100),
+    "tshirt": (1, 2, 3, 5, 8, 13),
+}
+
+""" The names of the T-shirt sizes in the order of the scale """
+TSHIRT_SIZES = ("XS", "S", "M", "L", "XL", "XXL")
+
+
+def _grow_fibonacci(start):
+    """ Extends the Fibonacci numbers until the last one is not less than start """
+    while _fibonacci[-1] < start:
+        _fibonacci.append(_fibonacci[-1] + _fibonacci[-2])
+
+
 def fibonacci(n):
-    if n == 0:
-        return 0
-    elif n == 1:
-        return 1
-    else:
-        return fibonacci(n-1) + fibonacci(n-2)
-
-
-def story_points(start):
-    for i in range(10):
-        result = fibonacci(i)
-        if result >= start:
-            break
-    return result
+    while len(_fibonacci) <= n:
+        _fibonacci.append(_fibonacci[-1] + _fibonacci[-2])
+    return _fibonacci[n]
+
+
+def scale_values(scale, start = 0):
+    """ Returns the values of a scale covering at least 'start' if possible """
+    values = SCALES[scale]
+    if values is None:
+        _grow_fibonacci(start)
+        return _fibonacci
+    return values
+
+
+def story_points(start, scale = "fibonacci"):
+    """ Returns the smallest value of the scale not less than start
+
+    Beyond a bounded scale its largest value is returned. The T-shirt scale
+    returns the name of the size.
+    """
+    values = scale_values(scale, start)
+    index = min(bisect.bisect_left(values, start), len(values)-1)
+    return TSHIRT_SIZES[index] if scale == "tshirt" else values[index]
+
+
+def task_totals(tasks, scale = "fibonacci"):
+    """ Returns the total row of the tasks in one pass over them
+
+    The start, left and done work of the tasks are summed and given in
+    story points of the scale.
+    """
+    wstart, wleft, wdone = 0, 0, 0
+    for task in tasks:
+        wstart += int(task[1])
+        wleft += int(task[2])
+        wdone += int(task[3])
+    return ["Total",
+            str(story_points(wstart, scale)),
+            str(story_points(wleft, scale)),
+            str(story_points(wdone, scale)), "Points"]
+
+
+def prefetch(items, size=16):
+    """ Yields the items of an iterable which is consumed ahead by a thread
+
+    At most 'size' items are kept ahead. An exception raised by the iterable
+    is raised again when its position is reached by the consumer. If the
+    consumer stops early and closes the generator the thread ends too.
+    """
+
+    ahead = queue.Queue(maxsize=size)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in items:
+                if stop.is_set():
+                    return
+                ahead.put((item, None))
+        except Exception as e:
+            ahead.put((None, e))
+        ahead.put((done, None))
+
+    producer = threading.Thread(target=produce, daemon=True)
+    producer.start()
+
+    try:
+        while True:
+            item, error = ahead.get()
+            if error is not None:
+                raise error
+            if item is done:
+                return
+            yield item
+    finally:
+        """ Unblock the thread waiting for room in the queue until it ends """
+        stop.set()
+        while producer.is_alive():
+            try:
+                while True:
+                    ahead.get_nowait()
+            except queue.Empty:
+                pass
+            producer.join(0.01)
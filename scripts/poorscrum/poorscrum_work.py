@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+""" The work left of the stories in a sprint as NumPy arrays
+
+A row holds the work left of a story for each day of the sprint. The days
+not yet edited get the last value entered for the story. The functions
+reduce over the last two axes only. So a stack of sprints with the same
+number of stories and days is handled in one call.
+
+Not imported with the package to keep NumPy out of the other scripts.
+"""
+
+
+def work_matrix(series, days):
+    """ Returns the stories times days matrix of the work left
+
+    'series' holds the work left entered for each story. None of the series
+    may be empty or longer than the days of the sprint.
+    """
+
+    lengths = np.fromiter((len(s) for s in series), dtype=int, count=len(series))
+    values = np.fromiter((v for s in series for v in s), dtype=int, count=int(lengths.sum()))
+
+    matrix = np.zeros((len(series), days), dtype=int)
+    if len(series) == 0:
+        return matrix
+
+    """ Scatter the entered values into their rows """
+    rows = np.repeat(np.arange(len(series)), lengths)
+    starts = np.cumsum(lengths) - lengths
+    cols = np.arange(len(values)) - np.repeat(starts, lengths)
+    matrix[rows, cols] = values
+
+    """ Forward fill the unedited days with the last value entered """
+    last = values[starts + lengths - 1]
+    unedited = np.arange(days) >= lengths[:, np.newaxis]
+    return np.where(unedited, last[:, np.newaxis], matrix)
+
+
+def work_totals(matrix):
+    """ Returns the work left of the team for each day """
+    return matrix.sum(axis=-2)
+
+
+def period_estimates(totals, days, periods):
+    """ Returns the work left of the team as one row per period
+
+    A period takes 'periods'+1 days. Days not filling a whole period are
+    dropped.
+    """
+
+    nperiods = periods+1
+    count = days // nperiods
+    return totals[..., :nperiods*count].reshape(totals.shape[:-1] + (count, nperiods))
+
+
+def capacity_margin(points, totals):
+    """ Returns the points of the team left after the planned work
+
+    Negative values tell by how much the stories have to be reduced.
+    """
+    return np.asarray(points) - totals[..., 0]
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+import io
+import os
+import secrets
+import threading
+import time
+
+""" Writes the story files of an export
+
+The files are either written into a directory tree or into a single tar,
+zip or SQLite archive. In the tree each file is written to a temporary file which is
+renamed into place, so a crash never leaves a half written story file. The
+temporary files are created with the mode of a plain open, the umask
+applied by the system. The directories are created once each, the known
+ones before the first write. The writes run in a bounded pool of threads.
+Writes to the same file keep their order.
+"""
+
+ARCHIVES = {"tar": ".tar", "tgz": ".tar.gz", "zip": ".zip", "sqlite": ".sqlite"}
+
+
+def archive_name(to_dir, archive):
+    """ Returns the name of the archive file for an export into 'to_dir' """
+    return os.path.normpath(to_dir) + ARCHIVES[archive]
+
+
+def create_temp(pathname):
+    """ Creates a new temporary file next to 'pathname'. Returns its handle and name """
+
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    while True:
+        temp_name = "{}.{}.tmp".format(pathname, secrets.token_hex(4))
+        try:
+            return os.open(temp_name, flags, 0o666), temp_name
+        except FileExistsError:
+            continue
+
+
+class Poorscrum_Writer:
+
+
+    def __init__(self, to_dir, archive = None, jobs = 4, pending = 64, sprint = None):
+        self.to_dir = os.path.normpath(to_dir)
+        self.archive = archive
+        self.made_dirs = set()
+        self.sprint = sprint
+
+        if archive is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self.pool = ThreadPoolExecutor(max_workers=max(1, jobs))
+            self.slots = threading.BoundedSemaphore(max(1, pending))
+            self.writes = dict()
+            return
+
+        """ The archive is renamed into place once complete """
+        self.archive_file = archive_name(to_dir, archive)
+        handle, self.temp_file = create_temp(self.archive_file)
+        os.close(handle)
+
+        import tarfile
+        import zipfile
+
+        if archive == "sqlite":
+            from poorscrum.poorscrum_store import Poorscrum_Store
+            self.packer = Poorscrum_Store(self.temp_file)
+        elif archive == "zip":
+            self.packer = zipfile.ZipFile(self.temp_file, "w", zipfile.ZIP_DEFLATED)
+        else:
+            self.packer = tarfile.open(self.temp_file, "w:gz" if archive == "tgz" else "w")
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(exc_type is None)
+
+
+    def make_dir(self, dir_name):
+        """ Creates a directory of the tree. Returns True if it is new """
+
+        if self.archive is not None or dir_name in self.made_dirs:
+            return False
+        self.made_dirs.add(dir_name)
+        if os.path.isdir(dir_name):
+            return False
+        os.makedirs(dir_name, exist_ok=True)
+        return True
+
+
+    def make_dirs(self, dir_names):
+        """ Creates the directories of the tree known before the first write """
+
+        for dir_name in dir_names:
+            self.make_dir(dir_name)
+
+
+    def write(self, pathname, text):
+        """ Writes the text to the story file 'pathname' below 'to_dir' """
+
+        if self.archive == "sqlite":
+            """ The stories are named relative to the story directory """
+            name = os.path.relpath(pathname, self.to_dir).replace(os.sep, "/")
+            self.packer.put(name, text, self.sprint)
+            return
+
+        if self.archive is not None:
+            member = os.path.join(os.path.basename(self.to_dir),
+                                  os.path.relpath(pathname, self.to_dir))
+            data = text.encode("utf-8")
+            if self.archive == "zip":
+                self.packer.writestr(member, data)
+            else:
+                info = self.packer.tarinfo(member)
+                info.size = len(data)
+                info.mtime = int(time.time())
+                self.packer.addfile(info, io.BytesIO(data))
+            return
+
+        """ A later write of the same file waits for the earlier one """
+        earlier = self.writes.pop(pathname, None)
+        if earlier is not None:
+            earlier.result()
+
+        self.slots.acquire()
+        try:
+            write = self.pool.submit(self._write_file, pathname, text)
+        except:
+            self.slots.release()
+            raise
+        write.add_done_callback(lambda write: self.slots.release())
+        self.writes[pathname] = write
+
+
+    def _write_file(self, pathname, text):
+        handle, temp_name = create_temp(pathname)
+        try:
+            with os.fdopen(handle, "w") as story_file:
+                story_file.write(text)
+            os.replace(temp_name, pathname)
+        except:
+            os.remove(temp_name)
+            raise
+
+
+    def close(self, complete = True):
+        """ Waits for all writes. Raises the first error of a write
+
+        The archive is put in place only if 'complete'.
+        """
+
+        if self.archive is not None:
+            if self.archive == "sqlite" and complete:
+                self.packer.commit()
+            self.packer.close()
+            if complete:
+                os.replace(self.temp_file, self.archive_file)
+            else:
+                os.remove(self.temp_file)
+            return
+
+        self.pool.shutdown(wait=True)
+        for write in self.writes.values():
+            write.result()
@@ -0,0 +1,496 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "sepp.heid@t-online.de"
+__doc__ = """ """
+
+import argparse
+import configparser
+import datetime
+import glob
+import json
+import os
+import platform
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from pptx import Presentation
+from pptx.util import Cm
+
+from poorscrum import EMPTY_PPTX, Status, load_fields, write_fields, import_text, \
+    content_from_slide, story_points, Poorscrum_Writer, __version__
+
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+
+
+SCRIPTS = ["import", "export", "burndown", "modify", "learn"]
+
+STARTUP_SCRIPTS = SCRIPTS + ["export_batch", "velocity"]
+
+WORDS = ["story", "backlog", "sprint", "team", "value", "customer", "slide",
+         "export", "import", "task", "review", "product", "owner", "done"]
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+
+    parser = argparse.ArgumentParser(
+        prog = os.path.basename(sys.argv[0]),
+        description = "Times the poorscrum tools on a synthetic backlog",
+        epilog = "The template and the pickup file must match as for the other tools")
+
+    parser.add_argument("--version", action = "version", version=__version__)
+
+    ggroup = parser.add_argument_group(title="synthetic backlog")
+    ggroup.add_argument("--stories", type=int, default=100,
+                        help="Number of stories")
+    ggroup.add_argument("--tasks", type=int, default=7,
+                        help="Number of tasks per story")
+    ggroup.add_argument("--text_length", type=int, default=400,
+                        help="Number of characters of the long text fields")
+    ggroup.add_argument("--link_density", type=float, default=0.2,
+                        help="Probability of a hyperlink per paragraph")
+    ggroup.add_argument("--days", type=int, default=20,
+                        help="Number of sprint days")
+    ggroup.add_argument("--seed", type=int, default=0,
+                        help="Seed of the random generator")
+    ggroup.add_argument("--template", default=EMPTY_PPTX,
+                        help="Empty PPTX file with the story layouts")
+
+    bgroup = parser.add_argument_group(title="benchmark")
+    bgroup.add_argument("--scripts", nargs="*", choices=SCRIPTS, default=SCRIPTS,
+                        help="Scripts to be timed. None skips the synthetic backlog")
+    bgroup.add_argument("--startup", action="store_true",
+                        help="Time the start of all scripts and of the package import")
+    bgroup.add_argument("--max_startup", type=float, default=None,
+                        help="Fail if the best start of a script takes longer (seconds)")
+    bgroup.add_argument("--repeat", type=int, default=3,
+                        help="Number of runs per script")
+    bgroup.add_argument("--work_dir", default=None,
+                        help="Directory for the synthetic backlog. Kept if given")
+    bgroup.add_argument("--output", default=None,
+                        help="JSON lines file to append the results to")
+
+    return parser.parse_args()
+
+
+def make_text(rnd, length, link_density):
+    """ Returns a story text of about 'length' characters in paragraphs """
+
+    paras = []
+    size = 0
+    while size < length:
+        words = [rnd.choice(WORDS) for i in range(rnd.randint(5, 15))]
+        if rnd.random() < link_density:
+            words.append("<https://example.org/{:d}>{}</>"
+                         .format(rnd.randint(0, 9999), rnd.choice(WORDS)))
+        para = " ".join(words)
+        paras.append(para)
+        size += len(para)
+    return "\n".join(paras)
+
+
+def make_story(rnd, count, fields_map, args):
+    """ Returns a synthetic story with tasks in the config format """
+
+    story = configparser.RawConfigParser()
+    edited = max(1, int(args.days/2))
+    points = sorted([rnd.randint(0, 40) for i in range(edited)], reverse=True)
+
+    for item in fields_map.keys():
+        if item == "title":
+            text = "{} {:d}".format(" ".join(rnd.choice(WORDS) for i in range(4)), count)
+        elif item == "id":
+            text = str(count)
+        elif item == "value":
+            text = str(rnd.randint(0, 100))
+        elif item == "status":
+            text = str(rnd.choice(list(Status)))
+        elif item == "devs":
+            text = rnd.choice(["a.b", "c.d", "a.b c.d"])
+        elif item == "size 1":
+            text = " ".join(str(point) for point in points)
+        elif item.startswith("size"):
+            text = ""
+        else:
+            text = make_text(rnd, args.text_length, args.link_density)
+        story.add_section(item)
+        story.set(item, "text", text)
+
+    story.add_section("tasks")
+    wstart, wleft, wdone = 0, 0, 0
+    for num in range(args.tasks):
+        start = rnd.randint(1, 8)
+        left = rnd.randint(0, start)
+        done = start - left
+        story.set("tasks", "task{:d}".format(num+1),
+                  ",".join(["task {:d}".format(num+1), str(start), str(left),
+                            str(done), rnd.choice(["a.b", "c.d"])]))
+        wstart, wleft, wdone = wstart + start, wleft + left, wdone + done
+    story.set("tasks", "total", ",".join(["Total",
+                                          str(story_points(wstart)),
+                                          str(story_points(wleft)),
+                                          str(story_points(wdone)), "Points"]))
+    return story
+
+
+def add_story_slides(prs, story, fields_map):
+    """ Appends the story slide and a tasks slide with a plain table """
+
+    slide = prs.slides.add_slide(prs.slide_layouts[-1])
+    for item, index in fields_map.items():
+        import_text(slide.placeholders[index].text_frame, story.get(item, "text"))
+
+    tasks = [task.split(',') for key, task in story.items("tasks")]
+    slide = prs.slides.add_slide(prs.slide_layouts[-2])
+    for shape in list(slide.shapes):
+        shape._element.getparent().remove(shape._element)
+    table = slide.shapes.add_table(len(tasks), 5, Cm(0.5), Cm(0.5),
+                                   int(prs.slide_width/2), prs.slide_height - Cm(1)).table
+    for row, task in enumerate(tasks):
+        for col, text in enumerate(task):
+            table.cell(row, col).text = text
+
+
+def add_learn_slide(prs, fields_map):
+    """ Appends a story slide with the serial numbers of the fields """
+
+    slide = prs.slides.add_slide(prs.slide_layouts[-1])
+    keys = list(fields_map.keys())
+    for item, index in fields_map.items():
+        slide.placeholders[index].text_frame.text = str(keys.index(item))
+
+
+def generate(work_dir, fields_map, args):
+    """ Generates the home directory, the story files and the decks """
+
+    home = os.path.join(work_dir, "home", ".poorscrum")
+    os.makedirs(home)
+    write_fields(dict(fields_map.pairs()), os.path.join(home, "poorscrum_pickup.ini"))
+    shutil.copy(args.template, os.path.join(home, "poorscrum_emptybacklog.pptx"))
+
+    sprint = configparser.ConfigParser()
+    sprint["TIME"] = {"days": str(args.days), "periods": "4"}
+    sprint["TEAM"] = {"a.b": "170", "c.d": "170"}
+    with open(os.path.join(home, "poorscrum_sprint.ini"), "w") as sprint_file:
+        sprint.write(sprint_file)
+
+    rnd = random.Random(args.seed)
+    story_dir = os.path.join(work_dir, "stories")
+    os.makedirs(story_dir)
+    prs = Presentation(args.template)
+    for count in range(1, args.stories+1):
+        story = make_story(rnd, count, fields_map, args)
+        with open(os.path.join(story_dir, "{:04d}_story.story".format(10*count)), "w") as story_file:
+            story.write(story_file)
+        add_story_slides(prs, story, fields_map)
+    prs.save(os.path.join(work_dir, "backlog.pptx"))
+
+    prs = Presentation(args.template)
+    add_learn_slide(prs, fields_map)
+    prs.save(os.path.join(work_dir, "learn.pptx"))
+
+    return os.path.dirname(home)
+
+
+def commands(script, work_dir):
+    """ Returns the command line of a run of the script """
+
+    this_dir = os.path.dirname(os.path.abspath(__file__))
+    backlog = os.path.join(work_dir, "backlog.pptx")
+    run_deck = os.path.join(work_dir, "run.pptx")
+    stories = sorted(glob.glob(os.path.join(work_dir, "stories", "*.story")))
+
+    if script == "import":
+        args = ["--empty", run_deck] + stories
+    elif script == "export":
+        args = [backlog, os.path.join(work_dir, "export")]
+    elif script == "burndown":
+        args = [run_deck]
+    elif script == "modify":
+        args = [run_deck, os.path.join(work_dir, "0010_run.story")]
+    else:
+        args = [os.path.join(work_dir, "learn.pptx"), "1"]
+
+    return [sys.executable, os.path.join(this_dir, "poorscrum_{}.py".format(script))] + args
+
+
+def reset(script, work_dir):
+    """ Restores the files changed by a run """
+
+    shutil.rmtree(os.path.join(work_dir, "export"), ignore_errors=True)
+    shutil.copy(os.path.join(work_dir, "backlog.pptx"), os.path.join(work_dir, "run.pptx"))
+    shutil.copy(sorted(glob.glob(os.path.join(work_dir, "stories", "*.story")))[0],
+                os.path.join(work_dir, "0010_run.story"))
+
+
+def time_script(script, work_dir, home, repeat):
+    """ Returns the wall times of the runs of a script as subprocess """
+
+    env = dict(os.environ, HOME=home)
+    walls = []
+    for run in range(repeat):
+        reset(script, work_dir)
+        start = time.perf_counter()
+        done = subprocess.run(commands(script, work_dir), env=env,
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        walls.append(time.perf_counter() - start)
+        if done.returncode != 0:
+            return walls, done.returncode
+    return walls, 0
+
+
+def time_startup(repeat):
+    """ Returns the wall times of the start of each script and of the package import
+
+    A start is a run with '--version' which loads the script and exits
+    before any work is done.
+    """
+
+    this_dir = os.path.dirname(os.path.abspath(__file__))
+    runs = dict((script, [sys.executable, os.path.join(this_dir, "poorscrum_{}.py".format(script)),
+                          "--version"])
+                for script in STARTUP_SCRIPTS)
+    runs["package"] = [sys.executable, "-c", "import poorscrum"]
+
+    env = dict(os.environ, PYTHONPATH=this_dir)
+    startup = dict()
+    for name, command in runs.items():
+        walls = []
+        for run in range(repeat):
+            start = time.perf_counter()
+            subprocess.run(command, env=env, cwd=this_dir,
+                           stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+            walls.append(time.perf_counter() - start)
+        startup[name] = walls
+    return startup
+
+
+class Phases:
+    """ Collects the wall time of the named phases of a run """
+
+    def __init__(self):
+        self.times = dict()
+        self.start = time.perf_counter()
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.times[name] = self.times.get(name, 0.0) + now - self.start
+        self.start = now
+
+
+def phases_import(work_dir, fields_map):
+    import poorscrum_import
+
+    phases = Phases()
+    stories = []
+    for story_file in sorted(glob.glob(os.path.join(work_dir, "stories", "*.story"))):
+        story = configparser.ConfigParser()
+        story.read(story_file)
+        stories.append(story)
+    phases.lap("read")
+
+    prs = Presentation(os.path.join(work_dir, "home", ".poorscrum", "poorscrum_emptybacklog.pptx"))
+    phases.lap("open")
+    for story in stories:
+        poorscrum_import.import_story(story, prs, fields_map)
+        poorscrum_import.import_tasks(story, prs)
+    phases.lap("build")
+
+    prs.save(os.path.join(work_dir, "run.pptx"))
+    phases.lap("save")
+    return phases.times
+
+
+def phases_export(work_dir, fields_map):
+    import poorscrum_export
+
+    phases = Phases()
+    prs = Presentation(os.path.join(work_dir, "backlog.pptx"))
+    phases.lap("open")
+
+    contents = [content_from_slide(slide) for slide in prs.slides]
+    pairs = poorscrum_export.pair_slides(contents, fields_map,
+                                         poorscrum_export.is_story_content,
+                                         poorscrum_export.is_tasks_content)
+    stories = []
+    for num, count, story_index, tasks_index in pairs:
+        story = poorscrum_export.export_story_to_config(contents[story_index], fields_map)
+        if tasks_index is not None:
+            poorscrum_export.append_tasks_to_config(contents[tasks_index], story)
+        stories.append((num, count, story))
+    phases.lap("extract")
+
+    export_args = argparse.Namespace(status_first=Status("none"), status_last=Status("out"),
+                                     to_slide_dir=os.path.join(work_dir, "export"),
+                                     kanban=False, with_title=35, with_values=False,
+                                     with_ids=False, skip_counts=False, dry=False)
+    os.makedirs(export_args.to_slide_dir)
+    with Poorscrum_Writer(export_args.to_slide_dir) as writer:
+        for num, count, story in stories:
+            poorscrum_export.write_config(num, count, story, export_args, writer)
+    phases.lap("write")
+    return phases.times
+
+
+def phases_burndown(work_dir, fields_map):
+    import poorscrum_burndown
+    from poorscrum.poorscrum_work import work_matrix, work_totals
+
+    phases = Phases()
+    prs = Presentation(os.path.join(work_dir, "run.pptx"))
+    phases.lap("open")
+
+    works = [poorscrum_burndown.extract_work(content_from_slide(slide, fields_map.size_indices, False),
+                                             fields_map)
+             for slide in prs.slides]
+    phases.lap("extract")
+
+    works = [work for work in works if work]
+    days = max(len(work) for work in works)
+    points_left = work_totals(work_matrix(works, days)).tolist()
+    phases.lap("aggregate")
+
+    image = poorscrum_burndown.plot_burndown(points_left, days)
+    phases.lap("plot")
+
+    poorscrum_burndown.add_burndown_to_pptx(prs, image)
+    prs.save(os.path.join(work_dir, "run.pptx"))
+    phases.lap("save")
+    return phases.times
+
+
+def phases_modify(work_dir, fields_map):
+    import poorscrum_modify
+
+    phases = Phases()
+    prs = Presentation(os.path.join(work_dir, "run.pptx"))
+    phases.lap("open")
+
+    story = poorscrum_modify.export_story_as_config(content_from_slide(prs.slides[0]), fields_map)
+    phases.lap("extract")
+
+    with open(os.path.join(work_dir, "0010_run.story"), "w") as story_file:
+        story.write(story_file)
+    phases.lap("write")
+    return phases.times
+
+
+def phases_learn(work_dir, fields_map):
+    import poorscrum_learn
+
+    phases = Phases()
+    prs = Presentation(os.path.join(work_dir, "learn.pptx"))
+    phases.lap("open")
+
+    pickup = poorscrum_learn.extract_story_as_field_map(prs.slides[0], dict(fields_map.pairs()))
+    phases.lap("extract")
+
+    write_fields(pickup, os.path.join(work_dir, "run.ini"))
+    phases.lap("write")
+    return phases.times
+
+
+PHASES = {"import": phases_import, "export": phases_export, "burndown": phases_burndown,
+          "modify": phases_modify, "learn": phases_learn}
+
+
+def time_phases(script, work_dir, fields_map):
+    """ Returns the wall times of the phases of a script run in this process """
+
+    reset(script, work_dir)
+    level = logger.level
+    logger.setLevel(logging.WARNING)
+    try:
+        return PHASES[script](work_dir, fields_map)
+    except Exception as e:
+        logger.error("Phases of '{}' failed: {}".format(script, e))
+        return None
+    finally:
+        logger.setLevel(level)
+
+
+def main():
+    args = parse_arguments()
+
+    if args.stories < 1 or args.tasks < 0 or args.text_length < 0:
+        logger.error("Must provide legal sizes for the synthetic backlog!")
+        return 1
+
+    if args.days < 1 or args.days > 20:
+        logger.error("Must provide scrum guide legal number of days for sprint!")
+        return 2
+
+    if not os.path.isfile(args.template):
+        logger.error("Template '{}' is not found.".format(args.template))
+        return 3
+
+    fields_map = load_fields()
+    if fields_map is None:
+        logger.error("Must provide correct story field mappings. Run 'pptx_learn.py'!")
+        return 4
+
+    results = dict()
+
+    if args.startup:
+        startup = time_startup(args.repeat)
+        results["startup"] = startup
+        for name, walls in startup.items():
+            logger.info("'{}' starts: best {:.3f}s of {:d} run(s)."
+                        .format(name, min(walls), len(walls)))
+
+    work_dir = args.work_dir if args.work_dir is not None else tempfile.mkdtemp(prefix="poorscrum_bench_")
+    try:
+        start = time.perf_counter()
+        if len(args.scripts) > 0:
+            home = generate(work_dir, fields_map, args)
+            logger.info("Generated '{:d}' stories in '{}' in {:.3f}s."
+                        .format(args.stories, work_dir, time.perf_counter() - start))
+
+        for script in args.scripts:
+            walls, err = time_script(script, work_dir, home, args.repeat)
+            results[script] = {"wall": walls, "returncode": err,
+                               "phases": time_phases(script, work_dir, fields_map)}
+            logger.info("'{}': best {:.3f}s of {:d} run(s){}."
+                        .format(script, min(walls), len(walls),
+                                "" if err == 0 else ", failed with '{:d}'".format(err)))
+    finally:
+        if args.work_dir is None:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    record = {"version": __version__,
+              "date": datetime.datetime.now().isoformat(timespec="seconds"),
+              "python": platform.python_version(),
+              "params": {"stories": args.stories, "tasks": args.tasks,
+                         "text_length": args.text_length,
+                         "link_density": args.link_density, "days": args.days,
+                         "seed": args.seed, "repeat": args.repeat},
+              "results": results}
+
+    line = json.dumps(record, sort_keys=True)
+    if args.output is None:
+        print(line)
+    else:
+        with open(args.output, "a") as output:
+            output.write(line + "\n")
+        logger.info("Appended the results to '{}'.".format(args.output))
+
+    if args.startup and args.max_startup is not None:
+        slow = [name for name, walls in results["startup"].items()
+                if min(walls) > args.max_startup]
+        if len(slow) > 0:
+            logger.error("Start takes longer than {:.3f}s: '{}'."
+                         .format(args.max_startup, "', '".join(slow)))
+            return 5
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,204 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "sepp.heid@t-online.de"
+__doc__ = """ """
+
+import argparse
+import configparser
+import os
+import sys
+
+from poorscrum import Status, TEAM, load_fields, __version__
+
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+
+
+BOARD_ITEMS = ("title", "id", "status", "devs")
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+
+    parser = argparse.ArgumentParser(
+        prog = os.path.basename(sys.argv[0]),
+        description = "Print the KANBAN board of the stories in a PPTX file, a story directory or a SQLite store",
+        epilog = "Ensure the '.pptx/pptx_pickup.ini' file exists in the the home directory")
+
+    parser.add_argument("--version", action = "version", version=__version__)
+
+    parser.add_argument('--status_first', type=Status, choices=list(Status), default = "none",
+                        help="Lowest story status on the board")
+
+    parser.add_argument('--status_last', type=Status, choices=list(Status), default = "out",
+                        help="Highest story status on the board")
+
+    parser.add_argument("--all", required=False,
+                        action="store_true",
+                        help="Show the columns without stories too")
+
+    parser.add_argument("-w", "--width", type=int, default=16,
+                        help="The width of a column")
+
+    parser.add_argument("source", nargs="?",
+                        help="The PPTX file, the story directory or the SQLite store")
+
+    return parser.parse_args()
+
+
+def board_items(story):
+    """ Returns the title, id, status and devs of a parsed story """
+
+    items = []
+    for item in BOARD_ITEMS:
+        try:
+            items.append(story.get(item, "text").strip())
+        except configparser.Error:
+            items.append(None)
+    return items
+
+
+def stories_from_deck(pptx_file):
+    """ Yields the title, id, status and devs of the story slides """
+
+    from poorscrum import read_slides
+
+    fields_map = load_fields()
+    if fields_map is None:
+        raise ValueError("Must provide correct story field mappings. Run 'pptx_learn.py'!")
+
+    fields_map = fields_map.for_deck(pptx_file)
+    if fields_map is None:
+        raise ValueError("The layout of the presentation does not match the story field mappings. Run 'pptx_learn.py'!")
+
+    for num, content in enumerate(read_slides(pptx_file)):
+        if not content.has_placeholders(fields_map.values()):
+            continue
+        items = []
+        for item in BOARD_ITEMS:
+            text = content.text(fields_map[item]) if item in fields_map else None
+            items.append(None if text is None else text.strip())
+        yield "slide #{:d}".format(num+1), items
+
+
+def stories_from_texts(texts):
+    """ Yields the title, id, status and devs of the story file texts """
+
+    for name, text in texts:
+        story = configparser.RawConfigParser()
+        try:
+            story.read_string(text, name)
+        except configparser.Error:
+            logger.warning("Skipped '{}'. Not a story file!".format(name))
+            continue
+        yield name, board_items(story)
+
+
+def story_texts(story_dir):
+    """ Yields the names and texts of the story files below a directory """
+
+    for dir_name, dir_names, file_names in os.walk(story_dir):
+        dir_names.sort()
+        for file_name in sorted(file_names):
+            if file_name.endswith(".story"):
+                story_pathname = os.path.join(dir_name, file_name)
+                with open(story_pathname) as story_file:
+                    yield story_pathname, story_file.read()
+
+
+def read_board(source):
+    """ Returns the KANBAN index of the stories of the source """
+
+    from poorscrum import Poorscrum_Kanban, Poorscrum_Store
+
+    if os.path.isdir(source):
+        stories = stories_from_texts(story_texts(source))
+    elif source.endswith(".sqlite"):
+        with Poorscrum_Store(source) as store:
+            stories = list(stories_from_texts(store.stories()))
+    else:
+        stories = stories_from_deck(source)
+
+    kanban = Poorscrum_Kanban()
+    for name, (title, story_id, status, devs) in stories:
+        label = title if title else name
+        if story_id:
+            label = "{} {}".format(story_id, label)
+        try:
+            kanban.add(status, devs, label)
+        except ValueError:
+            logger.warning("Skipped '{}'. Wrong status '{}'!".format(name, status))
+    return kanban
+
+
+def board_lines(kanban, statuses, width):
+    """ Returns the lines of the board with a row of cells per dev """
+
+    def cell(text):
+        text = "" if text is None else str(text)
+        return "{:{width}.{width}}".format(text, width=width)
+
+    def line(head, cells):
+        return "|".join([cell(head)] + [cell(text) for text in cells]) + "|"
+
+    rule = "+".join(["-" * width] * (len(statuses)+1)) + "+"
+    lines = [line("", [status.value for status in statuses]),
+             rule.replace("-", "=")]
+
+    for dev in [TEAM] + kanban.devs():
+        columns = [kanban.stories(status, dev) for status in statuses]
+        height = max([len(stories) for stories in columns] + [1])
+        for row in range(height):
+            head = (dev if dev != TEAM else "team") if row == 0 else ""
+            lines.append(line(head, [stories[row] if row < len(stories) else ""
+                                     for stories in columns]))
+        lines.append(rule)
+
+    lines.append(line("wip", [kanban.wip(status, status) for status in statuses]))
+    return lines
+
+
+def main():
+    args = parse_arguments()
+
+    if args.source is None:
+        logger.error("Must provide the PPTX file, the story directory or the SQLite store!")
+        return 1
+
+    if not os.path.exists(args.source):
+        logger.error("Source '{}' is not found.".format(args.source))
+        return 2
+
+    if args.width < 4:
+        logger.error("Must provide a column width of at least four!")
+        return 3
+
+    try:
+        kanban = read_board(args.source)
+    except ValueError as e:
+        logger.error(e)
+        return 4
+    except Exception:
+        logger.error("Source '{}' cannot be read.".format(args.source))
+        return 5
+
+    statuses = [status for status in Status
+                if args.status_first <= status <= args.status_last
+                and (args.all or kanban.wip(status, status) > 0)]
+
+    for line in board_lines(kanban, statuses, args.width):
+        print(line)
+
+    logger.info("The board has '{:d}' stories from '{}' to '{}'."
+                .format(kanban.wip(args.status_first, args.status_last),
+                        args.status_first, args.status_last))
+    for dev in kanban.devs():
+        logger.info("Dev '{}' owns '{:d}' stories."
+                    .format(dev, kanban.load(dev, args.status_first, args.status_last)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
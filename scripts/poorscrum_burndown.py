@@ -5,20 +5,16 @@ __author__ = "sepp.heid@t-online.de"
 __doc__ = """ """
 
 import argparse
+import io
 import os
+import re
 import sys
+import zipfile
 
-from pptx import Presentation
-from pptx.exc import PackageNotFoundError
-from pptx.util import Inches
-
-from poorscrum import SPRINT_FILE, BURNDOWN_SAVE_NAME, read_fields, __version__
+from poorscrum import SPRINT_FILE, HISTORY_DIR, Poorscrum_Slide, load_fields, content_from_slide, open_presentation, count_slides, read_slides, cached_slides, add_profile_argument, profiled, phase, in_phase, timed_items, __version__
 
 import configparser
 
-from matplotlib import rcParams
-import matplotlib.pyplot as plt
-
 import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(os.path.basename(sys.argv[0]))
@@ -28,6 +24,8 @@ logger = logging.getLogger(os.path.basename(sys.argv[0]))
 MIN_DAYS, MAX_DAYS = 0, 20
 MIN_PERIODS, MAX_PERIODS = 0, 4
 MIN_POINTS, MAX_POINTS = 0, 340 # 
+
+WORK_PATTERN = re.compile(r"[\d\s]*")
           
 def parse_arguments():
     """Parse command line arguments"""
@@ -46,9 +44,34 @@ def parse_arguments():
                         action="store_true", 
                         help="Do not create image, do not add to PPTX")
 
+    parser.add_argument("--ooxml", required=False,
+                        action="store_true", 
+                        help="Read the sizes directly from the XML parts of the PPTX file")
+
+    parser.add_argument("--cache", required=False,
+                        action="store_true", 
+                        help="Read the sizes as with '--ooxml' but keep the slides in a cache file next to the PPTX file")
+
+    parser.add_argument("--store", required=False, default=None,
+                        help="Read the sizes from the stories of a SQLite store instead of the PPTX file")
+
+    parser.add_argument("--sprint", required=False, default=None,
+                        help="Take only the stories of this sprint from the store")
+
+    parser.add_argument("--chart_file", required=False, default=None,
+                        help="Also save the burndown chart to this file")
+
+    parser.add_argument("--history", required=False,
+                        action="store_true", 
+                        help="Append the work left of the sprint to the history in '{}'".format(HISTORY_DIR))
+
+    parser.add_argument("--sprint_name", required=False, default=None,
+                        help="The name of the sprint in the history. Defaults to the PPTX file name")
+
     parser.add_argument("the_pptx", nargs="?", 
                         help="The name of the PPTX file to create the burnout chart for")
 
+    add_profile_argument(parser)
 
     return parser.parse_args()
 
@@ -87,91 +110,102 @@ def parse_sprint(sprint_file = SPRINT_FILE):
     return days, periods, points
 
 
-def extract_work(from_slide, with_pickup):
+def extract_work(from_content, with_pickup):
     """ Returns the the work to be done from the slide size items
     """
 
-    text = ""
-    for item, index in with_pickup.items():
-        if (item != "size 1") and \
-               (item != "size 2") and \
-               (item != "size 3") and \
-               (item != "size 4"):
-            continue
-            
+    texts = []
+    for item, index in with_pickup.sizes:
         try:
-            shape = from_slide.placeholders[int(index)]
+            paras = from_content.placeholders[index]
         except KeyError:
             return list() # Does not contain story, no error
         
-        if not shape.has_text_frame:
+        if paras is None:
             continue
 
-        paras = shape.text_frame.paragraphs
         if len(paras) > 1:
             return None # More than one paragraph, error
             
-        for p in paras:
-            for r in p.runs:
-                for c in r.text.strip():
-                    if not (c.isdigit() or c.isspace()):
-                        return None #  Error
-                    text += c
-                text += ' '
-    return [int(c) for c in text.split()]
+        for runs in paras:
+            for address, run_text in runs:
+                run_text = run_text.strip()
+                if WORK_PATTERN.fullmatch(run_text) is None:
+                    return None #  Error
+                texts.append(run_text)
+    return [int(c) for c in " ".join(texts).split()]
+
+
+def story_from_text(text, name):
+    story = configparser.ConfigParser()
+    story.read_string(text, name)
+    return story
 
 
-def plot_burndown(points_left, last_edited, save_name = BURNDOWN_SAVE_NAME):
-    sprint_days = len(points_left)
+def content_from_story(from_story, with_pickup):
+    """ Returns a stored story as the content of its slide
 
-    rcParams['figure.figsize'] = (8, 6)
+    Each line of a story item becomes a paragraph with a single run.
+    """
+
+    placeholders = dict()
+    for item, index in with_pickup.items():
+        if from_story.has_section(item):
+            text = from_story.get(item, "text")
+            placeholders[index] = [[(None, line)] for line in text.split("\n")]
+    return Poorscrum_Slide(placeholders, [])
 
-    plt.close("all")
 
-    """ Draw the optimal line """
-    plt.plot((0, sprint_days-1), (max(points_left), 0), color="blue", label="optimal")
+def extract_id(from_content, with_pickup, num):
+    """ Returns the id of the story on the slide for the history
+
+    Falls back to the slide number if the story has no id.
+    """
+
+    try:
+        story_id = from_content.text(with_pickup["id"])
+    except KeyError:
+        story_id = None
 
-    """ Draw the committed story points after sprint planning """
-    plt.bar(0, points_left[0], color="green", label="start", width=0.5)
+    if story_id is None or len(story_id.strip()) == 0:
+        return "slide {:d}".format(num+1)
+    return " ".join(story_id.split())
 
-    """ Draw the actual work done """
-    if (last_edited > 1) and (last_edited <= len(points_left)):
-        plt.bar(range(1,last_edited), \
-                points_left[1:last_edited], \
-                color="red", label="actual", width=0.5)
 
-    """ Draw the work still to be done """
-    if (last_edited >= 1) and (last_edited < len(points_left)):
-        plt.bar(range(last_edited,len(points_left)), \
-                points_left[last_edited:len(points_left)], \
-                color="grey", label="estimate", width=0.5)
+@in_phase("plot")
+def plot_burndown(points_left, last_edited):
+    """ Returns the PNG image of the burndown chart as bytes
 
-    plt.ylim(0, points_left[0])
-    plt.yticks(range(0, points_left[0]+1, max(1, int(points_left[0] / 5))))
+    The same image goes to the slide and to the chart file if asked for.
+    """
 
-    plt.xlim(-1, sprint_days)
-    plt.xticks(range(0, sprint_days+1, max(5, int(sprint_days / 5))))
+    from poorscrum import render_burndown
 
-    plt.grid()
-    plt.legend()
+    return render_burndown(points_left, last_edited)
 
-    plt.xlabel('SPRINT DAYS [days]')
-    plt.ylabel('TO BE DONE [story points]')
 
-    plt.title("Sprint Burndown", fontsize=20)
-    plt.savefig(save_name)
+@in_phase("write")
+def save_burndown(image, save_name):
+    """ Saves the image of the chart to a file. Returns the name of the file """
 
+    with open(save_name, "wb") as chart:
+        chart.write(image)
     return save_name
 
 
-def add_burndown_to_pptx(the_pptx, image_path):
+@in_phase("write")
+def add_burndown_to_pptx(the_pptx, image):
+    """ Adds the chart from the bytes of its image """
+    from pptx.util import Inches
+
     blank_slide_layout = the_pptx.slide_layouts[6]
     slide = the_pptx.slides.add_slide(blank_slide_layout)
     left = top = Inches(1)
-    image = slide.shapes.add_picture(image_path, left, top)
+    slide.shapes.add_picture(io.BytesIO(image), left, top)
 
-def main():
-    args = parse_arguments()
+
+def burndown(args):
+    """ Adds the burndown chart of the sprint to 'args.the_pptx' """
 
     if args.the_pptx is None:
         logger.error("Must provide PPTX backlog file name for work to be done!")
@@ -181,7 +215,8 @@ def main():
         logger.error("Must provide file with sprint setup!")
         return 2
 
-    fields_map = read_fields()
+    with phase("fields"):
+        fields_map = load_fields()
     if fields_map is None:
         logger.error("Must provide correct story item mappings. Run 'pptx_learn.py'!")
         return 3
@@ -203,17 +238,45 @@ def main():
     logger.info("The sprint has '{:d}' periods with '{:d}' working days.".format(periods, int(days/periods)))
     logger.info("The team has a capacity '{:d}' story points.".format(points))
 
+    if args.store is not None:
+        if not os.path.isfile(args.store):
+            logger.error("Store '{}' is not found.".format(args.store))
+            return 7
+
+        from poorscrum import Poorscrum_Store
+
+        with phase("open"), Poorscrum_Store(args.store) as store:
+            stories = list(store.stories(sprint=args.sprint))
+        logger.info("The store '{}' has '{:d}' stories."
+                    .format(os.path.basename(args.store), len(stories)))
+
     try:
-        prs = Presentation(args.the_pptx)
-    except NameError:
+        with phase("open"):
+            if args.store is not None:
+                prs = None
+                count = None
+            elif args.ooxml or args.cache:
+                prs = None
+                count = count_slides(args.the_pptx)
+            else:
+                prs = open_presentation(args.the_pptx, not args.dry)
+                count = len(prs.slides)
+    except (NameError, zipfile.BadZipFile):
         logger.error("Presentation has illegal name.")
         return 6
-    except PackageNotFoundError:
+    except FileNotFoundError:
         logger.error("Presentation is not found.")
         return 7
     
-    logger.info("The Backlog '{}' has '{:d}' slides."
-                .format(os.path.basename(args.the_pptx), len(prs.slides)))
+    if count is not None:
+        logger.info("The Backlog '{}' has '{:d}' slides."
+                    .format(os.path.basename(args.the_pptx), count))
+
+        with phase("fields"):
+            fields_map = fields_map.for_deck(args.the_pptx)
+        if fields_map is None:
+            logger.error("The layout of the presentation does not match the story field mappings. Run 'pptx_learn.py'!")
+            return 14
 
     """
     The first day (day 0) in the sprint is the sprint planing day. All other
@@ -223,8 +286,23 @@ def main():
     until the end of the sprint. These are called the 'unedited'
     """
     last_edited = days
-    total_points_left = (days)*[0]
-    for num, slide in enumerate(prs.slides):
+    series = []
+    story_ids = []
+    if args.store is not None:
+        contents = (content_from_story(story_from_text(text, name), fields_map)
+                    for name, text in stories)
+    elif args.cache:
+        contents = cached_slides(args.the_pptx)
+    elif args.ooxml:
+        contents = read_slides(args.the_pptx)
+    else:
+        size_indices = set(fields_map.size_indices)
+        if "id" in fields_map:
+            size_indices.add(fields_map["id"])
+        contents = (content_from_slide(slide, size_indices, False)
+                    for slide in prs.slides)
+
+    for num, slide in enumerate(timed_items("extract", contents)):
         """ Calc work left for a slide in the sprint from sizes """
         slide_points_left = extract_work(slide, fields_map)
         if slide_points_left is None:
@@ -246,52 +324,88 @@ def main():
             logger.error("Slide '{:d}': No Size entry.Fix sizes!".format(num+1))
             return 10
 
-        """ Add entered values """
-        edited_range = range(len(slide_points_left))
-        for index in edited_range:
-            total_points_left[index] += slide_points_left[index]
-
-        """ Add the last entered value """
-        unedited_range = range(len(slide_points_left), len(total_points_left))
-        for index in unedited_range:
-            total_points_left[index] += slide_points_left[-1]
-        
+        series.append(slide_points_left)
+        story_ids.append(extract_id(slide, fields_map, num))
         logger.info("Slide '{:d}': Included in work to be done!".format(num+1))
 
         
     logger.info("Work left is consistently entered including sprint day {:d}."
                 .format(last_edited))
 
+    """ Entered values with the last one for the unedited days """
+    from poorscrum import work_matrix, work_totals, period_estimates, capacity_margin
+
+    with phase("work") as work_phase:
+        work_phase.add(len(series))
+        work_left = work_matrix(series, days)
+        total_points_left = work_totals(work_left)
+        estimates = period_estimates(total_points_left, days, periods)
+
     """ Output work to be done in period format """
-    nperiods = periods+1
-    for period in range(int(days / nperiods)):
-        period_estimate = total_points_left[(nperiods)*period:(nperiods)*(period+1)]
+    for period, period_estimate in enumerate(estimates):
         logger.info("Work left estimate for period {:d}: {}".
-                    format(period, str(period_estimate)))
+                    format(period, str(period_estimate.tolist())))
 
-    if points > total_points_left[0]:
+    margin = int(capacity_margin(points, total_points_left))
+    if margin > 0:
         logger.info("Devs offer more points than required ('{:d}' > '{:d}'). Sprint can work!"
-                    .format(points, total_points_left[0]))
+                    .format(points, int(total_points_left[0])))
         logger.info("'{:d}' points are available for analysis and spikes."
-                    .format(points - total_points_left[0]))
+                    .format(margin))
     else:
         logger.warn("Devs offers less points than required ('{:d}' < '{:d}'). Sprint cannot work!"
-                    .format(points, total_points_left[0]))
+                    .format(points, int(total_points_left[0])))
         logger.warn("Stories are to be reduced by '{:d}' points."
-                    .format(total_points_left[0] - points))
+                    .format(-margin))
     
+    if args.history:
+        from poorscrum import Poorscrum_History
+
+        sprint_name = args.sprint_name
+        if sprint_name is None:
+            sprint_name = os.path.splitext(os.path.basename(args.the_pptx))[0]
+
+        if args.dry:
+            logger.info("Would append sprint '{}' to the history.".format(sprint_name))
+        else:
+            try:
+                with phase("write"):
+                    sprint = Poorscrum_History().append(sprint_name, work_left, story_ids,
+                                                        last_edited, periods, points)
+            except OSError:
+                logger.error("Cannot append the sprint to the history '{}'.".format(HISTORY_DIR))
+                return 12
+            logger.info("Appended sprint '{}' as number '{:d}' to the history."
+                        .format(sprint_name, sprint))
+
     if args.dry:
         logger.info("Dry run finished: ok.")
         return 0
 
-    save_name = plot_burndown(total_points_left, last_edited)
-    logger.info("Saved the burddown chart to '{}'".format(save_name))
+    if prs is None:
+        """ Only needed now to add the chart """
+        try:
+            with phase("open"):
+                prs = open_presentation(args.the_pptx, True)
+        except (FileNotFoundError, zipfile.BadZipFile):
+            logger.error("Presentation is not found.")
+            return 7
+
+    image = plot_burndown(total_points_left.tolist(), last_edited)
+    if args.chart_file is not None:
+        try:
+            save_name = save_burndown(image, args.chart_file)
+        except OSError:
+            logger.error("Cannot save the burndown chart to '{}'.".format(args.chart_file))
+            return 13
+        logger.info("Saved the burddown chart to '{}'".format(save_name))
 
-    add_burndown_to_pptx(prs, save_name)
+    add_burndown_to_pptx(prs, image)
     logger.info("Added the burddown chart to the presentation '{}'".format(args.the_pptx))
 
     try:
-        prs.save(args.the_pptx)
+        with phase("save"):
+            prs.save(args.the_pptx)
     except:
         logger.error("Cannot save the presentation. If it is open consider to close it!")
         return 11
@@ -300,6 +414,13 @@ def main():
     
     return 0
 
+
+def main():
+    args = parse_arguments()
+
+    with profiled(args.profile, deck=args.the_pptx):
+        return burndown(args)
+
         
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "sepp.heid@t-online.de"
+__doc__ = """ """
+
+import argparse
+import json
+import os
+import socket
+import sys
+
+from poorscrum import SOCKET_FILE, __version__
+
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+
+
+SCRIPTS = ["export", "modify", "burndown", "learn"]
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+
+    parser = argparse.ArgumentParser(
+        prog = os.path.basename(sys.argv[0]),
+        description = "Run a poorscrum tool with the poorscrum server",
+        epilog = "The arguments after the tool are the same as for 'poorscrum_<tool>.py'")
+
+    parser.add_argument("--version", action = "version", version=__version__)
+
+    parser.add_argument("--socket", default=SOCKET_FILE,
+                        help="The Unix socket of the server")
+
+    parser.add_argument("--stop", action="store_true",
+                        help="Stop the server")
+
+    parser.add_argument("script", nargs="?", choices=SCRIPTS,
+                        help="The tool to run")
+
+    parser.add_argument("argv", nargs=argparse.REMAINDER,
+                        help="The arguments of the tool")
+
+    return parser.parse_args()
+
+
+def request_server(socket_file, request):
+    """ Returns the answer of the server to the request """
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        client.connect(socket_file)
+        client.sendall(json.dumps(request).encode("utf-8"))
+        client.shutdown(socket.SHUT_WR)
+
+        data = b""
+        while True:
+            chunk = client.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+
+    return json.loads(data.decode("utf-8"))
+
+
+def main():
+    args = parse_arguments()
+
+    if args.stop:
+        request = {"stop": True}
+    elif args.script is None:
+        logger.error("Must provide the tool to run!")
+        return 1
+    else:
+        request = {"script": args.script, "argv": args.argv, "cwd": os.getcwd()}
+
+    try:
+        answer = request_server(args.socket, request)
+    except OSError:
+        logger.error("Cannot reach the server on '{}'. Run 'poorscrum_server.py'!"
+                     .format(args.socket))
+        return 1
+    except ValueError:
+        logger.error("The server sent an illegal answer.")
+        return 1
+
+    sys.stdout.write(answer["stdout"])
+    sys.stderr.write(answer["stderr"])
+    return answer["returncode"]
+
+
+if __name__ == "__main__":
+    sys.exit(main())
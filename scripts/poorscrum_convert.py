@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "sepp.heid@t-online.de"
+__doc__ = """ """
+
+import argparse
+import os
+import sys
+
+from poorscrum import Status, __version__
+
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+
+    parser = argparse.ArgumentParser(
+        prog = os.path.basename(sys.argv[0]),
+        description = "Convert between directories of story files and a SQLite store",
+        epilog = "The story files keep their paths relative to the story directory")
+
+    parser.add_argument("--version", action = "version", version=__version__)
+
+    parser.add_argument("--to_tree", required=False,
+                        action="store_true",
+                        help="Write the stories of the store to the story directory")
+
+    parser.add_argument("--sprint", required=False, default=None,
+                        help="The sprint of the stories stored or written")
+
+    parser.add_argument('--status_first', type=Status, choices=list(Status), default = "none",
+                        help="Lowest story status written to the story directory")
+
+    parser.add_argument('--status_last', type=Status, choices=list(Status), default = "out",
+                        help="Highest story status written to the story directory")
+
+    parser.add_argument("store", nargs="?",
+                        help="The SQLite store")
+
+    parser.add_argument("story_dir", nargs="?",
+                        help="The directory of the story files")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    if args.store is None:
+        logger.error("Must provide the SQLite store!")
+        return 1
+
+    if args.story_dir is None:
+        logger.error("Must provide the directory of the story files!")
+        return 2
+
+    if args.to_tree and not os.path.isfile(args.store):
+        logger.error("Store '{}' is not found.".format(args.store))
+        return 3
+
+    if not args.to_tree and not os.path.isdir(args.story_dir):
+        logger.error("Story directory '{}' is not found.".format(args.story_dir))
+        return 4
+
+    import sqlite3
+    from poorscrum import Poorscrum_Store, store_from_tree, tree_from_store
+
+    try:
+        with Poorscrum_Store(args.store) as store:
+            if args.to_tree:
+                count = tree_from_store(store, args.story_dir,
+                                        args.status_first, args.status_last, args.sprint)
+                logger.info("Wrote '{:d}' stories to '{}'.".format(count, args.story_dir))
+            else:
+                count = store_from_tree(store, args.story_dir, args.sprint)
+                logger.info("Stored '{:d}' stories in '{}'.".format(count, args.store))
+    except (OSError, sqlite3.Error) as e:
+        logger.error("Conversion failed: {}".format(e))
+        return 5
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,14 +5,14 @@ __author__ = "sepp.heid@t-online.de"
 __doc__ = """ """
 
 
-from pptx import Presentation
-from pptx.exc import PackageNotFoundError
-
-from poorscrum import Status, read_fields, story_points, __version__ 
+from poorscrum import Status, SCALES, ARCHIVES, Poorscrum_Writer, archive_name, load_fields, task_totals, content_from_slide, open_presentation, count_slides, read_slides, cached_slides, add_profile_argument, profiled, phase, in_phase, timed_items, __version__ 
 
 import configparser
 
 import argparse
+import hashlib
+import io
+import zipfile
 
 import os
 import sys
@@ -22,27 +22,34 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(os.path.basename(sys.argv[0]))
 
 
-def parse_arguments():
-    """Parse command line arguments"""
-
-    parser = argparse.ArgumentParser(
-        prog = os.path.basename(sys.argv[0]),
-        description = "Export stories from text file to the slides of PPTX file",
-        epilog = "Ensure the '.pptx/pptx_pickup.ini' file exists in the the home directory")
-    
-
-    parser.add_argument("--version", action = "version", version=__version__)
+def add_export_arguments(parser):
+    """Add the arguments shared by the single and the batch export"""
 
     parser.add_argument("--dry", required=False,
                         action="store_true", 
                         help="Do not create text stories")
 
-    parser.add_argument("from_pptx", nargs="?", 
-                        help="The name of the PPTX file with story slides to export")
+    parser.add_argument("--incremental", required=False,
+                        action="store_true", 
+                        help="Rewrite only the stories changed since the last export")
 
-    parser.add_argument("to_slide_dir", nargs="?", 
-                        help="The target directory for the text story files. Must not exist!")
+    parser.add_argument("--ooxml", required=False,
+                        action="store_true", 
+                        help="Read the slides directly from the XML parts of the PPTX file")
 
+    parser.add_argument("--cache", required=False,
+                        action="store_true", 
+                        help="Read the slides as with '--ooxml' but keep them in a cache file next to the PPTX file")
+
+    parser.add_argument("--archive", required=False, default=None,
+                        choices=list(ARCHIVES),
+                        help="Write the story files into a single archive next to the target directory")
+
+    parser.add_argument("--sprint", required=False, default=None,
+                        help="The sprint of the stories in a 'sqlite' archive")
+
+    parser.add_argument("--writers", type=int, default=4,
+                        help="Number of threads writing the story files")
 
     kgroup = parser.add_argument_group(title="export to KANBAN")
     kgroup.add_argument("--kanban", required=False,
@@ -57,6 +64,9 @@ def parse_arguments():
                         help="Highest story status to be considered")
 
 
+    parser.add_argument("--scale", choices=list(SCALES), default="fibonacci",
+                        help="Scale of the story points in the task totals")
+
     ngroup = parser.add_argument_group(title="name stories")
     ngroup.add_argument("--with_title", type=int, default=35,
                         help="Add a part of the TITLE field to the story file name")
@@ -70,31 +80,37 @@ def parse_arguments():
                         action="store_true", 
                         help="Skip the count prefix for the file name")
 
+    return parser
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+
+    parser = argparse.ArgumentParser(
+        prog = os.path.basename(sys.argv[0]),
+        description = "Export stories from text file to the slides of PPTX file",
+        epilog = "Ensure the '.pptx/pptx_pickup.ini' file exists in the the home directory")
+    
+
+    parser.add_argument("--version", action = "version", version=__version__)
+
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Number of workers to extract and write the stories in parallel")
+
+    parser.add_argument("from_pptx", nargs="?", 
+                        help="The name of the PPTX file with story slides to export")
+
+    parser.add_argument("to_slide_dir", nargs="?", 
+                        help="The target directory for the text story files. Must not exist!")
+
+    add_export_arguments(parser)
+
+    add_profile_argument(parser)
+
     return parser.parse_args()
 
 
-def extract_text(from_frame):
-    text = ""
-    paras = from_frame.paragraphs
-    for p in paras:
-        for r in p.runs:
-            link = r.hyperlink
-            has_link = link is not None and (link.address is not None)
-            if has_link:
-                text += '<'
-                for c in link.address:
-                    text += c if ord(c) < 128 else ''
-                text += '>'
-            for c in r.text:
-                text += c if ord(c) < 128 else ''
-            if has_link:
-                text += '</>'
-        if( len(paras) > 1):
-            text += "\n"
-    return text
-
-
-def export_story_to_config(from_slide, with_fields):
+def export_story_to_config(from_content, with_fields):
     """ Returns the story items for a story slide in the config format
 
     Each story slide contains placeholders with a text frame which in turn
@@ -109,51 +125,56 @@ def export_story_to_config(from_slide, with_fields):
 
     for item, index in with_fields.items():
         try:
-            shape = from_slide.placeholders[int(index)]
+            text = from_content.text(index)
         except KeyError:
             return None
 
-        if not shape.has_text_frame:
+        if text is None:
             continue
 
-        text = extract_text(shape.text_frame)
-                    
         story.add_section(item)
         story.set(item, "text", text.strip())
 
     return story
 
 
-def append_tasks_to_config(from_slide, to_story):
+@in_phase("tasks")
+def append_tasks_to_config(from_content, to_story, scale = "fibonacci"):
     
     """ Find the container of the table.
     Abort if there is more than one!  """
-    for shape in from_slide.shapes:
-        if not shape.has_table:
-            return None
+    if not from_content.is_tasks:
+        return None
 
-    table = shape.table
-    lastrow = len(table.rows)-1
+    """ The last row holds the total. The table has as many rows as needed """
+    tasks = from_content.table[:-1]
 
     """ Add each task in the slide in tasks section """
-    wstart, wleft, wdone = 0, 0, 0
     to_story.add_section("tasks")
-    for num, row in enumerate(table.rows):
-        if num < lastrow:
-            tasks = [extract_text(cell.text_frame) for cell in row.cells]
-            to_story.set("tasks","task{:d}".format(num+1),",".join(tasks))
-            wstart += int(tasks[1]) 
-            wleft += int(tasks[2])
-            wdone += int(tasks[3])
-    total = ",".join(["Total",
-                      str(story_points(wstart)),
-                      str(story_points(wleft)),
-                      str(story_points(wdone)), "Points"])
-    to_story.set("tasks", "total", total)
+    for num, task in enumerate(tasks):
+        to_story.set("tasks","task{:d}".format(num+1),",".join(task))
+    to_story.set("tasks", "total", ",".join(task_totals(tasks, scale)))
     return to_story
 
 
-def write_config(num, count, story, args):
+def config_text(story):
+    """ Returns the text of a story as written to its file """
+    text = io.StringIO()
+    story.write(text)
+    return text.getvalue()
+
+
+@in_phase("write")
+def kanban_dirs(args):
+    """ Returns the directories of the stati exported in the KANBAN tree """
+
+    first_status = Status(args.status_first)
+    last_status = Status(args.status_last)
+    return [os.path.join(args.to_slide_dir, status.value.lower())
+            for status in Status if first_status <= status <= last_status]
+
+
+def write_config(num, count, story, args, writer):
     """ Should have been done by argparse !"""
     first_status = Status(args.status_first)
     last_status = Status(args.status_last)
@@ -193,14 +214,13 @@ def write_config(num, count, story, args):
                 logger.error("The slide #{:d} has no Dev. Aborted!".format(num))
                 return None
 
-    if not os.path.exists(to_slide_dir):
-        try:
-            os.makedirs(to_slide_dir)
-        except:
-            logger.error("Failed to create the kanban directory '{}'.".
-                         format(to_slide_dir))
-        logger.info("Created the kanban directory '{}'.".
-                    format(to_slide_dir))
+    try:
+        if writer.make_dir(to_slide_dir):
+            logger.info("Created the kanban directory '{}'.".
+                        format(to_slide_dir))
+    except OSError:
+        logger.error("Failed to create the kanban directory '{}'.".
+                     format(to_slide_dir))
 
 
     """ Generate a very special file name from title to guess content"""
@@ -244,8 +264,7 @@ def write_config(num, count, story, args):
     story_pathname = os.path.join(to_slide_dir, story_filename) 
 
     if not args.dry:
-        with open(story_pathname, 'w') as storyfile:
-            story.write(storyfile)
+        writer.write(story_pathname, config_text(story))
         logger.info("Saved the story slide #{:d} as '{}'."
                     .format(num, story_pathname))
     else:
@@ -255,8 +274,269 @@ def write_config(num, count, story, args):
     return story_pathname
 
 
-def main():
-    args = parse_arguments()
+def is_story_slide(from_slide, with_fields):
+    """ Checks if the slide holds all the placeholders of the story fields """
+
+    indices = set(shape.placeholder_format.idx for shape in from_slide.placeholders)
+    return all(index in indices for index in with_fields.values())
+
+
+def is_tasks_slide(from_slide):
+    """ Checks if the slide holds nothing but the table with the tasks """
+
+    shapes = list(from_slide.shapes)
+    return len(shapes) > 0 and all(shape.has_table for shape in shapes)
+
+
+def is_story_content(from_content, with_fields):
+    return from_content.has_placeholders(with_fields.values())
+
+
+def is_tasks_content(from_content):
+    return from_content.is_tasks
+
+
+def warn_missing_tasks(story_index):
+    """ Warns of a story without tasks slide by the number of its story slide """
+    logger.warning("Tasks slide is missing after story slide #{:d}.".format(story_index+1))
+
+
+def pair_slides(slides, with_fields, is_story=is_story_slide, is_tasks=is_tasks_slide):
+    """ Returns the story and tasks slide pairs of the presentation
+
+    Each pair is a tuple with the slide number used for logging, the count of
+    the story used for naming, the index of the story slide and the index of
+    the tasks slide. The latter is None if the story has no tasks slide.
+
+    The pairing follows the sequential export: a slide following a story slide
+    without tasks is again a candidate for a story.
+    """
+
+    slides = list(slides)
+    pairs = []
+    count = 0
+    num = 0
+    while num < len(slides):
+        if not is_story(slides[num], with_fields):
+            logger.info("Skipped the slide #{:d} as story slide.".format(num+1))
+            num += 1
+            continue
+
+        count += 1
+        next_num = num + 1
+        if next_num < len(slides) and is_tasks(slides[next_num]):
+            pairs.append((next_num, count, num, next_num))
+            num += 2
+        else:
+            pairs.append((min(next_num, len(slides)-1), count, num, None))
+            num += 1
+
+    return pairs
+
+
+""" The presentation opened once per extraction worker process """
+_worker_slides = None
+_worker_fields = None
+_worker_scale = None
+
+
+def _init_worker(from_pptx, with_fields, scale):
+    global _worker_slides, _worker_fields, _worker_scale
+    _worker_slides = list(open_presentation(from_pptx).slides)
+    _worker_fields = with_fields
+    _worker_scale = scale
+
+
+def _extract_pair(pair):
+    num, count, story_index, tasks_index = pair
+    story = export_story_to_config(content_from_slide(_worker_slides[story_index]),
+                                   _worker_fields)
+    if tasks_index is not None:
+        append_tasks_to_config(content_from_slide(_worker_slides[tasks_index]), story,
+                               _worker_scale)
+    return story
+
+
+def export_parallel(prs, fields_map, args, writer):
+    """ Exports the story and tasks slide pairs with a pool of workers
+
+    The slides are paired first. The pairs are extracted in worker processes
+    and the story files are handed to the writer. The results are taken in
+    the order of the pairs to get the same story files as the sequential
+    export.
+    """
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    pairs = pair_slides(prs.slides, fields_map)
+    for num, count, story_index, tasks_index in pairs:
+        if tasks_index is None:
+            warn_missing_tasks(story_index)
+
+    chunksize = max(1, int(len(pairs) / (4*args.jobs)))
+    with ProcessPoolExecutor(max_workers=args.jobs,
+                             initializer=_init_worker,
+                             initargs=(args.from_pptx, fields_map, args.scale)) as extractors:
+
+        stories = timed_items("extract",
+                              extractors.map(_extract_pair, pairs, chunksize=chunksize))
+
+        for (num, count, story_index, tasks_index), story in zip(pairs, stories):
+            if not args.dry:
+                write_config(num, count, story, args, writer)
+
+    if not args.dry:
+        logger.info("Saved '{:d}' stories with tasks.".format(len(pairs)))
+    else:
+        logger.info("Would have saved {:d} stories.".format(len(pairs)))
+
+    return 0
+
+
+def manifest_name(to_slide_dir):
+    """ Returns the name of the manifest file next to the story directory """
+
+    return os.path.normpath(to_slide_dir) + ".manifest"
+
+
+def hash_options(fields_map, args):
+    """ Returns the hash of everything but the slides defining the story files """
+
+    options = [sorted(fields_map.pairs()), str(args.status_first), str(args.status_last), args.scale,
+               args.kanban, args.with_title, args.with_values, args.with_ids, args.skip_counts]
+    return hashlib.sha1(repr(options).encode()).hexdigest()
+
+
+def hash_slides(count, slides):
+    """ Returns the hash of the slide XML and the link targets of a story
+
+    The count is part of the hash since it is part of the story file name.
+    """
+
+    digest = hashlib.sha1(str(count).encode())
+    for slide in slides:
+        digest.update(slide.part.blob)
+        for rId, rel in sorted(slide.part.rels.items()):
+            digest.update(rel.target_ref.encode())
+    return digest.hexdigest()
+
+
+def read_manifest(manifest_file, options, to_slide_dir):
+    """ Returns if the last export had the same options and its story files by the hash of its slides
+
+    The story files are kept relative to the story directory in the manifest
+    and are returned joined to it. Returns an empty mapping if there is no
+    manifest. A story skipped by the status filter has an empty file name.
+    """
+
+    manifest = configparser.RawConfigParser()
+    manifest.read(manifest_file)
+
+    try:
+        stories = manifest.items("stories")
+    except configparser.NoSectionError:
+        return True, dict()
+
+    same_options = manifest.get("export", "options", fallback=None) == options
+    return same_options, dict((digest, os.path.join(to_slide_dir, story_name) if story_name else "")
+                              for digest, story_name in stories)
+
+
+def write_manifest(manifest_file, options, stories, to_slide_dir):
+    """ Writes the story files of the export by the hash of its slides
+
+    The story files are kept relative to the story directory.
+    """
+
+    manifest = configparser.RawConfigParser()
+    manifest.add_section("export")
+    manifest.set("export", "options", options)
+    manifest.add_section("stories")
+    for digest, story_pathname in stories.items():
+        manifest.set("stories", digest,
+                     os.path.relpath(story_pathname, to_slide_dir) if story_pathname else "")
+    with open(manifest_file, 'w') as mfile:
+        manifest.write(mfile)
+
+    return manifest_file
+
+
+def export_incremental(prs, fields_map, args, writer):
+    """ Exports the story and tasks slide pairs changed since the last export
+
+    The manifest next to the story directory keeps the hash of each slide pair
+    with the story file written for it. Pairs with a known hash are skipped
+    if their story file still exists. Story files of the last export which
+    are not written again are removed. If the options changed, all stories
+    are written again.
+    """
+
+    manifest_file = manifest_name(args.to_slide_dir)
+    options = hash_options(fields_map, args)
+    same_options, last_stories = read_manifest(manifest_file, options, args.to_slide_dir)
+    if not same_options:
+        logger.info("The options changed since the last export. All stories are written again.")
+    known_stories = last_stories if same_options else dict()
+
+    slides = list(prs.slides)
+    stories = dict()
+    skipped = 0
+    for num, count, story_index, tasks_index in pair_slides(slides, fields_map):
+        pair = [slides[story_index]]
+        if tasks_index is not None:
+            pair.append(slides[tasks_index])
+        digest = hash_slides(count, pair)
+
+        story_pathname = known_stories.get(digest)
+        if (story_pathname is not None) and \
+           ((story_pathname == "") or os.path.isfile(story_pathname)):
+            stories[digest] = story_pathname
+            skipped += 1
+            continue
+
+        with phase("extract") as extract_phase:
+            extract_phase.add()
+            story = export_story_to_config(content_from_slide(slides[story_index]), fields_map)
+        if tasks_index is not None:
+            append_tasks_to_config(content_from_slide(slides[tasks_index]), story, args.scale)
+        else:
+            warn_missing_tasks(story_index)
+
+        if not args.dry:
+            story_pathname = write_config(num, count, story, args, writer)
+        else:
+            logger.info("Would save the changed story of slide #{:d}.".format(num+1))
+        stories[digest] = story_pathname or ""
+
+    """ Remove the story files not written again """
+
+    kept = set(os.path.normpath(story_pathname) for story_pathname in stories.values()
+               if story_pathname != "")
+    removed = 0
+    for story_pathname in set(last_stories.values()):
+        if story_pathname == "" or os.path.normpath(story_pathname) in kept \
+           or not os.path.isfile(story_pathname):
+            continue
+        if not args.dry:
+            os.remove(story_pathname)
+            logger.info("Removed the story file '{}'.".format(story_pathname))
+        else:
+            logger.info("Would remove the story file '{}'.".format(story_pathname))
+        removed += 1
+
+    if not args.dry:
+        write_manifest(manifest_file, options, stories, args.to_slide_dir)
+        logger.info("Saved '{:d}' changed stories, kept '{:d}', removed '{:d}'."
+                    .format(len(stories) - skipped, skipped, removed))
+    else:
+        logger.info("Would have saved '{:d}' changed stories, kept '{:d}', removed '{:d}'."
+                    .format(len(stories) - skipped, skipped, removed))
+
+    return 0
+
+
+def check_arguments(args):
+    """ Returns 0 if the arguments for the export of a deck are legal """
 
     if args.from_pptx is None:
         logger.error("Must provide PPTX backlog file name for input!")
@@ -278,29 +558,63 @@ def main():
     if args.with_values and args.kanban:
         logger.error("Must provide legal parameter combinations!")
         return 5
-        
-    fields_map = read_fields()
-    if fields_map is None:
-        logger.error("Must provide correct story field mappings. Run 'pptx_learn.py'!")
+
+    if args.incremental and args.jobs > 1:
+        logger.error("Must provide legal parameter combinations!")
+        return 5
+
+    if (args.ooxml or args.cache) and (args.incremental or args.jobs > 1):
+        logger.error("Must provide legal parameter combinations!")
+        return 5
+
+    if args.archive is not None and args.incremental:
+        logger.error("Must provide legal parameter combinations!")
+        return 5
+
+    if args.writers < 1:
+        logger.error("Must provide at least one writer!")
         return 6
 
+    return 0
+
+
+def export_deck(args, fields_map):
+    """ Exports the slides of the deck 'args.from_pptx' to 'args.to_slide_dir'
+    """
 
     try:
-        prs = Presentation(args.from_pptx)
-    except NameError:
+        with phase("open"):
+            if args.ooxml or args.cache:
+                prs = None
+                count = count_slides(args.from_pptx)
+            else:
+                prs = open_presentation(args.from_pptx)
+                count = len(prs.slides)
+    except (NameError, zipfile.BadZipFile):
         logger.error("Presentation has illegal name.")
         return 7
-    except PackageNotFoundError:
+    except FileNotFoundError:
         logger.error("Presentation is not found.")
         return 8
     
     logger.info("The Backlog '{}' has '{:d}' slide(s)."
-                .format(os.path.basename(args.from_pptx), len(prs.slides)))
+                .format(os.path.basename(args.from_pptx), count))
+
+    with phase("fields"):
+        fields_map = fields_map.for_deck(args.from_pptx)
+    if fields_map is None:
+        logger.error("The layout of the presentation does not match the story field mappings. Run 'pptx_learn.py'!")
+        return 11
 
 
-    if not args.dry:
+    if args.dry:
+        logger.info("Would create the directory '{}' for the story files"
+                    .format(args.to_slide_dir))
+        return export_slides(prs, fields_map, args, None)
+
+    if args.archive is None:
         try:
-            os.makedirs(args.to_slide_dir)
+            os.makedirs(args.to_slide_dir, exist_ok=args.incremental)
         except:
             logger.error("Failed to create the slide directory '{}'. Consider to delete it!"
                          .format(args.to_slide_dir))
@@ -309,12 +623,40 @@ def main():
         logger.info("Created the directory '{}' for the story files"
                     .format(args.to_slide_dir))
     else:
-        logger.info("Would create the directory '{}' for the story files"
-                    .format(args.to_slide_dir))
+        logger.info("Writing the story files to the archive '{}'"
+                    .format(archive_name(args.to_slide_dir, args.archive)))
+
+    try:
+        with Poorscrum_Writer(args.to_slide_dir, args.archive, args.writers,
+                              sprint=args.sprint) as writer:
+            if args.kanban:
+                writer.make_dirs(kanban_dirs(args))
+            return export_slides(prs, fields_map, args, writer)
+    except OSError as e:
+        logger.error("Failed to write the story files: {}".format(e))
+        return 10
+
+
+def export_slides(prs, fields_map, args, writer):
+    """ Exports the slides with the path chosen by the arguments """
 
-    story = None    
+    if args.jobs > 1:
+        return export_parallel(prs, fields_map, args, writer)
+
+    if args.incremental:
+        return export_incremental(prs, fields_map, args, writer)
+
+    story = None
     selected_stories = 0
-    for num, slide in enumerate(prs.slides):
+    if args.cache:
+        contents = cached_slides(args.from_pptx)
+    elif args.ooxml:
+        contents = read_slides(args.from_pptx)
+    else:
+        contents = (content_from_slide(slide) for slide in prs.slides)
+    contents = timed_items("extract", contents)
+
+    for num, slide in enumerate(contents):
 
         """
         A story consists of the a slide pair with the specification fields and a
@@ -325,14 +667,14 @@ def main():
         """
         if story:
             """ Try to add tasks. No problem if there is none"""
-            tasks = append_tasks_to_config(slide, story)
+            tasks = append_tasks_to_config(slide, story, args.scale)
             if tasks is None:
-                logger.warn("Tasks slide is missing after story slide #{:d}.".format(num))
+                warn_missing_tasks(num-1)
 
 
             """ Always save it """
             if not args.dry:
-                write_config(num, selected_stories, story, args)
+                write_config(num, selected_stories, story, args, writer)
 
             if tasks:
                 logger.info("Task slide #{:d} is appended to file.".format(num+1))
@@ -348,11 +690,11 @@ def main():
 
     if not args.dry:
         if story:
-            tasks = append_tasks_to_config(slide, story)
+            tasks = append_tasks_to_config(slide, story, args.scale)
             if tasks is None:
-                logger.warn("Tasks slide is missing after story slide #{:d}.".format(num+1))
+                warn_missing_tasks(num)
 
-            write_config(num, selected_stories, story, args)
+            write_config(num, selected_stories, story, args, writer)
             
         logger.info("Saved '{:d}' stories with tasks.".format(selected_stories))
     else:
@@ -360,6 +702,23 @@ def main():
         
     return 0
 
+
+def main():
+    args = parse_arguments()
+
+    err = check_arguments(args)
+    if err != 0:
+        return err
+
+    with profiled(args.profile, deck=args.from_pptx):
+        with phase("fields"):
+            fields_map = load_fields()
+        if fields_map is None:
+            logger.error("Must provide correct story field mappings. Run 'pptx_learn.py'!")
+            return 6
+
+        return export_deck(args, fields_map)
+
         
 if __name__ == "__main__":
     sys.exit(main())
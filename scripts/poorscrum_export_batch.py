@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "sepp.heid@t-online.de"
+__doc__ = """ """
+
+
+from poorscrum import load_fields, __version__
+
+from poorscrum_export import add_export_arguments, check_arguments, export_deck
+
+import argparse
+import copy
+import shlex
+import time
+
+import os
+import sys
+
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+
+    parser = argparse.ArgumentParser(
+        prog = os.path.basename(sys.argv[0]),
+        description = "Export the stories of many PPTX files in one run",
+        epilog = "Ensure the '.pptx/pptx_pickup.ini' file exists in the the home directory")
+
+
+    parser.add_argument("--version", action = "version", version=__version__)
+
+    parser.add_argument("--manifest", required=False, default=None,
+                        help="File with one 'from_pptx to_slide_dir' pair per line. Quote paths with spaces as in a shell")
+
+    parser.add_argument("--jobs", type=int, default=1,
+                        help="Number of worker processes to export the decks in parallel")
+
+    parser.add_argument("decks", nargs="*",
+                        help="Pairs of PPTX files and their target directories")
+
+    add_export_arguments(parser)
+
+    return parser.parse_args()
+
+
+def read_manifest(manifest_file):
+    """ Returns the deck pairs of the manifest file
+
+    The lines are split as by a shell, so paths with spaces are quoted.
+    Empty lines and comments starting with '#' are ignored. Returns None if
+    a line does not hold exactly one pair.
+    """
+
+    decks = []
+    with open(manifest_file) as manifest:
+        for line in manifest:
+            try:
+                pair = shlex.split(line, comments=True)
+            except ValueError:
+                return None
+            if len(pair) == 0:
+                continue
+            if len(pair) != 2:
+                return None
+            decks.append(tuple(pair))
+    return decks
+
+
+def export_timed(deck_args, fields_map):
+    """ Exports a single deck and returns its result with the elapsed time """
+
+    start = time.perf_counter()
+    err = export_deck(deck_args, fields_map)
+    return deck_args.from_pptx, err, time.perf_counter() - start
+
+
+def main():
+    args = parse_arguments()
+
+    if len(args.decks) % 2 != 0:
+        logger.error("Must provide the decks as pairs of PPTX file and target directory!")
+        return 1
+
+    decks = list(zip(args.decks[0::2], args.decks[1::2]))
+
+    if args.manifest is not None:
+        try:
+            manifest = read_manifest(args.manifest)
+        except OSError:
+            logger.error("Cannot read the manifest '{}'.".format(args.manifest))
+            return 2
+        if manifest is None:
+            logger.error("Must provide one pair of PPTX file and target directory per line!")
+            return 3
+        decks += manifest
+
+    if len(decks) == 0:
+        logger.error("Must provide at least one deck to export!")
+        return 4
+
+    """ Check all decks before exporting the first """
+
+    decks_args = []
+    for from_pptx, to_slide_dir in decks:
+        deck_args = copy.copy(args)
+        deck_args.from_pptx = from_pptx
+        deck_args.to_slide_dir = to_slide_dir
+        deck_args.jobs = 1
+
+        err = check_arguments(deck_args)
+        if err != 0:
+            logger.error("Deck '{}' has illegal arguments.".format(from_pptx))
+            return 5
+
+        decks_args.append(deck_args)
+
+    fields_map = load_fields()
+    if fields_map is None:
+        logger.error("Must provide correct story field mappings. Run 'pptx_learn.py'!")
+        return 6
+
+    start = time.perf_counter()
+    if args.jobs > 1:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=args.jobs) as exporters:
+            results = list(exporters.map(export_timed, decks_args,
+                                         [fields_map]*len(decks_args)))
+    else:
+        results = [export_timed(deck_args, fields_map) for deck_args in decks_args]
+    elapsed = time.perf_counter() - start
+
+    failed = 0
+    for from_pptx, err, seconds in results:
+        if err != 0:
+            failed += 1
+            logger.error("Deck '{}' failed with '{:d}' after {:.3f}s."
+                         .format(from_pptx, err, seconds))
+        else:
+            logger.info("Deck '{}' exported in {:.3f}s."
+                        .format(from_pptx, seconds))
+
+    logger.info("Exported '{:d}' of '{:d}' decks in {:.3f}s."
+                .format(len(results) - failed, len(results), elapsed))
+
+    return 0 if failed == 0 else 7
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,13 +4,12 @@
 __author__ = "sepp.heid@t-online.de"
 __doc__ = """ """
 
-from pptx import Presentation
-
-from poorscrum import Poorscrum_Tasks, Status, read_fields, EMPTY_PPTX, story_points, __version__
+from poorscrum import Status, SCALES, load_fields, EMPTY_PPTX, task_totals, prefetch, import_text, open_presentation, add_profile_argument, profiled, phase, in_phase, timed_items, __version__
 
 import configparser
 
 import argparse
+import io
 import os
 import sys
 
@@ -37,57 +36,62 @@ def parse_arguments():
                         action="store_true", 
                         help="Start with empty slide flag")
 
+    parser.add_argument("--chunk", type=int, default=0,
+                        help="Save the presentation in parts of that many stories each starting with the input presentation")
+
+    parser.add_argument("--prefetch", type=int, default=16,
+                        help="Number of story files read ahead while the slides are built")
+
+    parser.add_argument("--bulk", required=False,
+                        action="store_true", 
+                        help="Build the slides as copies of the first story and tasks slides")
+
+    parser.add_argument("--scale", choices=list(SCALES), default="fibonacci",
+                        help="Scale of the story points in the task totals")
+
     parser.add_argument('--status_first', type=Status, choices=list(Status), default = "none",
                         help="Lowest story status considered")
 
     parser.add_argument('--status_last', type=Status, choices=list(Status), default = "out",
                         help="Highest story status considered")
 
+    parser.add_argument("--store", required=False, default=None,
+                        help="SQLite store to take the stories from instead of text files")
+
+    parser.add_argument("--sprint", required=False, default=None,
+                        help="Take only the stories of this sprint from the store")
+
     parser.add_argument("to_pptx", nargs=1, 
                         help="PPTX file to import the story slides to")
 
-    parser.add_argument("from_text", nargs="+", 
+    parser.add_argument("from_text", nargs="*", 
                         help="Text files with story content")
 
-    return parser.parse_args()
-
+    add_profile_argument(parser)
 
-def import_text(to_frame, text):
-    is_link = False
-    p = to_frame.paragraphs[0] # Already there!
-    r = p.add_run()
-    for c in text:
-        if c == "\n":
-            p = to_frame.add_paragraph()
-            r = p.add_run()
-        elif c == '<':
-            is_link = True
-            r = p.add_run()
-        elif c == '>' and is_link:
-            is_link = False
-        elif c == '/' and is_link:
-            pass
-        else:
-            if is_link:
-                if r.hyperlink.address is None:
-                    r.hyperlink.address = c
-                else:
-                    r.hyperlink.address += c
-            else:
-                r.text += c
+    return parser.parse_args()
 
 
-def import_story(from_story, to_prs, with_pickup):
+@in_phase("write")
+def import_story(from_story, to_prs, with_pickup, prototypes = None):
     """ Imports the story items for a story slide
     """
 
-    """!!! Our layout is always the last in the layout list !!!"""
-    story_slide_layout = to_prs.slide_layouts[-1]
-    to_slide = to_prs.slides.add_slide(story_slide_layout)
+    if prototypes is None:
+        """!!! Our layout is always the last in the layout list !!!"""
+        story_slide_layout = to_prs.slide_layouts[-1]
+        to_slide = to_prs.slides.add_slide(story_slide_layout)
+    else:
+        to_slide = prototypes["story"].add_slide(to_prs)
+
+    """ Look up the placeholders once instead of per item """
+    shapes = dict()
+    for shape in to_slide.placeholders:
+        shapes.setdefault(shape.placeholder_format.idx, shape)
 
     for item, index in with_pickup.items():
         try:
-            shape = to_slide.placeholders[int(index)]
+            shape = shapes[index]
         except KeyError:
             return None
         
@@ -104,92 +108,84 @@ def import_story(from_story, to_prs, with_pickup):
     return to_slide
 
 
-def import_tasks(from_tasks, to_prs):
+@in_phase("tasks")
+def import_tasks(from_tasks, to_prs, scale = "fibonacci", prototypes = None):
     """ Imports the tasks items for a tasks slide
+
+    The table has a row for each task and one for the total, but not less
+    than 'TASK_ROWS'.
     """
 
-    """!!! Our tasks layout is always the one before the story layout !!!"""
-    tasks_slide_layout = to_prs.slide_layouts[-2]
-    to_slide = to_prs.slides.add_slide(tasks_slide_layout)
-    to_table = Poorscrum_Tasks(to_slide, to_prs.slide_height, to_prs.slide_width)
-    lastrow = len(to_table.table.rows)-1
-    
+    from poorscrum import TASK_ROWS, Poorscrum_Tasks
+
     try:
-        tasks = from_tasks.items("tasks")
+        tasks = [task.split(',') for key, task in from_tasks.items("tasks")
+                 if key != "total"]
     except:
+        tasks = None
+
+    rows = TASK_ROWS if tasks is None else max(TASK_ROWS, len(tasks)+1)
+    if prototypes is None:
+        """!!! Our tasks layout is always the one before the story layout !!!"""
+        tasks_slide_layout = to_prs.slide_layouts[-2]
+        to_slide = to_prs.slides.add_slide(tasks_slide_layout)
+        to_table = Poorscrum_Tasks(to_slide, to_prs.slide_height, to_prs.slide_width,
+                                   rows = rows)
+    else:
+        to_slide = tasks_prototype(prototypes, to_prs, rows).add_slide(to_prs)
+        to_table = Poorscrum_Tasks.from_slide(to_slide)
+
+    if tasks is None:
         return None
 
-    wstart, wleft, wdone = 0, 0, 0
-    for row, task in enumerate(tasks):
-        if row < lastrow:
-            # Calculate all rows
-            data = task[1].split(',')
-            wstart += int(data[1]) 
-            wleft += int(data[2])
-            wdone += int(data[3])
-            # Output leading tasks only
-            to_table.put_as_row(row, data)
-
-    # Fibonacci!
-    total = ["Total",
-             str(story_points(wstart)),
-             str(story_points(wleft)),
-             str(story_points(wdone)), "Points"]
-    to_table.put_as_row(lastrow, total)
+    to_table.put_as_list(tasks)
+    to_table.put_as_row(rows-1, task_totals(tasks, scale))
         
     return to_slide
 
 
-def main():
-    args = parse_arguments()
+def read_stories(story_files, args, store = None):
+    """ Yields the stories in the desired status range one after the other
 
-    if args.to_pptx is None:
-        logger.error("Must provide target PPTX files for slides!")
-        return 1
-
-    if os.path.splitext(args.to_pptx[0])[1] != ".pptx":
-        logger.error("Must provide '.pptx' extension for presentation!")
-        return 2
+    Each item is a tuple with an error code, the story file and the parsed
+    story. The last item has a non zero error code if a story file is
+    illegal.
 
-    if args.from_text is None:
-        logger.error("Must provide TEXT backlog files for input!")
-        return 3
-
-    fields_map = read_fields()
-    if fields_map is None:
-        logger.error("Must provide correct story item mappings!")
-        return 4
-
-    input_pptx = EMPTY_PPTX if args.empty else args.to_pptx[0]
-
-    try:
-        to_prs = Presentation(input_pptx)
-    except:
-        logger.error("Presentation '{}' is not defined".format(input_pptx))
-        return 5
+    With a store the stories are taken from there by one query for the
+    status range. The story files are the names in the store then.
+    """
 
-    logger.info("PPTX Backlog has '{:d}' slides before import"
-                .format(len(to_prs.slides)))
+    first_status = Status(args.status_first)
+    last_status = Status(args.status_last)
 
+    if store is None:
+        sources = ((story_file, None) for story_file in story_files)
+    else:
+        sources = store.stories(first_status, last_status, args.sprint)
 
-    for story_file in args.from_text:
+    for story_file, text in sources:
         name, ext = os.path.splitext(os.path.basename(story_file))
 
         if ext != ".story":
             logger.error("Must provide story file names with '.story' extension!")
-            return 6
+            yield 6, story_file, None
+            return
 
         try:
             num = int(name.split('_')[0])
         except:
             logger.error("Must provide story file names with leading digits!")
-            return 7
+            yield 7, story_file, None
+            return
 
 
         """ Read the story """
         
         story = configparser.ConfigParser()
-        story.read(story_file)
+        if text is None:
+            story.read(story_file)
+        else:
+            story.read_string(text, story_file)
 
         """ abort if the story is not in desired state """
 
@@ -198,12 +194,11 @@ def main():
         except:
             logger.warn("Skipped the file prefixed #{:d}. Wrong Status Item!"
                         .format(num))
-            return 8
+            yield 8, story_file, None
+            return
 
         """ Skip the story is not in desired range """
         
-        first_status = Status(args.status_first)
-        last_status = Status(args.status_last)
         if  slide_status < first_status:
             logger.info("Skipped the slide #{:d}. Status '{}' is below '{}'."
                         .format(num, slide_status, first_status))
@@ -213,37 +208,215 @@ def main():
                         .format(num, slide_status, last_status))
             continue
 
-        """ Append the story to the presentation """
-        
-        slide = import_story(story, to_prs, fields_map)
-        if slide is None:
-            logger.error("Wrong text story format: '{}'".format(story_file))
-            return 9
+        yield 0, story_file, story
 
-        tasks = import_tasks(story, to_prs)
-        if tasks is None:
-            logger.warn("There are no tasks in: '{}'".format(story_file))
 
-        logger.info("Import ok: '{}'".format(story_file))
+def make_prototypes(to_prs):
+    """ Returns the prototypes of the story slides and of the tasks slides
+
+    The tasks prototypes are made on demand by the number of table rows.
+    """
+
+    from poorscrum import Poorscrum_Prototype
+
+    return {"story": Poorscrum_Prototype(to_prs.slide_layouts[-1])}
+
+
+def tasks_prototype(prototypes, to_prs, rows):
+    """ Returns the prototype of the tasks slides with that many table rows
+
+    The first tasks slide gets the table with the default tasks. Every other
+    tasks slide with the same rows is a copy of it.
+    """
+
+    from poorscrum import Poorscrum_Prototype, Poorscrum_Tasks
+
+    prototype = prototypes.get(("tasks", rows))
+    if prototype is None:
+        def build_tasks(slide):
+            Poorscrum_Tasks(slide, to_prs.slide_height, to_prs.slide_width, rows = rows)
+
+        prototype = Poorscrum_Prototype(to_prs.slide_layouts[-2], build_tasks)
+        prototypes["tasks", rows] = prototype
+    return prototype
+
+
+def empty_part(to_prs):
+    """ Returns the presentation without its slides as PPTX bytes for the further parts
+
+    Taken before the first story is imported, so the slides of the input
+    presentation are only in the first part. The slides are removed from a
+    copy in memory through the slide id list and 'drop_rel', which are
+    private to python-pptx. Both are the same from 0.6.17 to 1.0.
+    """
+
+    from pptx import Presentation
+
+    copy = io.BytesIO()
+    to_prs.save(copy)
+    copy.seek(0)
+    part_prs = Presentation(copy)
 
+    slide_ids = part_prs.slides._sldIdLst
+    for slide_id in list(slide_ids):
+        slide_ids.remove(slide_id)
+        part_prs.part.drop_rel(slide_id.rId)
 
-    if not args.dry:
+    part = io.BytesIO()
+    part_prs.save(part)
+    return part.getvalue()
+
+
+def open_part(part_pptx):
+    """ Returns a fresh presentation for a further part from the bytes of 'empty_part' """
+
+    from pptx import Presentation
+    return Presentation(io.BytesIO(part_pptx))
+
+
+def chunk_name(to_pptx, chunk):
+    """ Returns the file name of a part of the presentation """
+
+    root, ext = os.path.splitext(to_pptx)
+    return "{}_{:03d}{}".format(root, chunk, ext)
+
+
+@in_phase("save")
+def save_presentation(to_prs, to_pptx, dry):
+    if not dry:
         """ Save the presentation """
 
         try:
-            to_prs.save(args.to_pptx[0]) 
+            to_prs.save(to_pptx) 
         except:
             logger.error("Cannot save the presentation. If it is open consider to close it!")
             return 10
 
-        logger.info("Presentation saved to '{}' .".format(args.to_pptx[0]))
+        logger.info("Presentation saved to '{}' .".format(to_pptx))
 
     else:
         
-        logger.info("Would save presentation to '{}' .".format(args.to_pptx[0]))
+        logger.info("Would save presentation to '{}' .".format(to_pptx))
 
     return 0
 
+
+def import_stories(args):
+    """ Imports the stories into the presentation 'args.to_pptx' """
+
+    if args.to_pptx is None:
+        logger.error("Must provide target PPTX files for slides!")
+        return 1
+
+    if os.path.splitext(args.to_pptx[0])[1] != ".pptx":
+        logger.error("Must provide '.pptx' extension for presentation!")
+        return 2
+
+    if len(args.from_text) == 0 and args.store is None:
+        logger.error("Must provide TEXT backlog files for input!")
+        return 3
+
+    if len(args.from_text) > 0 and args.store is not None:
+        logger.error("Must provide either TEXT backlog files or a store!")
+        return 3
+
+    if args.store is not None and not os.path.isfile(args.store):
+        logger.error("Store '{}' is not found.".format(args.store))
+        return 3
+
+    with phase("fields"):
+        fields_map = load_fields()
+    if fields_map is None:
+        logger.error("Must provide correct story item mappings!")
+        return 4
+
+    input_pptx = EMPTY_PPTX if args.empty else args.to_pptx[0]
+
+    try:
+        with phase("open"):
+            to_prs = open_presentation(input_pptx, True)
+    except:
+        logger.error("Presentation '{}' is not defined".format(input_pptx))
+        return 5
+
+    with phase("fields"):
+        fields_map = fields_map.for_deck(input_pptx)
+    if fields_map is None:
+        logger.error("The layout of the presentation does not match the story field mappings. Run 'pptx_learn.py'!")
+        return 11
+
+    logger.info("PPTX Backlog has '{:d}' slides before import"
+                .format(len(to_prs.slides)))
+
+    prototypes = make_prototypes(to_prs) if args.bulk else None
+
+    store = None
+    if args.store is not None:
+        from poorscrum import Poorscrum_Store
+        store = Poorscrum_Store(args.store)
+
+    stories = prefetch(read_stories(args.from_text, args, store), args.prefetch)
+    try:
+        return import_parts(stories, to_prs, fields_map, prototypes, args)
+    finally:
+        """ Ends the reading ahead if the import stops early """
+        stories.close()
+        if store is not None:
+            store.close()
+
+
+def import_parts(stories, to_prs, fields_map, prototypes, args):
+    """ Imports the stories into the presentation and saves it, in parts if asked for """
+
+    if args.chunk > 0:
+        with phase("open"):
+            part_pptx = empty_part(to_prs)
+
+    chunk = 0
+    imported = 0
+    for err, story_file, story in timed_items("extract", stories):
+        if err != 0:
+            return err
+
+        """ Append the story to the presentation """
+        
+        slide = import_story(story, to_prs, fields_map, prototypes)
+        if slide is None:
+            logger.error("Wrong text story format: '{}'".format(story_file))
+            return 9
+
+        tasks = import_tasks(story, to_prs, args.scale, prototypes)
+        if tasks is None:
+            logger.warning("There are no tasks in: '{}'".format(story_file))
+
+        logger.info("Import ok: '{}'".format(story_file))
+
+        imported += 1
+        if args.chunk > 0 and imported % args.chunk == 0:
+            """ Flush the part and continue with a fresh one """
+
+            err = save_presentation(to_prs, chunk_name(args.to_pptx[0], chunk), args.dry)
+            if err != 0:
+                return err
+            chunk += 1
+            with phase("open"):
+                to_prs = open_part(part_pptx)
+            prototypes = make_prototypes(to_prs) if args.bulk else None
+
+    if args.chunk > 0:
+        if imported % args.chunk == 0 and imported > 0:
+            return 0 # Last part already saved
+        return save_presentation(to_prs, chunk_name(args.to_pptx[0], chunk), args.dry)
+
+    return save_presentation(to_prs, args.to_pptx[0], args.dry)
+
+
+def main():
+    args = parse_arguments()
+
+    with profiled(args.profile, deck=args.to_pptx[0]):
+        return import_stories(args)
+
         
 if __name__ == "__main__":
     sys.exit(main())
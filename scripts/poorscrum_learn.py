@@ -6,10 +6,9 @@ __doc__ = """ """
 
 import argparse
 import os
+import re
 import sys
 
-from pptx import Presentation
-
 import poorscrum
 
 import logging
@@ -17,6 +16,22 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(os.path.basename(sys.argv[0]))
 
 
+""" Placeholders which cannot hold the text of a story field """
+NO_TEXT_TYPES = ("BITMAP", "CHART", "DATE", "FOOTER", "HEADER", "MEDIA_CLIP",
+                 "ORG_CHART", "PICTURE", "SLIDE_IMAGE", "SLIDE_NUMBER", "TABLE")
+TITLE_TYPES = ("TITLE", "CENTER_TITLE", "VERTICAL_TITLE")
+
+""" Fields which hold numbers only on a story slide """
+NUMBER_FIELDS = ("id", "value", "size 1", "size 2", "size 3", "size 4")
+NUMBER_PATTERN = re.compile(r"[\d\s]+")
+
+""" The least lead of the rating of a field over the next placeholder """
+MIN_MARGIN = 0.5
+
+""" The least share of the texts on story slides fitting a field """
+MIN_FIT = 0.5
+
+
 def parse_arguments():
     """Parse command line arguments"""
 
@@ -35,11 +50,22 @@ def parse_arguments():
     
     parser.add_argument('--version', action='version', version=poorscrum.__version__)
 
+    parser.add_argument('--auto', action='store_true',
+                        help='Learn the fields of all story layouts from their placeholders and story slides')
+
+    parser.add_argument('--dry', action='store_true',
+                        help='Do not write the fields learned with --auto')
+
+    parser.add_argument('--confirm', action='store_true',
+                        help='Write the fields learned with --auto without a reference layout')
+
     parser.add_argument('from_pptx', nargs='?', 
                         help='PPTX file with story slides with the destinct layput')
     parser.add_argument('and_slide', nargs='?', type=int, 
                         help='Slide # to be used for indexing with default content')
 
+    poorscrum.add_profile_argument(parser)
+
     return parser.parse_args()
 
 
@@ -52,10 +78,7 @@ def extract_story_as_field_map(from_slide, use_pickup):
         if not shape.has_text_frame:
             continue
         """ Get the number in the place holder """
-        text = ""
-        for p in shape.text_frame.paragraphs:
-            for c in p.text:
-                text += c if ord(c) < 128 else ''
+        text = poorscrum.to_ascii("".join(p.text for p in shape.text_frame.paragraphs))
         try:
             use_pickup[keys[int(text)]] = \
                 str(shape.placeholder_format.idx)
@@ -65,8 +88,288 @@ def extract_story_as_field_map(from_slide, use_pickup):
     return use_pickup
 
 
-def main():
-    args = parse_arguments()
+def name_tokens(name):
+    return set(re.findall("[a-z]+", name.lower()))
+
+
+def field_number(name):
+    number = re.search(r"(\d+)$", name)
+    return None if number is None else int(number.group(1))
+
+
+def geometry(shape, prs):
+    """ Returns the position and size of a shape relative to the slide """
+    return ((shape.left or 0)/prs.slide_width, (shape.top or 0)/prs.slide_height,
+            (shape.width or 0)/prs.slide_width, (shape.height or 0)/prs.slide_height)
+
+
+def text_placeholders(layout):
+    """ Returns the placeholders of a layout which may hold the text of a field """
+    return [shape for shape in layout.placeholders
+            if shape.placeholder_format.type.name not in NO_TEXT_TYPES]
+
+
+def find_reference(fields_map, presentations):
+    """ Returns the geometry of the fields on the layout they are known for
+
+    This is the layout with the fingerprint of the fields, or without one
+    the last layout with all their placeholders. None if there is none.
+    """
+
+    for prs in presentations:
+        for layout in reversed(list(prs.slide_layouts)):
+            if fields_map.fingerprint is not None and \
+               poorscrum.layout_fingerprint(layout.part.blob) != fields_map.fingerprint:
+                continue
+            shapes = dict((shape.placeholder_format.idx, shape) for shape in layout.placeholders)
+            if all(index in shapes for index in fields_map.values()):
+                return dict((name, geometry(shapes[index], prs))
+                            for name, index in fields_map.items())
+    return None
+
+
+def layout_slides(prs):
+    """ Returns the slides of the presentation by the part of their layout """
+
+    slides = dict()
+    for slide in prs.slides:
+        slides.setdefault(slide.slide_layout.part, []).append(slide)
+    return slides
+
+
+def slide_texts(slides):
+    """ Returns the texts of the placeholders of the slides by placeholder index """
+
+    texts = dict()
+    for slide in slides:
+        for shape in slide.placeholders:
+            if shape.has_text_frame:
+                text = poorscrum.extract_text(shape.text_frame).strip()
+                if len(text) > 0:
+                    texts.setdefault(shape.placeholder_format.idx, []).append(text)
+    return texts
+
+
+def content_fit(name, texts):
+    """ Returns the share of the texts on story slides fitting the field. None without texts
+
+    A status field holds a status and a number field a number. The other
+    fields hold free text, so a status or a number speaks against them.
+    """
+
+    if len(texts) == 0:
+        return None
+
+    statuses = set(status.value for status in poorscrum.Status)
+    if name == "status":
+        fits = [text in statuses for text in texts]
+    elif name in NUMBER_FIELDS:
+        fits = [NUMBER_PATTERN.fullmatch(text) is not None for text in texts]
+    else:
+        fits = [text not in statuses and NUMBER_PATTERN.fullmatch(text) is None
+                for text in texts]
+    return sum(fits)/len(fits)
+
+
+def content_score(name, texts):
+    """ Rates how well the texts on story slides fit the field
+
+    Statuses and numbers tell their fields from -1.0 to 1.0. Free text fits
+    any free text field alike, so it only speaks against a field down to -2.0.
+    """
+
+    fit = content_fit(name, texts)
+    if fit is None:
+        return 0.0
+
+    if name != "status" and name not in NUMBER_FIELDS:
+        return 2.0*(fit - 1.0)
+
+    score = 2.0*(fit - 0.5)
+    if name == "id" and fit == 1.0 and len(texts) > 1 and len(set(texts)) == len(texts):
+        """ Only the id differs on each story slide """
+        score += 0.5
+    return score
+
+
+def rate_pairs(layout, prs, names, reference, texts):
+    """ Returns the rating of each pair of field and placeholder of a layout
+
+    The pairs are rated by the names, the types, the distance to the
+    position of the field on the reference layout and the texts on the
+    story slides. The position outweighs the names, which are often copied
+    from one placeholder to the next. Without a position the names only
+    break ties.
+    """
+
+    name_rating = 1.0 if reference is not None else 0.25
+
+    shapes = text_placeholders(layout)
+
+    """ The placeholders in reading order for the numbered fields """
+    order = sorted(shapes, key=lambda shape: (shape.top or 0, shape.left or 0))
+
+    ratings = dict()
+    for name in names:
+        tokens = name_tokens(name) - set(["data"])
+        number = field_number(name)
+        named = [shape for shape in order if len(tokens & name_tokens(shape.name)) > 0]
+
+        for shape in shapes:
+            idx = shape.placeholder_format.idx
+            rating = 0.0
+            if shape in named:
+                rating += name_rating
+                if number is not None and reference is None and \
+                   named.index(shape) == number-1:
+                    rating += 0.1
+            if (shape.placeholder_format.type.name in TITLE_TYPES) != (name == "title"):
+                rating -= 0.5 if name != "title" else 0.0
+            elif name == "title":
+                rating += 1.0
+            if reference is not None:
+                rating -= 10.0*sum(abs(a-b) for a, b in
+                                  zip(reference[name], geometry(shape, prs)))
+            rating += content_score(name, texts.get(idx, []))
+            ratings[name, idx] = rating
+
+    return ratings
+
+
+def infer_field_map(layout, prs, names, reference, texts):
+    """ Returns the placeholder index of each field on a layout and the doubts
+
+    The pairs of field and placeholder are taken from the best rating down.
+    A field is in doubt if another placeholder not surely taken by a field
+    rated better is rated about as well,
+    if the texts of its placeholder on the story slides do not fit it, or if
+    there is neither a reference layout nor any text to tell. The doubts map
+    the fields to the reasons. Returns None if the layout has too few
+    placeholders.
+    """
+
+    shapes = text_placeholders(layout)
+    if len(shapes) < len(names):
+        return None
+
+    ratings = rate_pairs(layout, prs, names, reference, texts)
+
+    field_map = dict()
+    doubts = dict()
+    taken = set()
+    sure = set()
+    for (name, idx), rating in sorted(ratings.items(), key=lambda pair: pair[1], reverse=True):
+        if name in field_map or idx in taken:
+            continue
+
+        others = [(other_rating, other_idx) for (other_name, other_idx), other_rating in ratings.items()
+                  if other_name == name and other_idx != idx and other_idx not in sure]
+        field_map[name] = idx
+        taken.add(idx)
+
+        fit = content_fit(name, texts.get(idx, []))
+        if len(others) > 0 and rating - max(others)[0] < MIN_MARGIN:
+            doubts[name] = "placeholders '{}' and '{}' fit it alike".format(idx, max(others)[1])
+        elif fit is not None and fit < MIN_FIT:
+            doubts[name] = "the texts of placeholder '{}' do not fit it".format(idx)
+        elif fit is None and reference is None:
+            doubts[name] = "placeholder '{}' has no text on the story slides".format(idx)
+        else:
+            sure.add(idx)
+
+    return dict((name, str(field_map[name])) for name in names), doubts
+
+
+def learn_layouts(prs, fields_map, reference):
+    """ Returns the fields of each story layout of the presentation by fingerprint
+
+    Only the layouts of slides are learned. A layout with a field in doubt
+    is left out. No slide is changed.
+    """
+
+    names = list(fields_map.keys())
+    slides = layout_slides(prs)
+    pickups = dict()
+    for num, layout in enumerate(prs.slide_layouts):
+        if layout.part not in slides:
+            continue
+
+        learned = infer_field_map(layout, prs, names, reference, slide_texts(slides[layout.part]))
+        if learned is None:
+            continue
+        field_map, doubts = learned
+
+        if len(doubts) > 0:
+            logger.warning("Left out the layout #{:d} '{}'. '{:d}' fields are in doubt."
+                           .format(num+1, layout.name, len(doubts)))
+            for name in names:
+                if name in doubts:
+                    logger.warning("The field '{}' is in doubt: {}.".format(name, doubts[name]))
+            continue
+
+        fingerprint = poorscrum.layout_fingerprint(layout.part.blob)
+        logger.info("Learned the layout #{:d} '{}' of '{:d}' slides with fingerprint '{}'."
+                    .format(num+1, layout.name, len(slides[layout.part]), fingerprint))
+        for name in names:
+            logger.info("The field '{}' is the placeholder '{}'.".format(name, field_map[name]))
+        pickups[fingerprint] = field_map
+
+    return pickups
+
+
+def learn_auto(args):
+    """ Adds the fields of all story layouts of the PPTX file to the pickup file
+
+    Without a reference layout for the known fields the learned fields are
+    only written with '--confirm'.
+    """
+
+    with poorscrum.phase("fields"):
+        fields_map = poorscrum.load_fields()
+    if fields_map is None:
+        logger.error("Must provide initial pickup file")
+        return 4
+
+    try:
+        with poorscrum.phase("open"):
+            prs = poorscrum.open_presentation(args.from_pptx)
+    except (NameError, FileNotFoundError):
+        logger.error("Presentation is not defined")
+        return 5
+
+    presentations = [prs]
+    if os.path.isfile(poorscrum.EMPTY_PPTX) and \
+       os.path.abspath(poorscrum.EMPTY_PPTX) != os.path.abspath(args.from_pptx):
+        with poorscrum.phase("open"):
+            presentations.append(poorscrum.open_presentation(poorscrum.EMPTY_PPTX))
+
+    with poorscrum.phase("extract") as extract_phase:
+        extract_phase.add(len(prs.slide_layouts))
+        reference = find_reference(fields_map, presentations)
+        if reference is None:
+            logger.warning("No layout has the known fields. Learning from names, types and texts only.")
+        pickups = learn_layouts(prs, fields_map, reference)
+    if len(pickups) == 0:
+        logger.error("No layout of a slide has placeholders for all fields without doubt.")
+        return 8
+
+    if args.dry:
+        logger.info("Would add the fields of '{:d}' layouts.".format(len(pickups)))
+        return 0
+
+    if reference is None and not args.confirm:
+        logger.error("Review the fields learned without a reference layout with '--dry' "
+                     "and run again with '--confirm' to add them.")
+        return 9
+
+    with poorscrum.phase("save"):
+        pickup_file = poorscrum.add_layout_fields(pickups)
+    logger.info("'{}' successfully extended by '{:d}' layouts".format(pickup_file, len(pickups)))
+    return 0
+
+
+def learn(args):
+    """ Writes the fields learned from 'args.from_pptx' to the pickup file """
 
     if args.from_pptx is None:
         logger.error("Must provide PPTX backlog file name for input")
@@ -76,17 +379,22 @@ def main():
         logger.error("Must provide '.pptx' extension for presentation!")
         return 2
 
+    if args.auto:
+        return learn_auto(args)
+
     if args.and_slide is None:
         logger.error("Must provide slide number as index output")
         return 3
 
-    fields_map = poorscrum.read_fields()
+    with poorscrum.phase("fields"):
+        fields_map = poorscrum.read_fields()
     if fields_map is None:
         logger.error("Must provide initial pickup file")
         return 4
         
     try:
-        prs = Presentation(args.from_pptx)
+        with poorscrum.phase("open"):
+            prs = poorscrum.open_presentation(args.from_pptx)
     except NameError:
         logger.error("Presentation is not defined")
         return 5
@@ -96,17 +404,30 @@ def main():
                      .format(len(prs.slides)))
         return 6
 
-    fields_map = extract_story_as_field_map(prs.slides[args.and_slide-1], fields_map)
+    from_slide = prs.slides[args.and_slide-1]
+    with poorscrum.phase("extract") as extract_phase:
+        extract_phase.add()
+        fields_map = extract_story_as_field_map(from_slide, fields_map)
     if fields_map is None:
         logger.error("Must provide correct initial pickup file")
         return 7
 
-    pickup_file = poorscrum.write_fields(fields_map)
+    """ The scripts check the decks for the layout learned from """
+    fingerprint = poorscrum.layout_fingerprint(from_slide.slide_layout.part.blob)
+    with poorscrum.phase("save"):
+        pickup_file = poorscrum.write_fields(fields_map, fingerprint=fingerprint)
 
     logger.info("'{}' successfully generated".format(pickup_file))
         
     return 0
 
+
+def main():
+    args = parse_arguments()
+
+    with poorscrum.profiled(args.profile, deck=args.from_pptx):
+        return learn(args)
+
         
 if __name__ == "__main__":
     sys.exit(main())
@@ -5,15 +5,14 @@ __author__ = "sepp.heid@t-online.de"
 __doc__ = """ """
 
 
-from pptx import Presentation
-from pptx.exc import PackageNotFoundError
-
-from poorscrum import Status, read_fields, __version__
+from poorscrum import Status, load_fields, content_from_slide, open_presentation, count_slides, read_slide_at, read_slides, cached_slides, add_profile_argument, profiled, phase, timed_items, __version__
 
 import configparser
 
 import argparse
+import zipfile
 
+import io
 import os
 import sys
 
@@ -22,12 +21,16 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(os.path.basename(sys.argv[0]))
 
 
+""" The ways to find the slide of a story file """
+KEYS = ["number", "id", "title"]
+
+
 def parse_arguments():
     """Parse command line arguments"""
 
     parser = argparse.ArgumentParser(
         prog = os.path.basename(sys.argv[0]),
-        description = "Modify a single exported story from a slide of PPTX file",
+        description = "Modify exported stories from the slides of PPTX file",
         epilog = "Ensure the '.pptx/pptx_pickup.ini' file exists in the the home directory")
     
 
@@ -40,16 +43,30 @@ def parse_arguments():
     parser.add_argument('--field', required=False, default=None,
                         help="The only field for update")
 
+    parser.add_argument("--ooxml", required=False,
+                        action="store_true", 
+                        help="Read the slide directly from the XML parts of the PPTX file")
+
     parser.add_argument("from_pptx", nargs="?", 
                         help="The name of the PPTX file with story slides to modify")
 
-    parser.add_argument("to_story_file", nargs="?", 
-                        help="The target story file. Must exist!")
+    parser.add_argument("--cache", required=False,
+                        action="store_true", 
+                        help="Read the slides as with '--ooxml' but keep them in a cache file next to the PPTX file")
+
+    parser.add_argument("--key", required=False, default="number",
+                        choices=KEYS,
+                        help="Find the slide of a story by the number in the file name or by its id or title field")
+
+    parser.add_argument("to_story_files", nargs="*", 
+                        help="The target story files. Must exist!")
+
+    add_profile_argument(parser)
 
     return parser.parse_args()
 
 
-def export_story_as_config(from_slide, with_fields):
+def export_story_as_config(from_content, with_fields):
     """ Returns the story items for a story slide in the config format
 
     Each slide contains placeholder with a text frame which in turn contains
@@ -64,39 +81,72 @@ def export_story_as_config(from_slide, with_fields):
 
     for item, index in with_fields.items():
         try:
-            shape = from_slide.placeholders[int(index)]
+            text = from_content.text(index)
         except KeyError:
             return None
         
-        if not shape.has_text_frame:
+        if text is None:
             continue
 
-        text = ""
-        paras = shape.text_frame.paragraphs
-        for p in paras:
-            for r in p.runs:
-                link = r.hyperlink
-                has_link = link is not None and (link.address is not None)
-                if has_link:
-                    text += '<'
-                    for c in link.address:
-                        text += c if ord(c) < 128 else ''
-                    text += '>'
-                for c in r.text:
-                    text += c if ord(c) < 128 else ''
-                if has_link:
-                    text += '</>'
-            if( len(paras) > 1):
-                text += "\n"
-                    
         story.add_section(item)
         story.set(item, "text", text.strip())
 
     return story
 
 
-def main():
-    args = parse_arguments()
+def story_key(story_file, key):
+    """ Returns what identifies the slide of a story file
+
+    This is the slide number from the 'count*10' prefix of the file name or
+    the text of the id or title field with the white space normalised.
+    Returns None if there is none.
+    """
+
+    if key == "number":
+        try:
+            return int(int(os.path.basename(story_file).split('_')[0])/10)
+        except ValueError:
+            return None
+
+    story = configparser.ConfigParser()
+    try:
+        story.read(story_file)
+        text = story.get(key, "text")
+    except (configparser.Error, UnicodeDecodeError):
+        return None
+    return " ".join(text.split())
+
+
+def index_slides(contents, with_fields, key):
+    """ Returns the slide numbers of the stories by the text of their 'key' field
+
+    Only slides with all story fields are taken. The first slide wins if a
+    text is not unique.
+    """
+
+    indices = with_fields.values()
+    key_index = with_fields[key]
+
+    slide_index = dict()
+    for num, content in enumerate(contents):
+        if not content.has_placeholders(indices):
+            continue
+        text = content.text(key_index)
+        if text is None:
+            continue
+        slide_index.setdefault(" ".join(text.split()), num)
+    return slide_index
+
+
+def config_text(config):
+    """ Returns the text of a config as written to a file """
+    text = io.StringIO()
+    config.write(text)
+    return text.getvalue()
+
+
+def modify_stories(args):
+    """ Updates the story files from their slides in 'args.from_pptx' """
 
     if args.from_pptx is None:
         logger.error("Must provide PPTX backlog file name for input!")
@@ -106,41 +156,98 @@ def main():
         logger.error("Must provide '.pptx' extension for presentation!")
         return 2
 
-    if (args.to_story_file is None):
+    if len(args.to_story_files) == 0:
         logger.error("Must provide target file for story!")
         return 3
 
-    if not os.path.isfile(args.to_story_file):
-        logger.error("Story file '{}' does not exist!".format(args.to_story_file))
-        return 4
-
-    logger.info("Story file '{}' found!".format(args.to_story_file))
-
-    try:
-        slidenum = int(int(os.path.basename(args.to_story_file).split('_')[0])/10)
-    except:
-        logger.error("Cannot retrieve slide number!")
-        return 5
+    for story_file in args.to_story_files:
+        if not os.path.isfile(story_file):
+            logger.error("Story file '{}' does not exist!".format(story_file))
+            return 4
+
+        logger.info("Story file '{}' found!".format(story_file))
+
+    keys = [story_key(story_file, args.key) for story_file in args.to_story_files]
+    for story_file, key in zip(args.to_story_files, keys):
+        if key is None:
+            if args.key == "number":
+                logger.error("Cannot retrieve slide number!")
+            else:
+                logger.error("Cannot retrieve the {} of story file '{}'!".format(args.key, story_file))
+            return 5
         
-    fields_map = read_fields()
+    with phase("fields"):
+        fields_map = load_fields()
     if fields_map is None:
         logger.error("Must provide correct story field mappings. Run 'pptx_learn.py'!")
         return 6
 
+    if args.key not in ("number",) + tuple(fields_map.keys()):
+        logger.error("The key '{}' is not a story field.".format(args.key))
+        return 12
+
     try:
-        prs = Presentation(args.from_pptx)
-    except NameError:
+        with phase("open"):
+            if args.ooxml or args.cache:
+                count = count_slides(args.from_pptx)
+            else:
+                prs = open_presentation(args.from_pptx)
+                count = len(prs.slides)
+    except (NameError, zipfile.BadZipFile):
         logger.error("Presentation has illegal name.")
         return 7
-    except PackageNotFoundError:
+    except FileNotFoundError:
         logger.error("Presentation is not found.")
         return 8
-    
-    logger.info("The slide number used for modification is '{:d}'".format(slidenum))
 
-    if slidenum >=  len(prs.slides):
-        logger.error("The slide number {:d} is illegal.".format(slidenum))
-        return 9
+    with phase("fields"):
+        fields_map = fields_map.for_deck(args.from_pptx)
+    if fields_map is None:
+        logger.error("The layout of the presentation does not match the story field mappings. Run 'pptx_learn.py'!")
+        return 14
+
+    """ Each slide is read once for all story files """
+
+    if args.cache:
+        with phase("extract") as extract_phase:
+            slides = cached_slides(args.from_pptx)
+            extract_phase.add(len(slides))
+        content_at = lambda num: slides[num]
+    elif args.ooxml and (len(keys) > 1 or args.key != "number"):
+        slides = list(timed_items("extract", read_slides(args.from_pptx)))
+        content_at = lambda num: slides[num]
+    elif args.ooxml:
+        content_at = lambda num: read_slide_at(args.from_pptx, num)
+    else:
+        content_at = lambda num: content_from_slide(prs.slides[num])
+
+    if args.key == "number":
+        for slidenum in keys:
+            logger.info("The slide number used for modification is '{:d}'".format(slidenum))
+
+            if slidenum >=  count:
+                logger.error("The slide number {:d} is illegal.".format(slidenum))
+                return 9
+        nums = [slidenum-1 for slidenum in keys]
+    else:
+        if args.ooxml or args.cache:
+            slide_index = index_slides(slides, fields_map, args.key)
+        else:
+            key_index = set([fields_map[args.key]])
+            slide_index = index_slides(timed_items("extract",
+                                                   (content_from_slide(slide, key_index, False)
+                                                    for slide in prs.slides)),
+                                       fields_map, args.key)
+        logger.info("Indexed '{:d}' stories by {}.".format(len(slide_index), args.key))
+
+        nums = []
+        for story_file, key in zip(args.to_story_files, keys):
+            if key not in slide_index:
+                logger.error("No slide has the {} '{}' of story file '{}'."
+                             .format(args.key, key, story_file))
+                return 13
+            nums.append(slide_index[key])
+            logger.info("The slide number used for modification is '{:d}'".format(nums[-1]+1))
 
     if args.field is not None:
         if not (args.field in fields_map.keys()):
@@ -149,57 +256,75 @@ def main():
 
         logger.info("About to modify the field '{}'.".format(args.field))
     else:
-        logger.info("All fields of slide '{:d}' are taken into account.".format(slidenum))
+        for num in nums:
+            logger.info("All fields of slide '{:d}' are taken into account.".format(num+1))
 
 
-    """ Read the story from the slide """        
+    """ Read the stories from the slides """        
 
-    story_slide = None
-    for num, slide in enumerate(prs.slides):
-        if num == slidenum-1:        
-            story_slide = export_story_as_config(slide, fields_map)
-            break
-    if story_slide is None:
-        logger.info("Skipped the slide #{:d} with foreign format.".format(num))
-        return 11
+    story_slides = dict()
+    updates = []
+    for story_file, num in zip(args.to_story_files, nums):
+        if num not in story_slides:
+            with phase("extract") as extract_phase:
+                extract_phase.add()
+                story_slides[num] = export_story_as_config(content_at(num), fields_map) \
+                    if num >= 0 else None
+        story_slide = story_slides[num]
+        if story_slide is None:
+            logger.info("Skipped the slide #{:d} with foreign format.".format(num))
+            return 11
+
+        if args.field is None:
+            """ Update the complete story """
+            updates.append((story_file, num, config_text(story_slide)))
 
-    if args.field is None:
-        """ Update the complete story """
-        
-        if not args.dry:
-            with open(args.to_story_file, 'w') as storyfile:
-                story_slide.write(storyfile)
-            logger.info("Saved the story of slide #{:d} as '{}'."
-                        .format(num, args.to_story_file))
         else:
-            logger.info("Would save the story of slide #{:d} as '{}'."
-                        .format(num, args.to_story_file))
+            """ Update the field in the story"""        
 
-    else:
-        """ Update the field in the story"""        
+            story_slide_text = story_slide.get(args.field, "text")
 
-        story_slide_text = story_slide.get(args.field, "text")
+            story_config = configparser.ConfigParser()
+            story_config.read(story_file)
+            story_config_text = story_config.get(args.field, "text")
+            story_config.set(args.field, "text", story_slide_text)
 
-        story_config = configparser.ConfigParser()
-        story_config.read(args.to_story_file)
-        story_config_text = story_config.get(args.field, "text")
-        story_config.set(args.field, "text", story_slide_text)
+            logger.info("'{}' replaces '{}'."
+                        .format(story_config_text, story_slide_text))
 
-        logger.info("'{}' replaces '{}'."
-                    .format(story_config_text, story_slide_text))
+            updates.append((story_file, num, config_text(story_config)))
 
-        if not args.dry:
-            with open(args.to_story_file, 'w') as storyfile:
-                story_config.write(storyfile)
-                logger.info("Modified the story of slide #{:d} as '{}'."
-                            .format(num, args.to_story_file))
-        else:
-            logger.info("Would modify the story of slide #{:d} as '{}'."
-                        .format(num+1, args.to_story_file))
+    """ Write the story files which change """
+
+    for story_file, num, text in updates:
+        with open(story_file) as storyfile:
+            if storyfile.read() == text:
+                logger.info("The story of slide #{:d} in '{}' is unchanged."
+                            .format(num, story_file))
+                continue
+
+        if args.dry:
+            logger.info("Would {} the story of slide #{:d} as '{}'."
+                        .format("save" if args.field is None else "modify",
+                                num, story_file))
+            continue
+
+        with phase("write") as write_phase, open(story_file, 'w') as storyfile:
+            write_phase.add()
+            storyfile.write(text)
+        logger.info("{} the story of slide #{:d} as '{}'."
+                    .format("Saved" if args.field is None else "Modified",
+                            num, story_file))
         
     return 0
 
+
+def main():
+    args = parse_arguments()
+
+    with profiled(args.profile, deck=args.from_pptx):
+        return modify_stories(args)
+
         
 if __name__ == "__main__":
     sys.exit(main())
-
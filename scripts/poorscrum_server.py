@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "sepp.heid@t-online.de"
+__doc__ = """ """
+
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import socketserver
+import sys
+import time
+
+from poorscrum import SOCKET_FILE, keep_presentations, __version__
+
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+
+
+""" The scripts served with the module of each """
+SERVED = {"export": "poorscrum_export",
+          "modify": "poorscrum_modify",
+          "burndown": "poorscrum_burndown",
+          "learn": "poorscrum_learn"}
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+
+    parser = argparse.ArgumentParser(
+        prog = os.path.basename(sys.argv[0]),
+        description = "Serve the poorscrum tools with the decks kept open",
+        epilog = "Use 'poorscrum_client.py' to run the tools with the server")
+
+    parser.add_argument("--version", action = "version", version=__version__)
+
+    parser.add_argument("--socket", default=SOCKET_FILE,
+                        help="The Unix socket to listen on")
+
+    parser.add_argument("--decks", type=int, default=8,
+                        help="Number of decks kept open")
+
+    return parser.parse_args()
+
+
+def load_script(script):
+    """ Returns the module of a served script
+
+    The module is imported with its own name as program name, so its logger
+    and its usage messages look the same as from the command line.
+    """
+
+    name = SERVED[script]
+    if name in sys.modules:
+        return sys.modules[name]
+
+    argv = sys.argv
+    sys.argv = [name + ".py"]
+    try:
+        return importlib.import_module(name)
+    finally:
+        sys.argv = argv
+
+
+def run_script(script, argv, cwd):
+    """ Runs the main of a script as from the command line
+
+    Returns the return code with the text written to stdout and to stderr
+    including the log.
+    """
+
+    module = load_script(script)
+
+    out, err = io.StringIO(), io.StringIO()
+    handler = logging.StreamHandler(err)
+    handler.setFormatter(logging.Formatter(logging.BASIC_FORMAT))
+
+    root = logging.getLogger()
+    handlers, root.handlers = root.handlers, [handler]
+    argv, sys.argv = sys.argv, [SERVED[script] + ".py"] + argv
+    here = os.getcwd()
+    try:
+        os.chdir(cwd)
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            try:
+                returncode = module.main()
+            except SystemExit as e:
+                returncode = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+            except Exception:
+                logging.getLogger(SERVED[script] + ".py").exception("Failed in the server.")
+                returncode = 1
+    finally:
+        os.chdir(here)
+        sys.argv = argv
+        root.handlers = handlers
+
+    return returncode, out.getvalue(), err.getvalue()
+
+
+class Poorscrum_Handler(socketserver.StreamRequestHandler):
+    """ Takes one request as JSON object and answers with one JSON object
+
+    The request names the 'script' with its 'argv' and the 'cwd' of the
+    client. The answer holds the 'returncode' with the 'stdout' and
+    'stderr' text. A request with 'stop' ends the server.
+    """
+
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.read().decode("utf-8"))
+        except ValueError:
+            logger.error("Request is not legal JSON.")
+            return
+
+        if request.get("stop", False):
+            self.server.stopped = True
+            answer = {"returncode": 0, "stdout": "", "stderr": ""}
+        elif request.get("script") not in SERVED:
+            answer = {"returncode": 1, "stdout": "",
+                      "stderr": "Script '{}' is not served.\n".format(request.get("script"))}
+        else:
+            start = time.perf_counter()
+            returncode, stdout, stderr = run_script(request["script"],
+                                                    request.get("argv", []),
+                                                    request.get("cwd", os.getcwd()))
+            answer = {"returncode": returncode, "stdout": stdout, "stderr": stderr}
+            logger.info("Served '{}' with '{:d}' in {:.3f}s."
+                        .format(request["script"], returncode, time.perf_counter() - start))
+
+        self.wfile.write(json.dumps(answer).encode("utf-8"))
+
+
+def main():
+    args = parse_arguments()
+
+    if args.decks < 1:
+        logger.error("Must keep at least one deck open!")
+        return 1
+
+    if os.path.exists(args.socket):
+        logger.error("Socket '{}' exists. Is the server running already?".format(args.socket))
+        return 2
+
+    keep_presentations(args.decks)
+
+    """ The requests are served one after the other, since the scripts
+    share the kept decks, the working directory and sys.argv
+    """
+    try:
+        server = socketserver.UnixStreamServer(args.socket, Poorscrum_Handler)
+    except OSError:
+        logger.error("Cannot listen on socket '{}'.".format(args.socket))
+        return 3
+
+    logger.info("Serving on '{}'.".format(args.socket))
+    server.stopped = False
+    try:
+        while not server.stopped:
+            server.handle_request()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        os.remove(args.socket)
+
+    logger.info("Stopped serving.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
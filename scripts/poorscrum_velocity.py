@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+__author__ = "sepp.heid@t-online.de"
+__doc__ = """ """
+
+import argparse
+import os
+import sys
+
+from poorscrum import HISTORY_DIR, __version__
+
+import logging
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(os.path.basename(sys.argv[0]))
+
+
+def parse_arguments():
+    """Parse command line arguments"""
+
+    parser = argparse.ArgumentParser(
+        prog = os.path.basename(sys.argv[0]),
+        description = "Report velocity and burnup from the sprint history",
+        epilog = "Record sprints with 'poorscrum_burndown.py --history'")
+
+    parser.add_argument("--version", action = "version", version=__version__)
+
+    parser.add_argument("--history_dir", default=HISTORY_DIR,
+                        help="The directory of the sprint history")
+
+    parser.add_argument("-w", "--window", type=int, default=3,
+                        help="Number of sprints for the mean velocity")
+
+    parser.add_argument("--story", required=False, default=None,
+                        help="Report the work left of the story with this id in each sprint")
+
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+
+    if args.window < 1:
+        logger.error("Must provide at least one sprint for the mean velocity!")
+        return 1
+
+    from poorscrum import Poorscrum_History
+
+    history = Poorscrum_History(args.history_dir)
+    if len(history) == 0:
+        logger.error("The history '{}' has no sprints.".format(args.history_dir))
+        return 2
+
+    if args.story is not None:
+        trend = history.story_trend(args.story)
+        if len(trend) == 0:
+            logger.error("The story '{}' is not in the history.".format(args.story))
+            return 3
+        for name, start, last in trend:
+            logger.info("Sprint '{}': story '{}' from '{:d}' to '{:d}' points."
+                        .format(name, args.story, start, last))
+        return 0
+
+    committed = history.committed()
+    velocity = history.velocity()
+    burnup = history.burnup()
+    trend = history.trend(args.window)
+
+    for num, section in enumerate(history.sprints.sections()):
+        sprint = history.sprints[section]
+        logger.info("Sprint '{}' of '{}': committed '{:d}', done '{:d}', released '{:d}', mean '{:.1f}'."
+                    .format(sprint["name"], sprint["date"], int(committed[num]),
+                            int(velocity[num]), int(burnup[num]), trend[num]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
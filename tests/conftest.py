@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import configparser
+import os
+import subprocess
+import sys
+
+import pytest
+
+TESTS_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.join(TESTS_DIR, os.pardir, "scripts")
+REPO_HOME = os.path.join(TESTS_DIR, os.pardir, "home", ".poorscrum")
+
+""" The poorscrum package lives next to the scripts """
+sys.path.insert(0, SCRIPTS_DIR)
+
+
+def repo_fields():
+    """ Returns the fields of the pickup file of the repo """
+
+    from poorscrum.poorscrum_fields import Poorscrum_Fields
+
+    pickup = configparser.RawConfigParser()
+    pickup.read(os.path.join(REPO_HOME, "poorscrum_pickup.ini"))
+    return Poorscrum_Fields(pickup.items("FIELDS"))
+
+
+def make_template(template_file):
+    """ Saves the empty backlog of the repo with a table placeholder in the tasks layout """
+
+    from pptx import Presentation
+
+    prs = Presentation(os.path.join(REPO_HOME, "poorscrum_emptybacklog.pptx"))
+    for shape in list(prs.slide_layouts[-2].placeholders):
+        if shape.placeholder_format.idx == 1:
+            shape._element.ph.set("type", "tbl")
+        else:
+            shape._element.getparent().remove(shape._element)
+    prs.save(template_file)
+    return template_file
+
+
+class Backlog:
+    """ A synthetic backlog as generated by the benchmark with its home directory
+
+    The work directory holds the 'backlog.pptx' deck, its story files in
+    'stories' and the home directory of the scripts.
+    """
+
+    def __init__(self, work_dir, stories = 10, tasks = 7, seed = 0):
+        import poorscrum_bench
+
+        self.work_dir = str(work_dir)
+        self.fields_map = repo_fields()
+        args = argparse.Namespace(stories=stories, tasks=tasks, text_length=100,
+                                  link_density=0.2, days=10, seed=seed,
+                                  template=make_template(os.path.join(self.work_dir, "template.pptx")))
+        self.home = poorscrum_bench.generate(self.work_dir, self.fields_map, args)
+        self.pptx_file = self.path("backlog.pptx")
+
+
+    def path(self, *names):
+        return os.path.join(self.work_dir, *names)
+
+
+    def run(self, script, *args):
+        """ Runs a script with the home directory of the backlog """
+
+        return subprocess.run([sys.executable, os.path.join(SCRIPTS_DIR, "poorscrum_{}.py".format(script))]
+                              + [str(arg) for arg in args],
+                              env=dict(os.environ, HOME=self.home), cwd=SCRIPTS_DIR,
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT,
+                              universal_newlines=True)
+
+
+@pytest.fixture
+def backlog(tmp_path):
+    return Backlog(tmp_path)
@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+""" The incremental export with the manifest of the story files written """
+
+import filecmp
+import os
+
+from pptx import Presentation
+
+from poorscrum import Status
+
+
+def story_files(out_dir):
+    """ Returns the story files with the inode and the modification time of each """
+
+    files = dict()
+    for name in os.listdir(out_dir):
+        stat = os.stat(os.path.join(out_dir, name))
+        files[name] = (stat.st_ino, stat.st_mtime_ns)
+    return files
+
+
+def edit_story(backlog, count, text):
+    """ Sets the description of a story slide of the backlog """
+
+    prs = Presentation(backlog.pptx_file)
+    story_slide = prs.slides[2*(count-1)]
+    story_slide.placeholders[backlog.fields_map["description"]].text_frame.text = text
+    prs.save(backlog.pptx_file)
+
+
+def test_unchanged_deck_writes_nothing(backlog):
+    out_dir = backlog.path("out")
+    assert backlog.run("export", "--incremental", backlog.pptx_file, out_dir).returncode == 0
+    first = story_files(out_dir)
+    assert len(first) == 10
+
+    done = backlog.run("export", "--incremental", backlog.pptx_file, out_dir)
+    assert done.returncode == 0
+    assert "Saved '0' changed stories, kept '10', removed '0'." in done.stdout
+    assert story_files(out_dir) == first
+
+
+def test_edited_slide_writes_its_story(backlog):
+    out_dir = backlog.path("out")
+    assert backlog.run("export", "--incremental", backlog.pptx_file, out_dir).returncode == 0
+    first = story_files(out_dir)
+
+    edit_story(backlog, 3, "changed description")
+    done = backlog.run("export", "--incremental", backlog.pptx_file, out_dir)
+    assert done.returncode == 0
+    assert "Saved '1' changed stories, kept '9', removed '0'." in done.stdout
+
+    second = story_files(out_dir)
+    assert second.keys() == first.keys()
+    changed = [name for name in second if second[name] != first[name]]
+    assert len(changed) == 1 and changed[0].startswith("0030_")
+    with open(os.path.join(out_dir, changed[0])) as story_file:
+        assert "changed description" in story_file.read()
+
+
+def test_changed_options_remove_stale_stories(backlog):
+    out_dir = backlog.path("out")
+    assert backlog.run("export", "--incremental", backlog.pptx_file, out_dir).returncode == 0
+    first = story_files(out_dir)
+
+    done = backlog.run("export", "--incremental", "--with_ids", backlog.pptx_file, out_dir)
+    assert done.returncode == 0
+    assert "removed '10'" in done.stdout
+
+    full_dir = backlog.path("full")
+    assert backlog.run("export", "--with_ids", backlog.pptx_file, full_dir).returncode == 0
+    second = story_files(out_dir)
+    assert second.keys() == story_files(full_dir).keys()
+    assert not (second.keys() & first.keys())
+    for name in second:
+        assert filecmp.cmp(os.path.join(out_dir, name), os.path.join(full_dir, name), shallow=False)
+
+
+def test_kanban_tree_made_first(backlog):
+    out_dir = backlog.path("out")
+    done = backlog.run("export", "--kanban", "--status_first", "undone", backlog.pptx_file, out_dir)
+    assert done.returncode == 0, done.stdout
+    assert sorted(os.listdir(out_dir)) == \
+        sorted(status.value.lower() for status in Status if status >= Status("undone"))
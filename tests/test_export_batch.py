@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+
+""" The manifest of the batch export """
+
+from poorscrum_export_batch import read_manifest
+
+
+def test_manifest_paths_with_spaces(tmp_path):
+    manifest_file = tmp_path / "decks.txt"
+    manifest_file.write_text("# decks of the sprint\n"
+                             "\n"
+                             "team.pptx stories\n"
+                             "'my team/backlog.pptx' \"my stories\"  # quoted\n"
+                             "my\\ deck.pptx out\\ dir\n")
+
+    assert read_manifest(str(manifest_file)) == [
+        ("team.pptx", "stories"),
+        ("my team/backlog.pptx", "my stories"),
+        ("my deck.pptx", "out dir")]
+
+
+def test_manifest_bad_lines(tmp_path):
+    manifest_file = tmp_path / "decks.txt"
+
+    manifest_file.write_text("team.pptx stories extra\n")
+    assert read_manifest(str(manifest_file)) is None
+
+    manifest_file.write_text("'team.pptx stories\n")
+    assert read_manifest(str(manifest_file)) is None
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+""" The sprint history as column store """
+
+import os
+
+import numpy as np
+
+from poorscrum.poorscrum_history import Poorscrum_History
+
+
+def test_append_and_reopen(tmp_path):
+    path = str(tmp_path / "history")
+    first = np.array([[8, 5, 3, 0], [13, 13, 8, 5]])
+    second = np.array([[5, 3, 2, 1, 0], [8, 8, 8, 8, 8], [3, 2, 0, 0, 0]])
+
+    history = Poorscrum_History(path)
+    assert history.append("Sprint 1 at 100%", first, ["s1", "s2"], 3, 2, 30) == 0
+    assert history.append("Sprint 2", second, ["s2", "s3", "s1"], 5, 2, 30) == 1
+
+    history = Poorscrum_History(path)
+    assert len(history) == 2
+    assert history.rows == first.size + second.size
+    assert history.sprints["0"]["name"] == "Sprint 1 at 100%"
+    assert history.stories == ["s1", "s2", "s3"]
+    assert history.story_ids(1) == ["s2", "s3", "s1"]
+    assert (history.work(0) == first).all()
+    assert (history.work(1) == second).all()
+    assert history.totals().tolist() == [[21, 18, 11, 5, 0], [16, 13, 10, 9, 8]]
+    assert history.velocity().tolist() == [10, 8]
+    assert history.story_trend("s1") == [("Sprint 1 at 100%", 8, 3), ("Sprint 2", 3, 0)]
+
+
+def test_unfinished_append_dropped(tmp_path):
+    """ Rows beyond the sprints recorded are dropped by the next append """
+
+    path = str(tmp_path / "history")
+    history = Poorscrum_History(path)
+    history.append("Sprint 1", np.array([[3, 2, 1]]), ["s1"], 3, 1, 10)
+    with open(history.column_name("points"), "ab") as col:
+        np.array([99, 99], dtype="<i4").tofile(col)
+
+    history = Poorscrum_History(path)
+    history.append("Sprint 2", np.array([[5, 4, 0]]), ["s1"], 3, 1, 10)
+    history = Poorscrum_History(path)
+    assert os.path.getsize(history.column_name("points")) == 6*4
+    assert history.totals().tolist() == [[3, 2, 1], [5, 4, 0]]
+
+
+def test_burndown_appends_unless_dry(backlog):
+    history_dir = os.path.join(backlog.home, ".poorscrum", "poorscrum_history")
+
+    done = backlog.run("burndown", "--dry", "--history", "--sprint_name", "Sprint 50%",
+                       backlog.pptx_file)
+    assert done.returncode == 0, done.stdout
+    assert "Would append sprint 'Sprint 50%' to the history." in done.stdout
+    assert not os.path.exists(history_dir)
+
+    done = backlog.run("burndown", "--history", "--sprint_name", "Sprint 50%",
+                       backlog.pptx_file)
+    assert done.returncode == 0, done.stdout
+    history = Poorscrum_History(history_dir)
+    assert len(history) == 1
+    assert history.sprints["0"]["name"] == "Sprint 50%"
+    assert len(history.story_ids(0)) == 10
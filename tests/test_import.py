@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+""" The import of story files into the parts of a presentation """
+
+import configparser
+import glob
+import os
+import shutil
+
+import pytest
+
+from pptx import Presentation
+
+from conftest import Backlog
+
+
+def story_files(backlog, stories = None):
+    return sorted(glob.glob(backlog.path("stories", "*.story")))[:stories]
+
+
+def slide_counts(pptx_files):
+    return [len(Presentation(pptx_file).slides) for pptx_file in pptx_files]
+
+
+def test_chunk_parts(backlog):
+    """ Four stories per part, the last part with the rest """
+
+    to_pptx = backlog.path("run.pptx")
+    done = backlog.run("import", "--empty", "--chunk", "4", to_pptx, *story_files(backlog))
+    assert done.returncode == 0, done.stdout
+
+    parts = sorted(glob.glob(backlog.path("run_*.pptx")))
+    assert [os.path.basename(part) for part in parts] == \
+        ["run_000.pptx", "run_001.pptx", "run_002.pptx"]
+    assert slide_counts(parts) == [8, 8, 4]
+    assert not os.path.exists(to_pptx)
+
+
+def test_chunk_last_part_saved(backlog):
+    """ No empty part follows if the stories fill the last part """
+
+    done = backlog.run("import", "--empty", "--chunk", "5", backlog.path("run.pptx"),
+                       *story_files(backlog))
+    assert done.returncode == 0, done.stdout
+
+    parts = sorted(glob.glob(backlog.path("run_*.pptx")))
+    assert [os.path.basename(part) for part in parts] == ["run_000.pptx", "run_001.pptx"]
+    assert slide_counts(parts) == [10, 10]
+
+
+def test_chunk_input_slides_in_first_part(backlog):
+    """ The further parts start with the layouts but not the slides of the input """
+
+    to_pptx = backlog.path("run.pptx")
+    shutil.copy(backlog.pptx_file, to_pptx)
+    done = backlog.run("import", "--chunk", "2", to_pptx, *story_files(backlog, 3))
+    assert done.returncode == 0, done.stdout
+
+    parts = sorted(glob.glob(backlog.path("run_*.pptx")))
+    assert slide_counts(parts) == [20 + 4, 2]
+
+    first, last = Presentation(parts[0]), Presentation(parts[-1])
+    assert len(last.slide_layouts) == len(first.slide_layouts)
+    assert [slide.slide_layout.name for slide in last.slides] == \
+        [slide.slide_layout.name for slide in list(first.slides)[-2:]]
+
+
+@pytest.mark.parametrize("options", [[], ["--bulk"]])
+def test_many_tasks_round_trip(tmp_path, options):
+    """ A story with more tasks than the least rows keeps all of them """
+
+    from poorscrum import TASK_ROWS
+
+    backlog = Backlog(tmp_path, stories=3, tasks=3*TASK_ROWS)
+    to_pptx = backlog.path("run.pptx")
+    done = backlog.run("import", "--empty", *options, to_pptx, *story_files(backlog))
+    assert done.returncode == 0, done.stdout
+
+    out_dir = backlog.path("out")
+    done = backlog.run("export", "--with_title", "0", to_pptx, out_dir)
+    assert done.returncode == 0, done.stdout
+
+    exported_files = sorted(glob.glob(os.path.join(out_dir, "*.story")))
+    assert len(exported_files) == 3
+    for exported_file, story_file in zip(exported_files, story_files(backlog)):
+        exported = configparser.RawConfigParser()
+        exported.read(exported_file)
+        story = configparser.RawConfigParser()
+        story.read(story_file)
+        assert len(exported.items("tasks")) == 3*TASK_ROWS + 1
+        assert exported.items("tasks") == story.items("tasks")
@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+""" Parity of the direct OOXML reader with the python-pptx reader
+
+Both readers have to return the same placeholder paragraphs with their
+hyperlink addresses and the same table rows for each slide.
+"""
+
+import os
+import random
+
+import pytest
+
+from pptx import Presentation
+from pptx.opc.constants import RELATIONSHIP_TYPE as RT
+from pptx.util import Cm
+
+from poorscrum.poorscrum_cache import cached_slides
+from poorscrum.poorscrum_ooxml import count_slides, read_slide_at, read_slides
+from poorscrum.poorscrum_slide import content_from_slide
+
+HELLO_PPTX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "hello_pptx.pptx")
+
+WORDS = ("story", "task", "sprint", "backlog", "dev", "value", "size", "done")
+
+
+def pptx_contents(pptx_file):
+    return [content_from_slide(slide) for slide in Presentation(pptx_file).slides]
+
+
+def assert_parity(pptx_file):
+    expected = pptx_contents(pptx_file)
+    actual = list(read_slides(pptx_file))
+
+    assert len(actual) == len(expected) == count_slides(pptx_file)
+    for num, (ooxml, pptx) in enumerate(zip(actual, expected)):
+        assert ooxml.placeholders == pptx.placeholders, "slide #{:d}".format(num+1)
+        assert ooxml.tables == pptx.tables, "slide #{:d}".format(num+1)
+        for index in pptx.placeholders:
+            assert ooxml.text(index) == pptx.text(index)
+        assert ooxml.is_tasks == pptx.is_tasks
+
+
+def add_internal_link(run, slide_part, to_slide):
+    """ Links a run to another slide of the presentation """
+
+    rId = slide_part.relate_to(to_slide.part, RT.SLIDE)
+    hlink = run.font._rPr.add_hlinkClick(rId)
+    hlink.set("action", "ppaction://hlinksldjump")
+
+
+def add_action_link(run):
+    """ Links a run to the next slide without relationship """
+
+    hlink = run.font._rPr.add_hlinkClick("")
+    hlink.set("action", "ppaction://hlinkshowjump?jump=nextslide")
+
+
+def fill_frame(frame, rnd, slide_part, slides):
+    """ Fills a text frame with paragraphs of plain and linked runs """
+
+    for num in range(rnd.randint(1, 3)):
+        p = frame.paragraphs[0] if num == 0 else frame.add_paragraph()
+        for word in rnd.sample(WORDS, rnd.randint(0, 4)):
+            r = p.add_run()
+            r.text = word + " "
+            kind = rnd.random()
+            if kind < 0.15:
+                r.hyperlink.address = "https://example.com/{}".format(word)
+            elif kind < 0.25 and len(slides) > 0:
+                add_internal_link(r, slide_part, rnd.choice(slides))
+            elif kind < 0.3:
+                add_action_link(r)
+
+
+def make_deck(pptx_file, stories, seed = 0):
+    """ Saves a deck of story slides each followed by a slide with a task table """
+
+    rnd = random.Random(seed)
+    prs = Presentation(HELLO_PPTX)
+    story_layout = prs.slide_layouts[-1]
+    blank_layout = prs.slide_layouts[6]
+
+    slides = list(prs.slides)
+    for story in range(stories):
+        slide = prs.slides.add_slide(story_layout)
+        for shape in slide.placeholders:
+            if shape.has_text_frame:
+                fill_frame(shape.text_frame, rnd, slide.part, slides)
+        slides.append(slide)
+
+        slide = prs.slides.add_slide(blank_layout)
+        rows = rnd.randint(2, 9)
+        table = slide.shapes.add_table(rows, 5, Cm(1), Cm(1), Cm(20), Cm(10)).table
+        for row in table.rows:
+            for cell in row.cells:
+                cell.text_frame.text = ""
+                fill_frame(cell.text_frame, rnd, slide.part, slides)
+        slides.append(slide)
+
+    prs.save(pptx_file)
+    return pptx_file
+
+
+def test_hello_pptx():
+    assert_parity(HELLO_PPTX)
+
+
+def test_hello_pptx_slide_at():
+    expected = pptx_contents(HELLO_PPTX)
+    for num, pptx in enumerate(expected):
+        ooxml = read_slide_at(HELLO_PPTX, num)
+        assert ooxml.placeholders == pptx.placeholders
+        assert ooxml.tables == pptx.tables
+
+
+@pytest.mark.parametrize("seed", [0, 1, 2])
+def test_generated_deck(tmp_path, seed):
+    assert_parity(make_deck(str(tmp_path / "deck.pptx"), 10, seed))
+
+
+def test_generated_large_deck(tmp_path):
+    assert_parity(make_deck(str(tmp_path / "large.pptx"), 150))
+
+
+def test_links(tmp_path):
+    """ External, internal and action links get the addresses of python-pptx """
+
+    pptx_file = make_deck(str(tmp_path / "links.pptx"), 10)
+    addresses = set(address for content in read_slides(pptx_file)
+                    for paras in content.placeholders.values() if paras is not None
+                    for runs in paras for address, text in runs)
+    assert any(address.startswith("https://") for address in addresses if address)
+    assert any(address.endswith(".xml") for address in addresses if address)
+    assert None in addresses
+    assert_parity(pptx_file)
+
+
+def test_tables(tmp_path):
+    pptx_file = make_deck(str(tmp_path / "tables.pptx"), 5)
+    contents = list(read_slides(pptx_file))
+    tasks = [content for content in contents if content.is_tasks]
+    assert len(tasks) == 5
+    assert all(len(content.table[0]) == 5 for content in tasks)
+    assert_parity(pptx_file)
+
+
+def test_cached_slides(tmp_path):
+    """ The cache returns the contents of the direct reader """
+
+    pptx_file = make_deck(str(tmp_path / "cached.pptx"), 10)
+    expected = list(read_slides(pptx_file))
+    for contents in (cached_slides(pptx_file), cached_slides(pptx_file)):
+        assert [content.placeholders for content in contents] == \
+            [content.placeholders for content in expected]
+        assert [content.tables for content in contents] == \
+            [content.tables for content in expected]
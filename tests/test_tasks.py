@@ -0,0 +1,54 @@
+# -*- coding: utf-8 -*-
+
+""" The cells of the task tables written in bulk """
+
+from pptx import Presentation
+
+from conftest import make_template
+from poorscrum.poorscrum_ooxml import NS_A
+from poorscrum.poorscrum_tasks import Poorscrum_Tasks
+
+TASKS = [["write tests", "5", "3", "2", "a.b"], ["review", "2", "2", "0", "c.d"]]
+
+
+def tasks_slide(tmp_path, rows = 4):
+    prs = Presentation(make_template(str(tmp_path / "template.pptx")))
+    slide = prs.slides.add_slide(prs.slide_layouts[-2])
+    return Poorscrum_Tasks(slide, prs.slide_height, prs.slide_width, rows=rows)
+
+
+def cell_texts(tasks):
+    return [[cell.text for cell in row.cells] for row in tasks.table.rows]
+
+
+def test_put_into_run_text(tmp_path):
+    tasks = tasks_slide(tmp_path)
+    assert tasks.put_as_list(TASKS) == 2
+    tasks.put_as_row(3, ["Total", "8", "5", "3", "Points"])
+
+    assert cell_texts(tasks) == [TASKS[0], TASKS[1],
+                                 ["<task3>", "0", "0", "0", "<dev>"],
+                                 ["Total", "8", "5", "3", "Points"]]
+    assert tasks.get_from_list() == cell_texts(tasks)
+
+    """ The text is in the 'a:t' element of the run only """
+    for r in tasks.tbl.iter(NS_A + "r"):
+        assert not (r.xpath("text()") and r.xpath("text()")[0].strip())
+        assert r.find(NS_A + "t") is not None
+
+
+def test_put_into_emptied_cells(tmp_path):
+    tasks = tasks_slide(tmp_path)
+    for p in tasks.tbl.iter(NS_A + "p"):
+        for r in p.findall(NS_A + "r"):
+            p.remove(r)
+    assert all(text == "" for row in cell_texts(tasks) for text in row)
+
+    tasks.put_as_list(TASKS, 1)
+    assert cell_texts(tasks)[1:3] == TASKS
+
+    """ The new runs come before the end of the paragraph """
+    for p in tasks.tbl.iter(NS_A + "p"):
+        names = [child.tag for child in p]
+        if NS_A + "endParaRPr" in names and NS_A + "r" in names:
+            assert names.index(NS_A + "r") < names.index(NS_A + "endParaRPr")
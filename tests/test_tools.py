@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+""" The story points on the scales """
+
+import pytest
+
+from poorscrum.poorscrum_tools import fibonacci, story_points, task_totals
+
+
+@pytest.mark.parametrize("start, points", [
+    (0, 0), (1, 1), (4, 5), (34, 34), (35, 55), (55, 55), (90, 144), (1000, 1597)])
+def test_fibonacci_unbounded(start, points):
+    assert story_points(start) == points
+
+
+def test_fibonacci_numbers():
+    assert [fibonacci(n) for n in range(12)] == [0, 1, 1, 2, 3, 5, 8, 13, 21, 34, 55, 89]
+    assert fibonacci(40) == 102334155
+
+
+@pytest.mark.parametrize("start, points", [
+    (0, 0), (1, 1), (4, 5), (14, 20), (21, 40), (41, 100), (100, 100), (101, 100), (500, 100)])
+def test_modified_scale(start, points):
+    assert story_points(start, "modified") == points
+
+
+@pytest.mark.parametrize("start, size", [
+    (0, "XS"), (1, "XS"), (2, "S"), (4, "L"), (13, "XXL"), (14, "XXL"), (200, "XXL")])
+def test_tshirt_scale(start, size):
+    assert story_points(start, "tshirt") == size
+
+
+def test_task_totals():
+    tasks = [["a", "20", "12", "8", "a.b"], ["b", "16", "10", "6", "c.d"]]
+    assert task_totals(tasks) == ["Total", "55", "34", "21", "Points"]
+    assert task_totals(tasks, "modified") == ["Total", "40", "40", "20", "Points"]
+    assert task_totals(tasks, "tshirt") == ["Total", "XXL", "XXL", "XXL", "Points"]
+    assert task_totals([]) == ["Total", "0", "0", "0", "Points"]
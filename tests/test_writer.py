@@ -0,0 +1,119 @@
+# -*- coding: utf-8 -*-
+
+""" The story files written into a tree or an archive """
+
+import os
+import sqlite3
+import tarfile
+import zipfile
+
+import pytest
+
+from poorscrum.poorscrum_writer import Poorscrum_Writer, archive_name
+
+STORIES = {
+    "0010_first.story": "[status]\ntext = done\n\n[id]\ntext = 1\n\n",
+    os.path.join("sprinting", "a.b", "0020_second.story"): "[status]\ntext = SPRINTING\n\n[id]\ntext = 2\n\n",
+}
+
+
+def all_files(to_dir):
+    return sorted(os.path.relpath(os.path.join(root, name), to_dir)
+                  for root, dirs, names in os.walk(to_dir) for name in names)
+
+
+def write_stories(writer, to_dir):
+    for name, text in STORIES.items():
+        pathname = os.path.join(to_dir, name)
+        writer.make_dir(os.path.dirname(pathname))
+        writer.write(pathname, text)
+
+
+def test_tree(tmp_path):
+    to_dir = str(tmp_path / "out")
+    os.makedirs(to_dir)
+    with Poorscrum_Writer(to_dir, jobs=2) as writer:
+        write_stories(writer, to_dir)
+
+    assert all_files(to_dir) == sorted(STORIES)
+    for name, text in STORIES.items():
+        with open(os.path.join(to_dir, name)) as story_file:
+            assert story_file.read() == text
+
+    umask = os.umask(0)
+    os.umask(umask)
+    assert os.stat(os.path.join(to_dir, "0010_first.story")).st_mode & 0o777 == 0o666 & ~umask
+
+
+def test_tree_rename_in_place(tmp_path):
+    """ The file is replaced by the last write. A failed write keeps the old file """
+
+    to_dir = str(tmp_path / "out")
+    os.makedirs(to_dir)
+    pathname = os.path.join(to_dir, "0010_first.story")
+    with Poorscrum_Writer(to_dir) as writer:
+        for num in range(20):
+            writer.write(pathname, "[id]\ntext = {:d}\n".format(num))
+    with open(pathname) as story_file:
+        assert story_file.read() == "[id]\ntext = 19\n"
+
+    with pytest.raises(TypeError):
+        with Poorscrum_Writer(to_dir) as writer:
+            writer.write(pathname, None)
+    with open(pathname) as story_file:
+        assert story_file.read() == "[id]\ntext = 19\n"
+    assert all_files(to_dir) == ["0010_first.story"]
+
+
+def test_make_dirs(tmp_path):
+    to_dir = str(tmp_path / "out")
+    dirs = [os.path.join(to_dir, status) for status in ("none", "done")]
+    with Poorscrum_Writer(to_dir) as writer:
+        writer.make_dirs(dirs)
+        assert all(os.path.isdir(dir_name) for dir_name in dirs)
+        assert not writer.make_dir(dirs[0])
+
+
+@pytest.mark.parametrize("archive", ["tar", "tgz"])
+def test_tar(tmp_path, archive):
+    to_dir = str(tmp_path / "out")
+    with Poorscrum_Writer(to_dir, archive) as writer:
+        write_stories(writer, to_dir)
+
+    assert os.listdir(str(tmp_path)) == [os.path.basename(archive_name(to_dir, archive))]
+    with tarfile.open(archive_name(to_dir, archive)) as tar:
+        for name, text in STORIES.items():
+            assert tar.extractfile(os.path.join("out", name)).read().decode("utf-8") == text
+
+
+def test_zip(tmp_path):
+    to_dir = str(tmp_path / "out")
+    with Poorscrum_Writer(to_dir, "zip") as writer:
+        write_stories(writer, to_dir)
+
+    with zipfile.ZipFile(archive_name(to_dir, "zip")) as archive:
+        assert sorted(archive.namelist()) == sorted(os.path.join("out", name) for name in STORIES)
+        for name, text in STORIES.items():
+            assert archive.read(os.path.join("out", name)).decode("utf-8") == text
+
+
+def test_sqlite(tmp_path):
+    to_dir = str(tmp_path / "out")
+    with Poorscrum_Writer(to_dir, "sqlite", sprint="S1") as writer:
+        write_stories(writer, to_dir)
+
+    connection = sqlite3.connect(archive_name(to_dir, "sqlite"))
+    rows = connection.execute("SELECT name, sprint, story FROM stories ORDER BY position").fetchall()
+    connection.close()
+    assert rows == [(name.replace(os.sep, "/"), "S1", text) for name, text in STORIES.items()]
+
+
+def test_archive_incomplete(tmp_path):
+    """ An export which fails leaves no archive and no temporary file """
+
+    to_dir = str(tmp_path / "out")
+    with pytest.raises(RuntimeError):
+        with Poorscrum_Writer(to_dir, "zip") as writer:
+            write_stories(writer, to_dir)
+            raise RuntimeError("export failed")
+    assert os.listdir(str(tmp_path)) == []